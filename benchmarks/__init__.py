@@ -0,0 +1,5 @@
+"""Performance benchmarks for dbt-jobs-as-code.
+
+Each benchmark is a module that can be run with `python -m benchmarks.<name>` from the root of
+the repository and prints its results as JSON.
+"""
@@ -0,0 +1,111 @@
+"""Measure the time spent importing modules when running CLI commands.
+
+Each scenario runs the CLI in a new interpreter with `python -X importtime` and sums the
+cumulative time of the top-level imports. The `plan` scenario runs against an empty snapshot
+file, so that it doesn't need to connect to dbt Cloud.
+
+    python -m benchmarks.import_time            # print the results as JSON
+    python -m benchmarks.import_time --check    # exit with 1 if a scenario is over budget
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from beartype.typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+JOBS_FILE = str(REPO_ROOT / "example_jobs_file" / "jobs.yml")
+
+# Budgets in milliseconds for the total import time of each scenario. They are generous enough
+# to not be flaky on CI runners, but catch a heavy dependency being imported at startup again.
+BUDGETS_MS = {
+    "help": 200,
+    "validate": 600,
+    "plan": 1200,
+}
+
+
+def _scenarios(snapshot_path: str) -> Dict[str, List[str]]:
+    return {
+        "help": ["--help"],
+        "validate": ["validate", JOBS_FILE],
+        "plan": ["plan", JOBS_FILE, "--snapshot", snapshot_path, "--json"],
+    }
+
+
+def _write_empty_snapshot(path: str) -> None:
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshotWriter
+
+    with CloudSnapshotWriter(path, account_id=43791):
+        pass
+
+
+def parse_importtime(stderr: str) -> Dict[str, int]:
+    """Return the cumulative import time in microseconds of each top-level module."""
+    top_level = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # nested imports are indented below the module importing them
+        if not name.startswith("  "):
+            top_level[name.strip()] = int(cumulative)
+    return top_level
+
+
+def measure(args: List[str]) -> Dict[str, int]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "dbt_jobs_as_code.main", *args],
+        capture_output=True,
+        text=True,
+        env={**os.environ, "DBT_API_KEY": os.environ.get("DBT_API_KEY", "benchmark")},
+        cwd=REPO_ROOT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"`{' '.join(args)}` failed:\n{result.stderr[-2000:]}")
+    return parse_importtime(result.stderr)
+
+
+def run(repeat: int) -> Dict[str, Dict]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, "snapshot.jsonl.gz")
+        _write_empty_snapshot(snapshot_path)
+
+        for name, args in _scenarios(snapshot_path).items():
+            runs = [measure(args) for _ in range(repeat)]
+            totals_ms = [sum(modules.values()) / 1000 for modules in runs]
+            slowest = sorted(runs[-1].items(), key=lambda item: item[1], reverse=True)[:5]
+            results[name] = {
+                "median_ms": round(statistics.median(totals_ms), 1),
+                "budget_ms": BUDGETS_MS[name],
+                "slowest_imports_ms": {module: round(us / 1000, 1) for module, us in slowest},
+            }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Number of runs per scenario.")
+    parser.add_argument("--check", action="store_true", help="Fail if a budget is exceeded.")
+    args = parser.parse_args()
+
+    results = run(args.repeat)
+    print(json.dumps(results, indent=2))
+
+    over_budget = [
+        name for name, result in results.items() if result["median_ms"] > result["budget_ms"]
+    ]
+    if args.check and over_budget:
+        print(f"Over the import time budget: {', '.join(over_budget)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
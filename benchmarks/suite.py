@@ -0,0 +1,231 @@
+"""Measure the core operations of dbt-jobs-as-code on synthetic jobs.
+
+Each operation runs several times for each number of jobs and the median duration is kept. dbt
+Cloud is replaced by an in-memory snapshot, so only the time spent in the package is measured.
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --sizes 10,100 --compare results.json --max-regression-pct 20
+
+With `--compare`, the results are compared with a previous run and the command exits with 1 if
+an operation got slower than the threshold.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from importlib.metadata import version
+from pathlib import Path
+from unittest.mock import patch
+
+from beartype.typing import Callable, Dict, List, Optional
+
+from benchmarks import synthetic
+
+# 10k jobs take several minutes per operation, pass `--sizes 10,100,1000,10000` to include them
+DEFAULT_SIZES = [10, 100, 1000]
+# the number of env var overwrites per job in `env_var_changes`
+ENV_VARS_PER_JOB = 20
+
+
+def _median_ms(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    durations = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started_at)
+    return {
+        "median_ms": round(statistics.median(durations) * 1000, 3),
+        "min_ms": round(min(durations) * 1000, 3),
+    }
+
+
+def _write_jobs_files(directory: Path, cloud_jobs: List[dict], style: str) -> Dict[str, object]:
+    jobs_yml, vars_yml = synthetic.jobs_yml(cloud_jobs, style)
+    jobs_file = directory / f"jobs_{style}.yml"
+    jobs_file.write_text(jobs_yml)
+    vars_files = None
+    if vars_yml is not None:
+        vars_file = directory / f"vars_{style}.yml"
+        vars_file.write_text(vars_yml)
+        vars_files = [str(vars_file)]
+    return {"config_files": [str(jobs_file)], "vars_file": vars_files}
+
+
+def run_suite(sizes: List[int], repeat: int) -> List[dict]:
+    """Return the duration of each operation for each number of jobs."""
+    from loguru import logger
+    from rich.console import Console
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        Change,
+        ChangeOperation,
+        ChangeSet,
+        build_change_set,
+    )
+    from dbt_jobs_as_code.exporter.export import export_jobs_yml
+    from dbt_jobs_as_code.loader.load import load_job_configuration
+    from dbt_jobs_as_code.schemas import check_job_mapping_same
+    from dbt_jobs_as_code.schemas.custom_environment_variable import CustomEnvironmentVariable
+    from dbt_jobs_as_code.schemas.job import JobDefinition
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshot, OfflineDBTCloud
+
+    logger.remove()
+    results = []
+
+    def measure(operation: str, jobs: int, func: Callable[[], object]) -> None:
+        results.append({"operation": operation, "jobs": jobs, **_median_ms(func, repeat)})
+        print(f"{operation} ({jobs} jobs): {results[-1]['median_ms']} ms", file=sys.stderr)
+
+    for size in sizes:
+        cloud_jobs = synthetic.raw_jobs(size)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            for style in ["plain", "anchored", "templated"]:
+                files = _write_jobs_files(Path(tmp_dir), cloud_jobs, style)
+                measure(
+                    f"load_job_configuration[{style}]",
+                    size,
+                    lambda: load_job_configuration(**files),
+                )
+
+            measure(
+                "job_definition_from_payload",
+                size,
+                lambda: [JobDefinition(**job) for job in cloud_jobs],
+            )
+
+            defined_jobs = load_job_configuration(
+                **_write_jobs_files(Path(tmp_dir), cloud_jobs, "plain")
+            ).jobs
+            parsed_cloud_jobs = [JobDefinition(**job) for job in cloud_jobs]
+            pairs = [(defined_jobs[job.identifier], job) for job in parsed_cloud_jobs]
+            measure(
+                "check_job_mapping_same",
+                size,
+                lambda: [check_job_mapping_same(source, dest) for source, dest in pairs],
+            )
+
+            snapshot = CloudSnapshot(account_id=synthetic.ACCOUNT_ID)
+            snapshot.jobs = {job["id"]: job for job in cloud_jobs}
+            snapshot.env_vars = {job["id"]: {} for job in cloud_jobs}
+            jobs_file = str(Path(tmp_dir) / "jobs_plain.yml")
+            with patch(
+                "dbt_jobs_as_code.cloud_yaml_mapping.change_set.DBTCloud",
+                lambda **kwargs: OfflineDBTCloud(snapshot),
+            ):
+                measure(
+                    "build_change_set",
+                    size,
+                    lambda: build_change_set(jobs_file, None, False, [], [], False, None, True),
+                )
+                change_set = build_change_set(jobs_file, None, False, [], [], False, None, True)
+
+            env_vars = [
+                CustomEnvironmentVariable(name=f"DBT_VAR_{index}", value="new")
+                for index in range(ENV_VARS_PER_JOB)
+            ]
+
+            def env_var_changes() -> ChangeSet:
+                # a plan updating all the env var overwrites of every job
+                env_var_change_set = ChangeSet()
+                for job in parsed_cloud_jobs:
+                    for env_var in env_vars:
+                        env_var_change_set.append(
+                            Change(
+                                identifier=f"{job.identifier}:{env_var.name}",
+                                type="env var overwrite",
+                                action="UPDATE",
+                                proj_id=job.project_id,
+                                env_id=job.environment_id,
+                                operation=ChangeOperation.UPDATE_ENV_VAR,
+                                dbt_cloud=None,
+                                parameters={
+                                    "project_id": job.project_id,
+                                    "job_id": job.id,
+                                    "custom_env_var": env_var,
+                                    "env_var_id": job.id,
+                                },
+                                differences={"old_value": "old", "new_value": "new"},
+                            )
+                        )
+                return env_var_change_set
+
+            measure("env_var_changes", size, env_var_changes)
+            measure("change_set_to_json", size, lambda: json.dumps(change_set.to_json()))
+            measure(
+                "change_set_to_table",
+                size,
+                lambda: Console(file=io.StringIO(), width=120).print(change_set.to_table()),
+            )
+
+            def export() -> None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    export_jobs_yml(parsed_cloud_jobs)
+
+            measure("export_jobs_yml", size, export)
+
+    return results
+
+
+def compare(results: List[dict], baseline: List[dict], max_regression_pct: float) -> List[str]:
+    """Return the operations that got slower than the baseline by more than the threshold."""
+    baseline_ms = {
+        (result["operation"], result["jobs"]): result["median_ms"] for result in baseline
+    }
+    regressions = []
+    for result in results:
+        previous_ms = baseline_ms.get((result["operation"], result["jobs"]))
+        if not previous_ms:
+            continue
+        change_pct = 100 * (result["median_ms"] / previous_ms - 1)
+        if change_pct > max_regression_pct:
+            regressions.append(
+                f"{result['operation']} ({result['jobs']} jobs): {previous_ms} ms -> "
+                f"{result['median_ms']} ms (+{change_pct:.0f}%)"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(size) for size in DEFAULT_SIZES),
+        help="Comma separated numbers of jobs.",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per operation.")
+    parser.add_argument("--output", help="Write the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON file with the results of a previous run.")
+    parser.add_argument("--max-regression-pct", type=float, default=20.0)
+    args = parser.parse_args()
+
+    results = run_suite([int(size) for size in args.sizes.split(",")], args.repeat)
+    report = {
+        "version": version("dbt-jobs-as-code"),
+        "python": platform.python_version(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    else:
+        print(output)
+
+    regressions: Optional[List[str]] = None
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())["results"]
+        regressions = compare(results, baseline, args.max_regression_pct)
+        for regression in regressions:
+            print(f"Regression: {regression}", file=sys.stderr)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Synthetic dbt Cloud jobs used by the benchmarks."""
+
+from beartype.typing import Dict, List, Optional, Tuple
+
+ACCOUNT_ID = 1
+
+
+def raw_job(job_id: int, project_id: int = 10, environment_id: int = 100) -> dict:
+    """A managed job, as returned by the dbt Cloud API."""
+    return {
+        "id": job_id,
+        "account_id": ACCOUNT_ID,
+        "project_id": project_id,
+        "environment_id": environment_id,
+        "name": f"Job {job_id} [[job_{job_id}]]",
+        "description": "",
+        "execute_steps": ["dbt build --select tag:daily", "dbt docs generate"],
+        "settings": {"threads": 4, "target_name": "prod"},
+        "execution": {"timeout_seconds": 0},
+        "triggers": {
+            "github_webhook": False,
+            "git_provider_webhook": False,
+            "schedule": True,
+            "on_merge": False,
+        },
+        "schedule": {"cron": f"{job_id % 60} * * * *"},
+        "state": 1,
+        "generate_docs": False,
+        "run_generate_sources": False,
+        "updated_at": f"2024-01-01T00:00:{job_id % 60:02d}+00:00",
+    }
+
+
+def raw_jobs(count: int, projects: int = 1, environments_per_project: int = 1) -> List[dict]:
+    """`count` jobs spread evenly across projects and environments."""
+    jobs = []
+    for job_id in range(1, count + 1):
+        project_index = job_id % projects
+        environment_index = job_id % environments_per_project
+        jobs.append(
+            raw_job(
+                job_id,
+                project_id=10 + project_index,
+                environment_id=100 * (project_index + 1) + environment_index,
+            )
+        )
+    return jobs
+
+
+def yml_jobs(cloud_jobs: List[dict], changed_every: int = 10) -> Dict[str, dict]:
+    """The YML definition of the jobs, with one job out of `changed_every` modified."""
+    jobs = {}
+    for job in cloud_jobs:
+        definition = {
+            key: value
+            for key, value in job.items()
+            if key not in ("id", "name", "description", "updated_at")
+        }
+        definition["name"] = f"Job {job['id']}"
+        if job["id"] % changed_every == 0:
+            definition["settings"] = {"threads": 8, "target_name": "prod"}
+        jobs[f"job_{job['id']}"] = definition
+    return jobs
+
+
+_JOB_YML = """  job_{id}:
+{ids}
+    name: Job {id}
+    execute_steps:
+      - dbt build --select tag:daily
+      - dbt docs generate
+    settings:
+      threads: {threads}
+      target_name: prod
+    execution:
+      timeout_seconds: 0
+    triggers:
+      github_webhook: false
+      git_provider_webhook: false
+      schedule: true
+      on_merge: false
+    schedule:
+      cron: "{minute} * * * *"
+    generate_docs: false
+    run_generate_sources: false
+"""
+
+
+def jobs_yml(
+    cloud_jobs: List[dict], style: str = "plain", changed_every: int = 10
+) -> Tuple[str, Optional[str]]:
+    """The YML file defining the jobs, and its vars file for the `templated` style.
+
+    - `plain` repeats the IDs in each job
+    - `anchored` defines the IDs once per environment and merges them with YAML anchors
+    - `templated` uses Jinja variables for the IDs, the file can only have one environment
+    """
+    environments = sorted({(job["project_id"], job["environment_id"]) for job in cloud_jobs})
+    lines = []
+    vars_yml = None
+    if style == "anchored":
+        lines.append("anchors:")
+        for project_id, environment_id in environments:
+            lines.append(f"  env_{environment_id}: &env_{environment_id}")
+            lines.append(f"    account_id: {ACCOUNT_ID}")
+            lines.append(f"    project_id: {project_id}")
+            lines.append(f"    environment_id: {environment_id}")
+    elif style == "templated":
+        if len(environments) != 1:
+            raise ValueError("The templated style only supports one environment")
+        [(project_id, environment_id)] = environments
+        vars_yml = (
+            f"account_id: {ACCOUNT_ID}\n"
+            f"project_id: {project_id}\n"
+            f"environment_id: {environment_id}\n"
+        )
+    elif style != "plain":
+        raise ValueError(f"Unknown style {style}")
+
+    lines.append("jobs:")
+    for job in cloud_jobs:
+        if style == "anchored":
+            ids = f"    <<: *env_{job['environment_id']}"
+        elif style == "templated":
+            ids = (
+                "    account_id: {{ account_id }}\n"
+                "    project_id: {{ project_id }}\n"
+                "    environment_id: {{ environment_id }}"
+            )
+        else:
+            ids = (
+                f"    account_id: {ACCOUNT_ID}\n"
+                f"    project_id: {job['project_id']}\n"
+                f"    environment_id: {job['environment_id']}"
+            )
+        lines.append(
+            _JOB_YML.format(
+                id=job["id"],
+                ids=ids,
+                threads=8 if job["id"] % changed_every == 0 else 4,
+                minute=job["id"] % 60,
+            ).rstrip("\n")
+        )
+    return "\n".join(lines) + "\n", vars_yml
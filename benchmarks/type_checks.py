@@ -0,0 +1,102 @@
+"""Measure the overhead of runtime type checking when computing a plan.
+
+The plan is computed twice against the same synthetic account, in new interpreters, with and
+without `DBT_JOBS_AS_CODE_RUNTIME_TYPE_CHECKS` set. dbt Cloud is replaced by an in-memory
+snapshot, so only the time spent in the package is measured.
+
+    python -m benchmarks.type_checks --jobs 2000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from beartype.typing import Dict
+
+from benchmarks import synthetic
+
+ENV_VAR = "DBT_JOBS_AS_CODE_RUNTIME_TYPE_CHECKS"
+
+
+def _time_plan(job_count: int) -> Dict[str, float]:
+    from loguru import logger
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import compute_change_set
+    from dbt_jobs_as_code.schemas.job import JobDefinition
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshot, OfflineDBTCloud
+
+    logger.remove()
+    cloud_jobs = synthetic.raw_jobs(job_count)
+    yml_jobs = synthetic.yml_jobs(cloud_jobs)
+
+    snapshot = CloudSnapshot(account_id=synthetic.ACCOUNT_ID)
+    snapshot.jobs = {job["id"]: job for job in cloud_jobs}
+    snapshot.env_vars = {job["id"]: {} for job in cloud_jobs}
+    dbt_cloud = OfflineDBTCloud(snapshot)
+
+    timings = {}
+    started_at = time.perf_counter()
+    defined_jobs = {
+        identifier: JobDefinition(identifier=identifier, **job)
+        for identifier, job in yml_jobs.items()
+    }
+    timings["load_yml_jobs"] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    parsed_cloud_jobs = dbt_cloud.get_jobs()
+    timings["parse_cloud_jobs"] = time.perf_counter() - started_at
+
+    started_at = time.perf_counter()
+    compute_change_set(defined_jobs, parsed_cloud_jobs, dbt_cloud, output_json=True)
+    timings["compute_change_set"] = time.perf_counter() - started_at
+
+    timings["total"] = sum(timings.values())
+    return timings
+
+
+def _run_worker(job_count: int, type_checks: bool) -> Dict[str, float]:
+    env = {key: value for key, value in os.environ.items() if key != ENV_VAR}
+    if type_checks:
+        env[ENV_VAR] = "1"
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.type_checks", "--worker", "--jobs", str(job_count)],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=2000, help="Number of jobs in the account.")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs per mode.")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(_time_plan(args.jobs)))
+        return
+
+    results = {}
+    for mode, type_checks in [("without_type_checks", False), ("with_type_checks", True)]:
+        runs = [_run_worker(args.jobs, type_checks) for _ in range(args.repeat)]
+        results[mode] = {
+            step: round(statistics.median(run[step] for run in runs) * 1000, 1) for step in runs[0]
+        }
+    overhead = results["with_type_checks"]["total"] / results["without_type_checks"]["total"] - 1
+    print(
+        json.dumps(
+            {"jobs": args.jobs, "timings_ms": results, "overhead_pct": round(100 * overhead, 1)},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
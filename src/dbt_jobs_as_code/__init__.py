@@ -0,0 +1,11 @@
+import os
+
+# Runtime type checking is disabled by default, it adds overhead on large accounts. The tests
+# enable it with pytest-beartype and it can be enabled for development with this env var.
+# It needs to be set before the package is imported, so it can't be a CLI flag.
+RUNTIME_TYPE_CHECKS_ENV_VAR = "DBT_JOBS_AS_CODE_RUNTIME_TYPE_CHECKS"
+
+if os.environ.get(RUNTIME_TYPE_CHECKS_ENV_VAR, "").lower() in ("1", "true", "yes"):
+    from beartype.claw import beartype_this_package
+
+    beartype_this_package()
@@ -1,11 +1,25 @@
 import os
+import threading
+import time
+from datetime import datetime, timezone
 
 import requests
-from beartype.typing import Any, Dict, List, Optional
+from beartype.typing import Any, Dict, Iterator, List, Optional
+from dateutil.parser import isoparse
 from importlib_metadata import version
 from loguru import logger
 from urllib3.exceptions import InsecureRequestWarning
 
+from dbt_jobs_as_code.instrumentation.request_trace import (
+    RequestRecord,
+    get_request_trace,
+    record_request,
+)
+from dbt_jobs_as_code.instrumentation.telemetry import (
+    SPAN_KIND_CLIENT,
+    add_to_counter,
+    telemetry_span,
+)
 from dbt_jobs_as_code.schemas.custom_environment_variable import (
     CustomEnvironmentVariable,
     CustomEnvironmentVariablePayload,
@@ -26,6 +40,19 @@ class DBTCloudParamsException(Exception):
     pass
 
 
+# Endpoints of the dbt Cloud API, the placeholders are filled in by `DBTCloud._request`
+JOBS_ENDPOINT = "/api/v2/accounts/{account_id}/jobs/"
+JOB_ENDPOINT = "/api/v2/accounts/{account_id}/jobs/{job_id}/"
+JOB_ENV_VARS_ENDPOINT = (
+    "/api/v3/accounts/{account_id}/projects/{project_id}/environment-variables/job/"
+)
+ENV_VARS_ENDPOINT = "/api/v3/accounts/{account_id}/projects/{project_id}/environment-variables/"
+ENV_VAR_ENDPOINT = (
+    "/api/v3/accounts/{account_id}/projects/{project_id}/environment-variables/{env_var_id}/"
+)
+ENVIRONMENTS_ENDPOINT = "/api/v3/accounts/{account_id}/environments/"
+
+
 class DBTCloud:
     """A minimalistic API client for fetching dbt Cloud data."""
 
@@ -55,11 +82,78 @@ class DBTCloud:
                 "SSL verification is disabled. This is not recommended unless you absolutely need this config."
             )
         self._session = requests.Session()
+        self._cancelled = threading.Event()
+
+    def cancel(self) -> None:
+        """Stop the job listings of this client before they request their next page."""
+        self._cancelled.set()
+
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None,
+        data: Optional[str] = None,
+        **path_params: Any,
+    ) -> requests.Response:
+        """Send a request to dbt Cloud and return the response.
+
+        Requests are recorded in the request trace, if one is started.
+        """
+        kwargs: Dict[str, Any] = {
+            "url": self.base_url + endpoint.format(account_id=self.account_id, **path_params),
+            "headers": self._headers,
+            "verify": self._verify,
+        }
+        if params is not None:
+            kwargs["params"] = params
+        if data is not None:
+            kwargs["data"] = data
+        send = getattr(self._session, method.lower())
+
+        started_at = datetime.now(timezone.utc)
+        start = time.perf_counter()
+        response = None
+        with telemetry_span(
+            f"{method} {endpoint}",
+            kind=SPAN_KIND_CLIENT,
+            **{"http.request.method": method, "url.template": endpoint},
+        ) as current:
+            try:
+                response = send(**kwargs)
+                return response
+            finally:
+                status = response.status_code if response is not None else None
+                if get_request_trace() is not None:
+                    record_request(
+                        RequestRecord(
+                            method=method,
+                            endpoint=endpoint,
+                            status=status,
+                            bytes=len(response.content or b"") if response is not None else 0,
+                            latency_ms=round((time.perf_counter() - start) * 1000, 3),
+                            started_at=started_at.isoformat(),
+                        )
+                    )
+                if current is not None:
+                    current.set_attribute("http.response.status_code", status)
+                    if status is not None and status >= 400:
+                        current.error = f"HTTP {status}"
+                add_to_counter(
+                    "dbt_jobs_as_code.http.requests",
+                    method=method,
+                    endpoint=endpoint,
+                    status_code=status,
+                )
 
     def _clear_env_var_cache(self, job_definition_id: Optional[int]) -> None:
         """Clear out any cached environment variables for a given job."""
-        if job_definition_id in self._environment_variable_cache:
-            del self._environment_variable_cache[job_definition_id]
+        # the changes are applied in parallel, another thread can clear the same job
+        self._environment_variable_cache.pop(job_definition_id, None)
+
+    def clear_env_var_cache(self) -> None:
+        """Clear out all the cached environment variables."""
+        self._environment_variable_cache = {}
 
     def _check_for_creds(self):
         """Confirm the presence of credentials"""
@@ -88,11 +182,8 @@ class DBTCloud:
 
         logger.debug("Updating {job_name}. {job}", job_name=job.name, job=job)
 
-        response = self._session.post(  # Yes, it's actually a POST. Ew.
-            url=f"{self.base_url}/api/v2/accounts/{self.account_id}/jobs/{job.id}/",
-            headers=self._headers,
-            data=job.to_payload(),
-            verify=self._verify,
+        response = self._request(  # Yes, it's actually a POST. Ew.
+            "POST", JOB_ENDPOINT, data=job.to_payload(), job_id=job.id
         )
 
         if response.status_code >= 400:
@@ -108,12 +199,7 @@ class DBTCloud:
 
         logger.debug("Creating {job_name}. {job}", job_name=job.name, job=job)
 
-        response = self._session.post(
-            url=f"{self.base_url}/api/v2/accounts/{self.account_id}/jobs/",
-            headers=self._headers,
-            data=job.to_payload(),
-            verify=self._verify,
-        )
+        response = self._request("POST", JOBS_ENDPOINT, data=job.to_payload())
 
         if response.status_code >= 400:
             logger.error(response.json())
@@ -129,11 +215,7 @@ class DBTCloud:
 
         logger.debug("Deleting {job_name}. {job}", job_name=job.name, job=job)
 
-        response = self._session.delete(
-            url=f"{self.base_url}/api/v2/accounts/{self.account_id}/jobs/{job.id}/",
-            headers=self._headers,
-            verify=self._verify,
-        )
+        response = self._request("DELETE", JOB_ENDPOINT, job_id=job.id)
 
         if response.status_code >= 400:
             logger.error(response.json())
@@ -146,11 +228,7 @@ class DBTCloud:
 
         self._check_for_creds()
 
-        response = self._session.get(
-            url=(f"{self.base_url}/api/v2/accounts/{self.account_id}/jobs/{job_id}/"),
-            headers=self._headers,
-            verify=self._verify,
-        )
+        response = self._request("GET", JOB_ENDPOINT, job_id=job_id)
         if response.status_code > 200:
             logger.error(f"Issue getting the job {job_id}")
             raise DBTCloudException(f"Error getting the job {job_id}")
@@ -161,11 +239,7 @@ class DBTCloud:
 
         self._check_for_creds()
 
-        response = self._session.get(
-            url=(f"{self.base_url}/api/v2/accounts/{self.account_id}/jobs/{job_id}/"),
-            headers=self._headers,
-            verify=self._verify,
-        )
+        response = self._request("GET", JOB_ENDPOINT, job_id=job_id)
         if response.status_code > 200:
             logger.error(f"Issue getting the job {job_id}")
             raise DBTCloudException(f"Error getting the job {job_id}")
@@ -178,6 +252,18 @@ class DBTCloud:
     ) -> List[JobDefinition]:
         """Return a list of Jobs for all the dbt Cloud jobs in an environment."""
 
+        return [
+            JobDefinition(**job)
+            for job in self.get_raw_jobs(project_ids=project_ids, environment_ids=environment_ids)
+        ]
+
+    def get_raw_jobs(
+        self,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> List[dict]:
+        """Return the jobs as returned by the API, without building the job definitions."""
+
         self._check_for_creds()
         project_ids = project_ids or []
         environment_ids = environment_ids or []
@@ -191,20 +277,44 @@ class DBTCloud:
         else:
             jobs = self._fetch_jobs(project_ids, None)
 
-        return [JobDefinition(**job) for job in jobs]
+        return jobs
+
+    def iter_raw_job_pages(
+        self,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> Iterator[List[dict]]:
+        """Yield the jobs as returned by the API, one page at a time."""
+
+        self._check_for_creds()
+        for env_id in self._environment_ids_to_fetch(environment_ids or []):
+            yield from self._iter_job_pages(project_ids or [], env_id)
 
     def _fetch_jobs(self, project_ids: List[int], environment_id: Optional[int]) -> List[dict]:
-        offset = 0
         jobs: List[dict] = []
+        for page in self._iter_job_pages(project_ids, environment_id):
+            jobs.extend(page)
+        return jobs
+
+    def _iter_job_pages(
+        self,
+        project_ids: List[int],
+        environment_id: Optional[int],
+        order_by: Optional[str] = None,
+    ) -> Iterator[List[dict]]:
+        """Yield the raw jobs returned by the API, one page at a time."""
+        offset = 0
 
         while True:
-            parameters = self._build_parameters(project_ids, environment_id, offset)
+            if self._cancelled.is_set():
+                raise DBTCloudException("The listing of the jobs was cancelled")
+            parameters = self._build_parameters(project_ids, environment_id, offset, order_by)
             job_data = self._make_request(parameters)
 
             if not job_data:
-                return []
+                return
 
-            jobs.extend(job_data["data"])
+            yield job_data["data"]
 
             if (
                 job_data["extra"]["filters"]["limit"] + job_data["extra"]["filters"]["offset"]
@@ -214,10 +324,47 @@ class DBTCloud:
 
             offset += job_data["extra"]["filters"]["limit"]
 
+    def _environment_ids_to_fetch(self, environment_ids: List[int]) -> List[Optional[int]]:
+        """The API only filters on one environment at a time, so we query each one separately."""
+        if environment_ids:
+            return list(environment_ids)
+        return [None]
+
+    def get_jobs_updated_since(
+        self,
+        watermark: str,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> List[dict]:
+        """Return the raw jobs updated at or after the `watermark` (an ISO timestamp).
+
+        Jobs are requested from the most recently updated one, so we can stop paginating as soon
+        as we reach a job older than the watermark.
+        """
+
+        self._check_for_creds()
+        threshold = isoparse(watermark)
+
+        jobs: List[dict] = []
+        for env_id in self._environment_ids_to_fetch(environment_ids or []):
+            for page in self._iter_job_pages(project_ids or [], env_id, order_by="-updated_at"):
+                recent_jobs = [
+                    job
+                    for job in page
+                    if not job.get("updated_at") or isoparse(job["updated_at"]) >= threshold
+                ]
+                jobs.extend(recent_jobs)
+                if len(recent_jobs) < len(page):
+                    break
+
         return jobs
 
     def _build_parameters(
-        self, project_ids: List[int], environment_id: Optional[int], offset
+        self,
+        project_ids: List[int],
+        environment_id: Optional[int],
+        offset,
+        order_by: Optional[str] = None,
     ) -> dict[str, Any]:
         parameters = {"offset": offset}
 
@@ -230,16 +377,14 @@ class DBTCloud:
         if environment_id is not None:
             parameters["environment_id"] = environment_id
 
+        if order_by is not None:
+            parameters["order_by"] = order_by
+
         logger.debug(f"Request parameters {parameters}")
         return parameters
 
     def _make_request(self, parameters: dict[str, Any]):
-        response = self._session.get(
-            url=f"{self.base_url}/api/v2/accounts/{self.account_id}/jobs/",
-            params=parameters,
-            headers=self._headers,
-            verify=self._verify,
-        )
+        response = self._request("GET", JOBS_ENDPOINT, params=parameters)
 
         if response.status_code >= 400:
             error_data = response.json()
@@ -262,17 +407,35 @@ class DBTCloud:
         if job_id in self._environment_variable_cache:
             return self._environment_variable_cache[job_id]
 
+        variables = self.env_vars_from_raw(
+            project_id=project_id,
+            job_id=job_id,
+            raw_env_vars=self.get_raw_env_vars(project_id=project_id, job_id=job_id),
+        )
+        self._environment_variable_cache[job_id] = variables
+
+        return variables
+
+    def get_raw_env_vars(self, project_id: int, job_id: int) -> Dict[str, dict]:
+        """Get the env vars of a job as returned by the API."""
+
         self._check_for_creds()
 
-        response = self._session.get(
-            url=(
-                f"{self.base_url}/api/v3/accounts/{self.account_id}/projects/{project_id}/environment-variables/job/?job_definition_id={job_id}"
-            ),
-            headers=self._headers,
-            verify=self._verify,
+        response = self._request(
+            "GET",
+            JOB_ENV_VARS_ENDPOINT,
+            params={"job_definition_id": job_id},
+            project_id=project_id,
         )
 
-        variables = {
+        return response.json()["data"]
+
+    def env_vars_from_raw(
+        self, project_id: int, job_id: int, raw_env_vars: Dict[str, dict]
+    ) -> Dict[str, CustomEnvironmentVariablePayload]:
+        """Build the env vars job overwrite from the data returned by the API."""
+
+        return {
             name: CustomEnvironmentVariablePayload(
                 id=variable_data.get("job", {}).get("id"),
                 name=name,
@@ -281,22 +444,17 @@ class DBTCloud:
                 project_id=project_id,
                 account_id=self.account_id,
             )
-            for name, variable_data in response.json()["data"].items()
+            for name, variable_data in raw_env_vars.items()
         }
-        self._environment_variable_cache[job_id] = variables
-
-        return variables
 
-    def create_env_var(
-        self, env_var: CustomEnvironmentVariablePayload
-    ) -> CustomEnvironmentVariablePayload:
+    def create_env_var(self, env_var: CustomEnvironmentVariablePayload) -> Dict[str, Any]:
         """Create a new Custom Environment Variable in dbt Cloud."""
 
-        response = self._session.post(
-            f"{self.base_url}/api/v3/accounts/{self.account_id}/projects/{env_var.project_id}/environment-variables/",
-            headers=self._headers,
+        response = self._request(
+            "POST",
+            ENV_VARS_ENDPOINT,
             data=env_var.model_dump_json(),
-            verify=self._verify,
+            project_id=env_var.project_id,
         )
         logger.debug(response.json())
 
@@ -328,12 +486,6 @@ class DBTCloud:
             job_id = mapping_job_identifier_job_id[yml_job_identifier]
             custom_env_var.job_definition_id = job_id
 
-        # the endpoint is different for updating an overwrite vs creating one
-        if env_var_id:
-            url = f"{self.base_url}/api/v3/accounts/{self.account_id}/projects/{project_id}/environment-variables/{env_var_id}/"
-        else:
-            url = f"{self.base_url}/api/v3/accounts/{self.account_id}/projects/{project_id}/environment-variables/"
-
         payload = CustomEnvironmentVariablePayload(
             account_id=self.account_id,
             project_id=project_id,
@@ -341,9 +493,19 @@ class DBTCloud:
             **custom_env_var.model_dump(),
         )
 
-        response = self._session.post(
-            url=url, headers=self._headers, data=payload.model_dump_json(), verify=self._verify
-        )
+        # the endpoint is different for updating an overwrite vs creating one
+        if env_var_id:
+            response = self._request(
+                "POST",
+                ENV_VAR_ENDPOINT,
+                data=payload.model_dump_json(),
+                project_id=project_id,
+                env_var_id=env_var_id,
+            )
+        else:
+            response = self._request(
+                "POST", ENV_VARS_ENDPOINT, data=payload.model_dump_json(), project_id=project_id
+            )
 
         if response.status_code >= 400:
             logger.error(response.json())
@@ -359,10 +521,8 @@ class DBTCloud:
 
         logger.debug(f"Deleting env var id {env_var_id}")
 
-        response = self._session.delete(
-            url=f"{self.base_url}/api/v3/accounts/{self.account_id}/projects/{project_id}/environment-variables/{env_var_id}/",
-            headers=self._headers,
-            verify=self._verify,
+        response = self._request(
+            "DELETE", ENV_VAR_ENDPOINT, project_id=project_id, env_var_id=env_var_id
         )
 
         if response.status_code >= 400:
@@ -371,12 +531,8 @@ class DBTCloud:
 
         logger.success("Env Var Job Overwrite deleted successfully.")
 
-    def _fetch_environment(self, url) -> List[dict]:
-        response = self._session.get(
-            url=url,
-            headers=self._headers,
-            verify=self._verify,
-        )
+    def _fetch_environment(self, project_id: int) -> List[dict]:
+        response = self._request("GET", ENVIRONMENTS_ENDPOINT, params={"project_id": project_id})
 
         if response.status_code >= 400:
             logger.error(response.json())
@@ -392,9 +548,5 @@ class DBTCloud:
 
         all_envs = []
         for project_id in project_ids:
-            url = (
-                f"{self.base_url}/api/v3/accounts/"
-                f"{self.account_id}/environments/?project_id={project_id}"
-            )
-            all_envs.extend(self._fetch_environment(url))
+            all_envs.extend(self._fetch_environment(project_id))
         return all_envs
@@ -0,0 +1,78 @@
+"""The dbt Cloud credentials to use for each account.
+
+By default, all the accounts use `DBT_API_KEY` and `DBT_BASE_URL`. `DBT_API_KEY_<account_id>` and
+`DBT_BASE_URL_<account_id>` take precedence for a given account, and a credentials file can map
+each account to the environment variable holding its API key and to its base URL:
+
+    accounts:
+      1234:
+        api_key_env: DBT_API_KEY_EMEA
+        base_url: https://emea.dbt.com
+
+The API keys themselves are never read from the file, so that it can be committed.
+"""
+
+import os
+from dataclasses import dataclass
+
+from beartype.typing import Dict, Optional
+from ruamel.yaml import YAML
+
+DEFAULT_BASE_URL = "https://cloud.getdbt.com"
+
+
+class AccountCredentialsError(Exception):
+    pass
+
+
+@dataclass
+class AccountCredentials:
+    api_key: Optional[str]
+    base_url: str
+
+
+def load_credentials_mapping(credentials_file: str) -> Dict[int, dict]:
+    """Load the credentials file, returning the settings of each account."""
+    with open(credentials_file) as file:
+        content = YAML(typ="safe").load(file) or {}
+
+    accounts = content.get("accounts") if isinstance(content, dict) else None
+    if not isinstance(accounts, dict):
+        raise AccountCredentialsError(
+            f"The credentials file {credentials_file} must have an `accounts` mapping"
+        )
+
+    mapping = {}
+    for account_id, settings in accounts.items():
+        settings = settings or {}
+        unknown_keys = set(settings) - {"api_key_env", "base_url"}
+        if unknown_keys:
+            raise AccountCredentialsError(
+                f"Unknown keys for the account {account_id} in {credentials_file}: "
+                f"{sorted(unknown_keys)}. The API key must be set with `api_key_env`, the name of "
+                "the environment variable holding it."
+            )
+        mapping[int(account_id)] = dict(settings)
+    return mapping
+
+
+def get_account_credentials(
+    account_id: int, mapping: Optional[Dict[int, dict]] = None
+) -> AccountCredentials:
+    """Return the API key and base URL to use for `account_id`."""
+    settings = (mapping or {}).get(account_id, {})
+    if "api_key_env" in settings:
+        api_key_env = settings["api_key_env"]
+        api_key = os.environ.get(api_key_env)
+        if not api_key:
+            raise AccountCredentialsError(
+                f"The environment variable {api_key_env} with the API key of the account "
+                f"{account_id} is not set"
+            )
+    else:
+        api_key = os.environ.get(f"DBT_API_KEY_{account_id}", os.environ.get("DBT_API_KEY"))
+
+    base_url = settings.get("base_url") or os.environ.get(
+        f"DBT_BASE_URL_{account_id}", os.environ.get("DBT_BASE_URL", DEFAULT_BASE_URL)
+    )
+    return AccountCredentials(api_key=api_key, base_url=base_url)
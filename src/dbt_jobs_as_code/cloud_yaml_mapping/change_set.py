@@ -1,59 +1,200 @@
 import glob
-import json
+import itertools
 import os
 import re
 import string
+import threading
 from collections import Counter
-from typing import Dict, Optional
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextvars import copy_context
+from dataclasses import dataclass, field
+from enum import Enum
 
 from beartype import BeartypeConf, BeartypeStrategy, beartype
-from beartype.typing import Callable, List
+from beartype.typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 from loguru import logger
-from pydantic import BaseModel, Field
-from rich.console import Console
-from rich.table import Table
+from pydantic import BaseModel
 
 from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.client.credentials import (
+    AccountCredentialsError,
+    get_account_credentials,
+    load_credentials_mapping,
+)
+from dbt_jobs_as_code.cloud_yaml_mapping.dependencies import (
+    JobReferenceError,
+    check_job_references,
+    topological_levels,
+)
+from dbt_jobs_as_code.cloud_yaml_mapping.reporter import create_reporter
+from dbt_jobs_as_code.cloud_yaml_mapping.reporter import (
+    json_serializer_type as json_serializer_type,
+)
+from dbt_jobs_as_code.instrumentation import span
+from dbt_jobs_as_code.instrumentation.telemetry import add_to_counter
 from dbt_jobs_as_code.loader.load import LoadingJobsYAMLError, load_job_configuration
 from dbt_jobs_as_code.schemas import check_env_var_same, check_job_mapping_same
 from dbt_jobs_as_code.schemas.custom_environment_variable import CustomEnvironmentVariablePayload
 from dbt_jobs_as_code.schemas.job import JobDefinition
+from dbt_jobs_as_code.schemas.job_catalog import JobCatalog
+from dbt_jobs_as_code.snapshot.cloud_snapshot import (
+    CloudSnapshot,
+    CloudSnapshotError,
+    OfflineDBTCloud,
+    refresh_cached_snapshot,
+)
+
+if TYPE_CHECKING:
+    import rich.table
+
+    import dbt_jobs_as_code.cloud_yaml_mapping.journal
 
 # Dynamically create a new @nobeartype decorator disabling type-checking.
 nobeartype = beartype(conf=BeartypeConf(strategy=BeartypeStrategy.O0))
 
 
-def json_serializer_type(obj):
-    if isinstance(obj, type):
-        return obj.__name__
-    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+def changes_table(rows: Iterable[Tuple[str, str, str, int, int]]) -> "rich.table.Table":
+    """Return a table of changes, given their action, type, identifier, project and environment."""
+    from rich.table import Table
+
+    table = Table(title="Changes detected")
+
+    table.add_column("Action", style="cyan", no_wrap=True)
+    table.add_column("Type", style="magenta")
+    table.add_column("ID", style="green")
+    table.add_column("Proj ID", style="yellow")
+    table.add_column("Env ID", style="red")
 
+    for action, change_type, identifier, project_id, environment_id in rows:
+        table.add_row(action, change_type, identifier, str(project_id), str(environment_id))
 
-class Change(BaseModel):
-    """Describes what a given change is and how to apply it."""
+    return table
+
+
+def changes_json_table(changes_json: dict) -> "rich.table.Table":
+    """Return a table of the changes from the JSON representation of change sets."""
+    return changes_table(
+        (
+            change["action"],
+            change["type"],
+            change["identifier"],
+            change["project_id"],
+            change["environment_id"],
+        )
+        for key in ["job_changes", "env_var_overwrite_changes"]
+        for change in changes_json[key]
+    )
 
-    identifier: str
-    type: str
-    action: str
-    proj_id: int
-    env_id: int
-    sync_function: Callable
-    parameters: dict
-    differences: Optional[Dict] = {}
+
+class ChangeOperation(str, Enum):
+    """What a change does in dbt Cloud, named after the method of `DBTCloud` applying it."""
+
+    CREATE_JOB = "create_job"
+    UPDATE_JOB = "update_job"
+    DELETE_JOB = "delete_job"
+    UPDATE_ENV_VAR = "update_env_var"
+    DELETE_ENV_VAR = "delete_env_var"
+
+
+class Change:
+    """Describes what a given change is and how to apply it.
+
+    Plans can contain tens of thousands of changes, so this is a slotted class which doesn't
+    validate its fields. A change is applied by a `ChangeExecutor` with `dbt_cloud`, the client
+    it was computed with, or by calling `sync_function` when it is set.
+    """
+
+    __slots__ = (
+        "identifier",
+        "type",
+        "action",
+        "proj_id",
+        "env_id",
+        "parameters",
+        "operation",
+        "dbt_cloud",
+        "sync_function",
+        "differences",
+        "previous",
+    )
+
+    def __init__(
+        self,
+        identifier: str,
+        type: str,
+        action: str,
+        proj_id: int,
+        env_id: int,
+        parameters: dict,
+        operation: Optional[ChangeOperation] = None,
+        dbt_cloud: Optional[DBTCloud] = None,
+        sync_function: Optional[Callable] = None,
+        differences: Optional[Dict] = None,
+        previous: Optional[BaseModel] = None,
+    ):
+        self.identifier = identifier
+        self.type = type
+        self.action = action
+        self.proj_id = proj_id
+        self.env_id = env_id
+        self.parameters = parameters
+        self.operation = operation
+        self.dbt_cloud = dbt_cloud
+        self.sync_function = sync_function
+        self.differences = {} if differences is None else differences
+        # the job or env var overwrite in dbt Cloud before the change, when it exists
+        self.previous = previous
 
     def __str__(self):
         return f"{self.action.upper()} {string.capwords(self.type)} {self.identifier}"
 
+    def __repr__(self):
+        return f"Change({self})"
+
+    def to_json(self) -> dict:
+        """Return the JSON representation of the change, as listed in the plan."""
+        return {
+            "action": self.action.upper(),
+            "type": string.capwords(self.type),
+            "identifier": self.identifier,
+            "project_id": self.proj_id,
+            "environment_id": self.env_id,
+            "differences": self.differences,
+        }
+
     def apply(self):
-        return self.sync_function(**self.parameters)
+        return ChangeExecutor().execute(self)
 
 
-class ChangeSet(BaseModel):
+class ChangeExecutor:
+    """Apply changes by calling the method of the dbt Cloud client for their operation."""
+
+    def execute(self, change: Change):
+        if change.sync_function is not None:
+            return change.sync_function(**change.parameters)
+        if change.operation is None or change.dbt_cloud is None:
+            raise ValueError(f"The change {change} has no operation or client to apply it with")
+        return getattr(change.dbt_cloud, change.operation.value)(**change.parameters)
+
+
+@dataclass
+class ChangeSet:
     """Store the set of changes to be displayed or applied."""
 
-    root: List[Change] = []
+    root: List[Change] = field(default_factory=list)
     apply_success: bool = True
-    applied_changes: list[dict] = Field(default_factory=list)
+    applied_changes: List[dict] = field(default_factory=list)
+    # where the changes applied are recorded, to resume the sync if it is interrupted
+    journal: Optional["dbt_jobs_as_code.cloud_yaml_mapping.journal.ApplyJournal"] = None
 
     def __iter__(self):
         return iter(self.root)
@@ -65,27 +206,18 @@ class ChangeSet(BaseModel):
         list_str = [str(change) for change in self.root]
         return "\n".join(list_str)
 
-    def to_table(self) -> Table:
+    def to_table(self) -> "rich.table.Table":
         """Return a table representation of the changeset."""
-
-        table = Table(title="Changes detected")
-
-        table.add_column("Action", style="cyan", no_wrap=True)
-        table.add_column("Type", style="magenta")
-        table.add_column("ID", style="green")
-        table.add_column("Proj ID", style="yellow")
-        table.add_column("Env ID", style="red")
-
-        for change in self.root:
-            table.add_row(
+        return changes_table(
+            (
                 change.action.upper(),
                 string.capwords(change.type),
                 change.identifier,
-                str(change.proj_id),
-                str(change.env_id),
+                change.proj_id,
+                change.env_id,
             )
-
-        return table
+            for change in self.root
+        )
 
     def to_json(self) -> dict:
         """Return a structured JSON representation of the changeset."""
@@ -93,20 +225,10 @@ class ChangeSet(BaseModel):
         env_var_changes = []
 
         for change in self.root:
-            # Create the base change dictionary for overall changes
-            overall_change_dict = {
-                "action": change.action.upper(),
-                "type": string.capwords(change.type),
-                "identifier": change.identifier,
-                "project_id": change.proj_id,
-                "environment_id": change.env_id,
-                "differences": change.differences,
-            }
-
             if change.type == "job":
-                job_changes.append(overall_change_dict)
+                job_changes.append(change.to_json())
             elif change.type == "env var overwrite":
-                env_var_changes.append(overall_change_dict)
+                env_var_changes.append(change.to_json())
 
         return {
             "job_changes": job_changes,
@@ -131,47 +253,175 @@ class ChangeSet(BaseModel):
             "env_var_overwrite_changes": env_var_changes,
         }
 
-    def apply(self, fail_fast: bool = False):
+    def apply(self, fail_fast: bool = False, workers: int = 1):
+        with span("apply_changes"):
+            self._apply(fail_fast, workers)
+
+    def _apply(self, fail_fast: bool, workers: int) -> None:
+        """Apply the changes level by level, the changes of a level on up to `workers` threads.
+
+        The IDs of the jobs created in a level are set in the changes of the next levels. With
+        `fail_fast`, the changes are applied one at a time to stop at the first error.
+        """
         self.apply_success = True
         self.applied_changes = []
-        for change in self.root:
-            try:
-                result = change.apply()
-                applied_change = {
-                    "action": change.action.upper(),
-                    "type": change.type,
-                    "identifier": change.identifier,
-                    "project_id": change.proj_id,
-                    "environment_id": change.env_id,
-                }
-
-                if change.type == "job":
-                    job_id = None
-                    if isinstance(result, JobDefinition):
-                        job_id = result.id
-                    else:
-                        job_param = change.parameters.get("job")
-                        if isinstance(job_param, JobDefinition):
-                            job_id = job_param.id
-                    applied_change["job_id"] = job_id
-                elif change.type == "env var overwrite":
-                    env_var_id = None
-                    job_definition_id = None
-                    if isinstance(result, CustomEnvironmentVariablePayload):
-                        env_var_id = result.id
-                        job_definition_id = result.job_definition_id
-                    else:
-                        env_var_id = change.parameters.get("env_var_id")
-                        job_definition_id = change.parameters.get("job_id")
-                    applied_change["env_var_id"] = env_var_id
-                    applied_change["job_id"] = job_definition_id
-
-                self.applied_changes.append(applied_change)
-            except DBTCloudException:
-                self.apply_success = False
-                if fail_fast:
-                    logger.error(f"Operation failed for {change}, stopping due to --fail-fast")
+        # the IDs of the jobs created, for the env var overwrites of those jobs
+        created_job_ids: Dict[str, int] = {}
+        executor = ChangeExecutor()
+        if self.journal is not None:
+            self.journal.record_plan(self.root)
+        indices = {id(change): index for index, change in enumerate(self.root)}
+        workers = 1 if fail_fast else workers
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for level in apply_levels(self.root):
+                for change in level:
+                    _resolve_created_job_id(change, created_job_ids)
+                applied_changes = []
+                to_apply = iter(level)
+                running: Dict[Future, Change] = {}
+                # only as many changes as threads are submitted, so that nothing else is
+                # applied if the sync is interrupted or stopped by --fail-fast
+                while True:
+                    if not (fail_fast and not self.apply_success):
+                        for change in itertools.islice(to_apply, workers - len(running)):
+                            # the threads get a copy of the current context to nest their spans
+                            future = pool.submit(
+                                copy_context().run, self._apply_change, executor, change
+                            )
+                            running[future] = change
+                    if not running:
+                        break
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        change = running.pop(future)
+                        applied_change = future.result()
+                        if applied_change is None:
+                            self.apply_success = False
+                            if fail_fast:
+                                logger.error(
+                                    f"Operation failed for {change}, stopping due to --fail-fast"
+                                )
+                            continue
+                        applied_changes.append((indices[id(change)], applied_change))
+                        if change.type == "job" and change.action.lower() == "create":
+                            if applied_change["job_id"] is not None:
+                                created_job_ids[change.identifier] = applied_change["job_id"]
+                self.applied_changes.extend(
+                    applied_change for _, applied_change in sorted(applied_changes)
+                )
+                if fail_fast and not self.apply_success:
                     break
+        if self.journal is not None and self.apply_success:
+            self.journal.record_done()
+
+    def _apply_change(self, executor: "ChangeExecutor", change: Change) -> Optional[dict]:
+        """Apply a change and return what was applied, or None if dbt Cloud returned an error."""
+        try:
+            with span(
+                "apply_change",
+                **{
+                    "change.action": change.action.upper(),
+                    "change.type": change.type,
+                    "change.identifier": change.identifier,
+                },
+            ):
+                result = executor.execute(change)
+        except DBTCloudException:
+            add_to_counter(
+                "dbt_jobs_as_code.changes.applied",
+                action=change.action.upper(),
+                type=change.type,
+                success=False,
+            )
+            return None
+        add_to_counter(
+            "dbt_jobs_as_code.changes.applied",
+            action=change.action.upper(),
+            type=change.type,
+            success=True,
+        )
+        applied_change = {
+            "action": change.action.upper(),
+            "type": change.type,
+            "identifier": change.identifier,
+            "project_id": change.proj_id,
+            "environment_id": change.env_id,
+        }
+
+        if change.type == "job":
+            job_id = None
+            if isinstance(result, JobDefinition):
+                job_id = result.id
+            else:
+                job_param = change.parameters.get("job")
+                if isinstance(job_param, JobDefinition):
+                    job_id = job_param.id
+            applied_change["job_id"] = job_id
+        elif change.type == "env var overwrite":
+            env_var_id = None
+            job_definition_id = None
+            if isinstance(result, CustomEnvironmentVariablePayload):
+                env_var_id = result.id
+                job_definition_id = result.job_definition_id
+            else:
+                env_var_id = change.parameters.get("env_var_id")
+                job_definition_id = change.parameters.get("job_id")
+            applied_change["env_var_id"] = env_var_id
+            applied_change["job_id"] = job_definition_id
+
+        # recorded as soon as it is applied, in case the sync is interrupted
+        if self.journal is not None:
+            self.journal.record_applied(change, applied_change)
+        return applied_change
+
+
+def apply_levels(changes: List[Change]) -> List[List[Change]]:
+    """Group the changes in levels, the changes of a level can be applied in parallel.
+
+    - a job created or updated is in a level after the jobs it refers to which are created
+    - the env var overwrites of a job created are in a level after the job
+    - the jobs deleted are in the last level, once the jobs referring to them are updated
+    """
+    created_jobs = {
+        change.identifier: change
+        for change in changes
+        if change.type == "job" and change.action.lower() == "create"
+    }
+    dependencies: Dict[Change, set] = {}
+    deleted_jobs = []
+    for change in changes:
+        if change.type == "job" and change.action.lower() == "delete":
+            deleted_jobs.append(change)
+            continue
+        job = change.parameters.get("job")
+        if isinstance(job, JobDefinition):
+            references = job.job_references()
+        else:
+            references = [change.parameters.get("yml_job_identifier")]
+        dependencies[change] = {
+            created_jobs[reference]
+            for reference in references
+            if reference in created_jobs and created_jobs[reference] is not change
+        }
+    levels = topological_levels(dependencies)
+    if deleted_jobs:
+        levels.append(deleted_jobs)
+    return levels
+
+
+def _resolve_created_job_id(change: Change, created_job_ids: Dict[str, int]) -> None:
+    """Set the IDs of the jobs created in this change set that the change refers to.
+
+    Those are the jobs referred to by identifier in a job, and the job of an env var overwrite.
+    Otherwise, the client has to list all the jobs to find the ID of the job of an overwrite.
+    """
+    job = change.parameters.get("job")
+    if isinstance(job, JobDefinition) and change.action.lower() != "delete":
+        job.resolve_job_references(created_job_ids)
+    job_identifier = change.parameters.get("yml_job_identifier")
+    if job_identifier in created_job_ids and not change.parameters.get("job_id"):
+        change.parameters["job_id"] = created_job_ids[job_identifier]
+        change.parameters["custom_env_var"].job_definition_id = created_job_ids[job_identifier]
 
 
 # Don't bear type this function as we do some odd things in tests
@@ -180,22 +430,23 @@ def filter_config(
     defined_jobs: dict[str, JobDefinition], project_ids: List[int], environment_ids: List[int]
 ) -> dict[str, JobDefinition]:
     """Filters the config based on the inputs provided for project ids and environment ids."""
-    removed_job_ids: set[str] = set()
-    if len(environment_ids) != 0:
-        for job_id, job in defined_jobs.items():
-            if job.environment_id not in environment_ids:
-                removed_job_ids.add(job_id)
-                logger.warning(
-                    f"For Job# {job.identifier}, environment_id(s) provided as arguments does not match the ID's in Jobs YAML file!!!"
-                )
-    if len(project_ids) != 0:
-        for job_id, job in defined_jobs.items():
-            if job.project_id not in project_ids:
-                removed_job_ids.add(job_id)
-                logger.warning(
-                    f"For Job# {job.identifier}, project_id(s) provided as arguments does not match the ID's in Jobs YAML file!!!"
-                )
-    return {job_id: job for job_id, job in defined_jobs.items() if job_id not in removed_job_ids}
+    project_ids_filter, environment_ids_filter = set(project_ids), set(environment_ids)
+    selected_jobs = {}
+    for job_id, job in defined_jobs.items():
+        selected = True
+        if environment_ids_filter and job.environment_id not in environment_ids_filter:
+            selected = False
+            logger.warning(
+                f"For Job# {job.identifier}, environment_id(s) provided as arguments does not match the ID's in Jobs YAML file!!!"
+            )
+        if project_ids_filter and job.project_id not in project_ids_filter:
+            selected = False
+            logger.warning(
+                f"For Job# {job.identifier}, project_id(s) provided as arguments does not match the ID's in Jobs YAML file!!!"
+            )
+        if selected:
+            selected_jobs[job_id] = job
+    return selected_jobs
 
 
 def _check_no_duplicate_job_identifier(remote_jobs: List[JobDefinition]):
@@ -214,16 +465,50 @@ def _check_no_duplicate_job_identifier(remote_jobs: List[JobDefinition]):
         )
 
 
-def _check_single_account_id(defined_jobs: List[JobDefinition]):
-    """Check if there are duplicate job identifiers in dbt Cloud.
+def resolve_config_files(
+    config: str, yml_vars: Optional[str]
+) -> Tuple[List[str], Optional[List[str]]]:
+    """Get the list of config files and vars files matching the glob patterns provided."""
 
-    If so, raise some error logs"""
-    count_account_ids = Counter([job.account_id for job in defined_jobs])
+    with span("resolve_config_files"):
+        # If the config is a directory, we automatically search for all the `*.yml` files in this directory
+        if os.path.isdir(config):
+            config = os.path.join(config, "*.yml")
+        # Get list of files matching the glob pattern
+        config_files = glob.glob(config, recursive=True)
+        yml_vars_files = glob.glob(yml_vars, recursive=True) if yml_vars else None
+    return config_files, yml_vars_files
 
-    if len(count_account_ids) > 1:
-        logger.error(
-            f"There are different account_id in the jobs YAML file: {count_account_ids.keys()}"
-        )
+
+def load_defined_jobs(
+    config_files: List[str],
+    yml_vars_files: Optional[List[str]],
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool = False,
+) -> Tuple[Dict[str, JobDefinition], List[int], List[int]]:
+    """Load the jobs defined in the YML files and filter them on the projects and environments.
+
+    Returns:
+        Tuple containing:
+            - the jobs defined in the YML files, by identifier
+            - the project IDs and environment IDs to use to filter the dbt Cloud jobs
+    """
+    configuration = load_job_configuration(config_files, yml_vars_files)
+
+    if limit_projects_envs_to_yml:
+        # if limit_projects_envs_to_yml is True, we keep all the YML jobs
+        defined_jobs = configuration.jobs
+        # and only the remote jobs with project_id and environment_id existing in the job YML file are considered
+        project_ids = list({job.project_id for job in defined_jobs.values()})
+        environment_ids = list({job.environment_id for job in defined_jobs.values()})
+
+    else:
+        # If a project_id or environment_id is passed in as a parameter (one or multiple), check if these match the ID's in Jobs YAML file, otherwise add a warning and continue the process
+        unfiltered_defined_jobs = configuration.jobs
+        defined_jobs = filter_config(unfiltered_defined_jobs, project_ids, environment_ids)
+
+    return defined_jobs, project_ids, environment_ids
 
 
 def build_change_set(
@@ -235,101 +520,596 @@ def build_change_set(
     limit_projects_envs_to_yml: bool = False,
     exclude_identifiers_matching: Optional[str] = None,
     output_json: bool = False,
+    cloud_cache: Optional[str] = None,
+    snapshot: Optional[str] = None,
+    account_credentials: Optional[str] = None,
+    for_sync: bool = False,
 ):
     """Compares the config of YML files versus dbt Cloud.
     Depending on the value of no_update, it will either update the dbt Cloud config or not.
 
     CONFIG is the path to your jobs.yml config file.
+
+    When `cloud_cache` is provided, the dbt Cloud jobs are read from a local snapshot stored at
+    this path and only the jobs updated since the last run are downloaded, unless `for_sync` is
+    set, see `refresh_cached_snapshot`.
+
+    When `snapshot` is provided, the dbt Cloud jobs and env vars are read from this snapshot file
+    and dbt Cloud is not called at all. The resulting change set can't be applied.
+
+    When the YML files define jobs for several accounts, each account is compared concurrently,
+    with the credentials given for it in the `account_credentials` file or in the environment.
+    """
+    with span("build_change_set"):
+        return _build_change_set(
+            config,
+            yml_vars,
+            disable_ssl_verification,
+            project_ids,
+            environment_ids,
+            limit_projects_envs_to_yml,
+            exclude_identifiers_matching,
+            output_json,
+            cloud_cache,
+            snapshot,
+            account_credentials,
+            for_sync,
+        )
+
+
+def _build_change_set(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+    exclude_identifiers_matching: Optional[str],
+    output_json: bool,
+    cloud_cache: Optional[str],
+    snapshot: Optional[str],
+    account_credentials: Optional[str] = None,
+    for_sync: bool = False,
+) -> ChangeSet:
+    change_set = ChangeSet()
+    for change in _iter_build_change_set(
+        config,
+        yml_vars,
+        disable_ssl_verification,
+        project_ids,
+        environment_ids,
+        limit_projects_envs_to_yml,
+        exclude_identifiers_matching,
+        output_json,
+        cloud_cache,
+        snapshot,
+        account_credentials,
+        stream=False,
+        for_sync=for_sync,
+    ):
+        change_set.append(change)
+    return change_set
+
+
+def iter_change_set(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool = False,
+    exclude_identifiers_matching: Optional[str] = None,
+    output_json: bool = False,
+    cloud_cache: Optional[str] = None,
+    snapshot: Optional[str] = None,
+    account_credentials: Optional[str] = None,
+) -> Iterator[Change]:
+    """Same as `build_change_set`, but yield each change as soon as it is determined.
+
+    The changes are not kept, so the memory used doesn't grow with the number of changes. With
+    several accounts, the accounts are still compared concurrently and their changes are yielded
+    once all of them are compared.
+    """
+    yield from _iter_build_change_set(
+        config,
+        yml_vars,
+        disable_ssl_verification,
+        project_ids,
+        environment_ids,
+        limit_projects_envs_to_yml,
+        exclude_identifiers_matching,
+        output_json,
+        cloud_cache,
+        snapshot,
+        account_credentials,
+        stream=True,
+    )
+
+
+def _iter_build_change_set(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+    exclude_identifiers_matching: Optional[str],
+    output_json: bool,
+    cloud_cache: Optional[str],
+    snapshot: Optional[str],
+    account_credentials: Optional[str],
+    stream: bool,
+    for_sync: bool = False,
+) -> Iterator[Change]:
+    credentials_mapping = _load_credentials_mapping(account_credentials)
+    prefetched = None
+    if not snapshot and not limit_projects_envs_to_yml:
+        # the dbt Cloud jobs to compare don't depend on the YML jobs, list them while loading
+        prefetched = _prefetch_cloud_jobs(
+            config,
+            yml_vars,
+            disable_ssl_verification,
+            project_ids,
+            environment_ids,
+            cloud_cache,
+            credentials_mapping,
+            for_sync,
+        )
+
+    loaded = None
+    try:
+        loaded = _load_jobs_to_compare(
+            config, yml_vars, project_ids, environment_ids, limit_projects_envs_to_yml
+        )
+    finally:
+        if loaded is None and prefetched is not None:
+            prefetched.cancel()
+    if loaded is None:
+        return
+    defined_jobs, project_ids, environment_ids = loaded
+
+    jobs_by_account = _jobs_by_account(defined_jobs)
+    if prefetched is not None and (
+        len(jobs_by_account) > 1
+        or not prefetched.is_for(list(jobs_by_account)[0], project_ids, environment_ids)
+    ):
+        # the guess was wrong, the jobs are listed again below
+        prefetched.cancel()
+        prefetched = None
+    if len(jobs_by_account) > 1:
+        if snapshot or cloud_cache:
+            logger.error(
+                f"The jobs YAML files define jobs for the accounts {list(jobs_by_account)}, "
+                "--snapshot and --cloud-cache only support a single account."
+            )
+            exit(1)
+        yield from _build_multi_account_change_set(
+            jobs_by_account,
+            disable_ssl_verification,
+            project_ids,
+            environment_ids,
+            limit_projects_envs_to_yml,
+            exclude_identifiers_matching,
+            output_json,
+            credentials_mapping,
+        )
+        return
+
+    account_id = list(defined_jobs.values())[0].account_id
+    if prefetched is not None:
+        dbt_cloud = prefetched.dbt_cloud
+        with span("wait_cloud_jobs"):
+            cloud_jobs = prefetched.future.result()
+    else:
+        if snapshot:
+            try:
+                with span("load_snapshot"):
+                    dbt_cloud = OfflineDBTCloud(CloudSnapshot.load(snapshot))
+            except (CloudSnapshotError, OSError, ValueError, KeyError) as e:
+                logger.error(f"Error loading the snapshot {snapshot}: {e}")
+                exit(1)
+            if dbt_cloud.account_id != account_id:
+                logger.error(
+                    f"The snapshot {snapshot} is for the account {dbt_cloud.account_id}, not {account_id}"
+                )
+                exit(1)
+        else:
+            dbt_cloud = _dbt_cloud_client(
+                account_id, disable_ssl_verification, credentials_mapping
+            )
+        cloud_jobs = _list_cloud_jobs(
+            dbt_cloud, project_ids, environment_ids, cloud_cache, for_sync
+        )
+
+    yield from (iter_compute_change_set if stream else compute_change_set)(
+        defined_jobs,
+        cloud_jobs,
+        dbt_cloud,
+        exclude_identifiers_matching=exclude_identifiers_matching,
+        output_json=output_json,
+    )
+
+
+def _list_cloud_jobs(
+    dbt_cloud: DBTCloud,
+    project_ids: List[int],
+    environment_ids: List[int],
+    cloud_cache: Optional[str],
+    for_sync: bool = False,
+) -> List[JobDefinition]:
+    try:
+        with span("list_cloud_jobs"):
+            if cloud_cache:
+                return refresh_cached_snapshot(
+                    cloud_cache,
+                    dbt_cloud,
+                    project_ids=project_ids,
+                    environment_ids=environment_ids,
+                    for_sync=for_sync,
+                ).get_jobs()
+            return dbt_cloud.get_jobs(project_ids=project_ids, environment_ids=environment_ids)
+    except CloudSnapshotError as e:
+        logger.error(f"Error reading the dbt Cloud jobs from the snapshot: {e}")
+        exit(1)
+
+
+# `account_id: 1234` on its own line, in the YML jobs, in their anchors or in the vars files
+ACCOUNT_ID_LINE = re.compile(r"^\s*account_id:\s*[\"']?(\d+)[\"']?\s*(?:#.*)?$", re.MULTILINE)
+
+
+def _account_id_from_files(files: List[str]) -> Optional[int]:
+    """Guess the account of the YML jobs from the raw files, without parsing them.
+
+    Returns None unless exactly one account ID is found.
+    """
+    account_ids = set()
+    for file in files:
+        with open(file) as f:
+            account_ids.update(int(match) for match in ACCOUNT_ID_LINE.findall(f.read()))
+    return account_ids.pop() if len(account_ids) == 1 else None
+
+
+@dataclass
+class _PrefetchedCloudJobs:
+    """The dbt Cloud jobs being listed in the background while the YML files are loaded."""
+
+    dbt_cloud: DBTCloud
+    project_ids: List[int]
+    environment_ids: List[int]
+    future: "Future[List[JobDefinition]]"
+
+    def is_for(self, account_id: int, project_ids: List[int], environment_ids: List[int]) -> bool:
+        return (
+            self.dbt_cloud.account_id == account_id
+            and self.project_ids == project_ids
+            and self.environment_ids == environment_ids
+        )
+
+    def cancel(self) -> None:
+        """Stop the listing before its next page, without waiting for the current one."""
+        self.dbt_cloud.cancel()
+
+
+def _prefetch_cloud_jobs(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    cloud_cache: Optional[str],
+    credentials_mapping: Optional[Dict[int, dict]],
+    for_sync: bool = False,
+) -> Optional[_PrefetchedCloudJobs]:
+    """Start listing the dbt Cloud jobs in a background thread.
+
+    The account is guessed from the raw YML files, so the caller must check that the listing is
+    for the account and filters of the loaded jobs before using the result, and cancel it
+    otherwise. Nothing is listed if the account can't be guessed.
+
+    The thread is a daemon, so that exiting on an invalid YML doesn't wait for the listing.
     """
+    config_files, yml_vars_files = resolve_config_files(config, yml_vars)
+    try:
+        account_id = _account_id_from_files(config_files + (yml_vars_files or []))
+        if account_id is None:
+            return None
+        credentials = get_account_credentials(account_id, credentials_mapping)
+    except (AccountCredentialsError, OSError, UnicodeDecodeError):
+        # the errors are reported when the jobs are loaded
+        return None
 
-    # If the config is a directory, we automatically search for all the `*.yml` files in this directory
-    if os.path.isdir(config):
-        config = os.path.join(config, "*.yml")
-    # Get list of files matching the glob pattern
-    config_files = glob.glob(config, recursive=True)
+    dbt_cloud = DBTCloud(
+        account_id=account_id,
+        api_key=credentials.api_key,
+        base_url=credentials.base_url,
+        disable_ssl_verification=disable_ssl_verification,
+    )
+    future: "Future[List[JobDefinition]]" = Future()
+    run = copy_context().run
+
+    def list_cloud_jobs() -> None:
+        try:
+            future.set_result(
+                run(
+                    _list_cloud_jobs,
+                    dbt_cloud,
+                    project_ids,
+                    environment_ids,
+                    cloud_cache,
+                    for_sync,
+                )
+            )
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=list_cloud_jobs, name="prefetch-cloud-jobs", daemon=True).start()
+    return _PrefetchedCloudJobs(
+        dbt_cloud=dbt_cloud,
+        project_ids=list(project_ids),
+        environment_ids=list(environment_ids),
+        future=future,
+    )
+
+
+def _load_jobs_to_compare(
+    config: str,
+    yml_vars: Optional[str],
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+) -> Optional[Tuple[Dict[str, JobDefinition], List[int], List[int]]]:
+    """Load the jobs defined in the YML files, exiting if they can't be loaded.
+
+    Returns None when there are no jobs to compare.
+    """
+    config_files, yml_vars_files = resolve_config_files(config, yml_vars)
     if not config_files:
         logger.error(f"No files found matching pattern: {config}")
-        return ChangeSet()
-
-    yml_vars_files = glob.glob(yml_vars, recursive=True) if yml_vars else None
+        return None
 
     try:
-        configuration = load_job_configuration(config_files, yml_vars_files)
+        defined_jobs, project_ids, environment_ids = load_defined_jobs(
+            config_files,
+            yml_vars_files,
+            project_ids,
+            environment_ids,
+            limit_projects_envs_to_yml,
+        )
     except (LoadingJobsYAMLError, KeyError) as e:
         logger.error(f"Error loading jobs YAML file ({type(e).__name__}): {e}")
         exit(1)
 
-    if limit_projects_envs_to_yml:
-        # if limit_projects_envs_to_yml is True, we keep all the YML jobs
-        defined_jobs = configuration.jobs
-        # and only the remote jobs with project_id and environment_id existing in the job YML file are considered
-        project_ids = list({job.project_id for job in defined_jobs.values()})
-        environment_ids = list({job.environment_id for job in defined_jobs.values()})
-
-    else:
-        # If a project_id or environment_id is passed in as a parameter (one or multiple), check if these match the ID's in Jobs YAML file, otherwise add a warning and continue the process
-        unfiltered_defined_jobs = configuration.jobs
-        defined_jobs = filter_config(unfiltered_defined_jobs, project_ids, environment_ids)
-
     if len(defined_jobs) == 0:
         logger.warning(
             "No jobs found in the Jobs YAML file after filtering based on the project_id and environment_id provided as arguments!!!"
         )
-        return ChangeSet()
+        return None
 
-    _check_single_account_id(list(defined_jobs.values()))
+    return defined_jobs, project_ids, environment_ids
 
-    dbt_cloud = DBTCloud(
-        account_id=list(defined_jobs.values())[0].account_id,
-        api_key=os.environ.get("DBT_API_KEY"),
-        base_url=os.environ.get("DBT_BASE_URL", "https://cloud.getdbt.com"),
+
+def _load_credentials_mapping(account_credentials: Optional[str]) -> Optional[Dict[int, dict]]:
+    """Load the credentials file of the accounts, exiting if it is invalid."""
+    if not account_credentials:
+        return None
+    try:
+        return load_credentials_mapping(account_credentials)
+    except (AccountCredentialsError, OSError, ValueError) as e:
+        logger.error(f"Error loading the account credentials {account_credentials}: {e}")
+        exit(1)
+
+
+def _dbt_cloud_client(
+    account_id: int,
+    disable_ssl_verification: bool,
+    credentials_mapping: Optional[Dict[int, dict]] = None,
+) -> DBTCloud:
+    try:
+        credentials = get_account_credentials(account_id, credentials_mapping)
+    except AccountCredentialsError as e:
+        logger.error(str(e))
+        exit(1)
+    return DBTCloud(
+        account_id=account_id,
+        api_key=credentials.api_key,
+        base_url=credentials.base_url,
         disable_ssl_verification=disable_ssl_verification,
     )
 
-    cloud_jobs = dbt_cloud.get_jobs(project_ids=project_ids, environment_ids=environment_ids)
+
+def _jobs_by_account(
+    defined_jobs: Dict[str, JobDefinition],
+) -> Dict[int, Dict[str, JobDefinition]]:
+    """Split the jobs defined in the YML files by account, ordered by account ID."""
+    jobs_by_account: Dict[int, Dict[str, JobDefinition]] = {}
+    for identifier, job in sorted(defined_jobs.items(), key=lambda item: item[1].account_id):
+        jobs_by_account.setdefault(job.account_id, {})[identifier] = job
+    return jobs_by_account
+
+
+def _account_filters(
+    account_jobs: Dict[str, JobDefinition],
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+) -> Tuple[List[int], List[int]]:
+    """The project IDs and environment IDs used to filter the dbt Cloud jobs of an account."""
+    if not limit_projects_envs_to_yml:
+        return project_ids, environment_ids
+    return (
+        list({job.project_id for job in account_jobs.values()}),
+        list({job.environment_id for job in account_jobs.values()}),
+    )
+
+
+def _build_multi_account_change_set(
+    jobs_by_account: Dict[int, Dict[str, JobDefinition]],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+    exclude_identifiers_matching: Optional[str],
+    output_json: bool,
+    credentials_mapping: Optional[Dict[int, dict]],
+) -> ChangeSet:
+    """Compare the jobs of each account concurrently, each with its own client.
+
+    The changes are merged in a single change set, ordered by account. Each change is applied
+    with the client of its account.
+    """
+
+    def compare_account(account_id: int, account_jobs: Dict[str, JobDefinition]) -> ChangeSet:
+        with span("account", account_id=account_id):
+            dbt_cloud = _dbt_cloud_client(
+                account_id, disable_ssl_verification, credentials_mapping
+            )
+            account_project_ids, account_environment_ids = _account_filters(
+                account_jobs, project_ids, environment_ids, limit_projects_envs_to_yml
+            )
+            with span("list_cloud_jobs"):
+                cloud_jobs = dbt_cloud.get_jobs(
+                    project_ids=account_project_ids, environment_ids=account_environment_ids
+                )
+            return compute_change_set(
+                account_jobs,
+                cloud_jobs,
+                dbt_cloud,
+                exclude_identifiers_matching=exclude_identifiers_matching,
+                output_json=output_json,
+            )
+
+    if not output_json:
+        logger.info(
+            "Comparing the accounts {account_ids} concurrently.",
+            account_ids=", ".join(str(account_id) for account_id in jobs_by_account),
+        )
+    # the threads get a copy of the current context to nest their spans in the current one
+    with ThreadPoolExecutor(max_workers=len(jobs_by_account)) as executor:
+        futures = [
+            executor.submit(copy_context().run, compare_account, account_id, account_jobs)
+            for account_id, account_jobs in jobs_by_account.items()
+        ]
+    change_set = ChangeSet()
+    for future in futures:
+        for change in future.result():
+            change_set.append(change)
+    return change_set
+
+
+def compute_change_set(
+    defined_jobs: Dict[str, JobDefinition],
+    cloud_jobs: List[JobDefinition],
+    dbt_cloud: DBTCloud,
+    exclude_identifiers_matching: Optional[str] = None,
+    output_json: bool = False,
+) -> ChangeSet:
+    """Compare the jobs defined in the YML files with the jobs from dbt Cloud.
+
+    The env vars overwrites of the jobs are fetched with `dbt_cloud`, which is also the client
+    used to apply the changes.
+    """
+    with span("compute_change_set"):
+        change_set = _compute_change_set(
+            defined_jobs, cloud_jobs, dbt_cloud, exclude_identifiers_matching, output_json
+        )
+    for change in change_set:
+        add_to_counter(
+            "dbt_jobs_as_code.changes.planned", action=change.action.upper(), type=change.type
+        )
+    return change_set
+
+
+def iter_compute_change_set(
+    defined_jobs: Dict[str, JobDefinition],
+    cloud_jobs: List[JobDefinition],
+    dbt_cloud: DBTCloud,
+    exclude_identifiers_matching: Optional[str] = None,
+    output_json: bool = False,
+) -> Iterator[Change]:
+    """Same as `compute_change_set`, but yield each change as soon as it is determined."""
+    for change in _iter_changes(
+        defined_jobs, cloud_jobs, dbt_cloud, exclude_identifiers_matching, output_json
+    ):
+        add_to_counter(
+            "dbt_jobs_as_code.changes.planned", action=change.action.upper(), type=change.type
+        )
+        yield change
+
+
+def _compute_change_set(
+    defined_jobs: Dict[str, JobDefinition],
+    cloud_jobs: List[JobDefinition],
+    dbt_cloud: DBTCloud,
+    exclude_identifiers_matching: Optional[str],
+    output_json: bool,
+) -> ChangeSet:
+    change_set = ChangeSet()
+    for change in _iter_changes(
+        defined_jobs, cloud_jobs, dbt_cloud, exclude_identifiers_matching, output_json
+    ):
+        change_set.append(change)
+    return change_set
+
+
+def _iter_changes(
+    defined_jobs: Dict[str, JobDefinition],
+    cloud_jobs: List[JobDefinition],
+    dbt_cloud: DBTCloud,
+    exclude_identifiers_matching: Optional[str],
+    output_json: bool,
+) -> Iterator[Change]:
     _check_no_duplicate_job_identifier(cloud_jobs)
-    tracked_jobs = {job.identifier: job for job in cloud_jobs if job.identifier is not None}
+    cloud_catalog = JobCatalog(cloud_jobs).managed()
+    cloud_job_ids = cloud_catalog.job_ids_by_identifier()
+    reporter = create_reporter(output_json)
 
     # Filter out jobs based on exclude_identifiers_matching regex if provided
     if exclude_identifiers_matching:
         try:
             exclude_pattern = re.compile(exclude_identifiers_matching)
-            filtered_tracked_jobs = {}
-            excluded_count = 0
-            for identifier, job in tracked_jobs.items():
-                if exclude_pattern.search(identifier):
-                    excluded_count += 1
-                    if not output_json:
-                        logger.debug(
-                            f"Excluding job with identifier '{identifier}' (matches pattern)"
-                        )
-                else:
-                    filtered_tracked_jobs[identifier] = job
-            tracked_jobs = filtered_tracked_jobs
-            if not output_json and excluded_count > 0:
-                logger.info(
-                    f"Excluded {excluded_count} jobs matching pattern '{exclude_identifiers_matching}'"
-                )
         except re.error as e:
             logger.error(f"Invalid regex pattern '{exclude_identifiers_matching}': {e}")
-            return ChangeSet()
-
-    dbt_cloud_change_set = ChangeSet()
+            return
+        excluded_identifiers = cloud_catalog.identifiers_matching(exclude_pattern)
+        for identifier in excluded_identifiers:
+            reporter.excluded_job(identifier)
+        cloud_catalog = cloud_catalog.excluding(excluded_identifiers)
+        reporter.excluded_jobs(len(excluded_identifiers), exclude_identifiers_matching)
+    tracked_jobs = cloud_catalog.jobs_by_identifier()
 
     # Use sets to find jobs for different operations
     shared_jobs = set(defined_jobs.keys()).intersection(set(tracked_jobs.keys()))
     created_jobs = set(defined_jobs.keys()) - set(tracked_jobs.keys())
     deleted_jobs = set(tracked_jobs.keys()) - set(defined_jobs.keys())
 
+    # The jobs referred to by identifier get the ID of the job in dbt Cloud, the IDs of the jobs
+    # created are set when applying the changes
+    try:
+        check_job_references(defined_jobs, set(cloud_job_ids) - deleted_jobs)
+    except JobReferenceError as e:
+        logger.error(str(e))
+        exit(1)
+    for job in defined_jobs.values():
+        job.resolve_job_references(cloud_job_ids)
+
     # Update changed jobs
-    if not output_json:
-        logger.info("Detected {count} existing jobs.", count=len(shared_jobs))
+    reporter.job_count("existing", len(shared_jobs))
     for identifier in shared_jobs:
-        if not output_json:
-            logger.info("Checking for differences in {identifier}", identifier=identifier)
-        is_same, diff_data = check_job_mapping_same(
-            source_job=defined_jobs[identifier], dest_job=tracked_jobs[identifier]
+        with span("diff_jobs"):
+            is_same, diff_data = check_job_mapping_same(
+                source_job=defined_jobs[identifier], dest_job=tracked_jobs[identifier]
+            )
+        references_to_created_jobs = sorted(
+            set(defined_jobs[identifier].job_references()) & created_jobs
         )
+        if is_same and references_to_created_jobs:
+            # the job is updated with the IDs of those jobs once they are created
+            is_same = False
+            diff_data = {
+                "job_id": identifier,
+                "status": "different",
+                "differences": {"references_to_created_jobs": references_to_created_jobs},
+            }
         if not is_same:
             dbt_cloud_change = Change(
                 identifier=identifier,
@@ -337,38 +1117,38 @@ def build_change_set(
                 action="update",
                 proj_id=defined_jobs[identifier].project_id,
                 env_id=defined_jobs[identifier].environment_id,
-                sync_function=dbt_cloud.update_job,
+                operation=ChangeOperation.UPDATE_JOB,
+                dbt_cloud=dbt_cloud,
                 parameters={"job": defined_jobs[identifier]},
                 differences=diff_data.get("differences", {}) if diff_data else {},
+                previous=tracked_jobs[identifier],
             )
-            dbt_cloud_change_set.append(dbt_cloud_change)
+            yield dbt_cloud_change
             defined_jobs[identifier].id = tracked_jobs[identifier].id
-            if not output_json:
-                console = Console()
-                console.print(
-                    f"❌ Job {identifier} is different - Diff:\n{json.dumps(diff_data, indent=2, default=json_serializer_type)}"
-                )
-        elif not output_json:
-            logger.success(f"✅ Job {identifier} is identical")
+            reporter.job_compared(identifier, diff_data or {})
+        else:
+            reporter.job_compared(identifier, None)
+    # the comparisons are written before the counts of the new and deleted jobs
+    reporter.flush()
 
     # Create new jobs
-    if not output_json:
-        logger.info("Detected {count} new jobs.", count=len(created_jobs))
-    for identifier in created_jobs:
+    reporter.job_count("new", len(created_jobs))
+    # in the order of the YML files, the jobs referring to other jobs are ordered when applied
+    for identifier in [identifier for identifier in defined_jobs if identifier in created_jobs]:
         dbt_cloud_change = Change(
             identifier=identifier,
             type="job",
             action="create",
             proj_id=defined_jobs[identifier].project_id,
             env_id=defined_jobs[identifier].environment_id,
-            sync_function=dbt_cloud.create_job,
+            operation=ChangeOperation.CREATE_JOB,
+            dbt_cloud=dbt_cloud,
             parameters={"job": defined_jobs[identifier]},
         )
-        dbt_cloud_change_set.append(dbt_cloud_change)
+        yield dbt_cloud_change
 
     # Remove Deleted Jobs
-    if not output_json:
-        logger.info("Detected {count} deleted jobs.", count=len(deleted_jobs))
+    reporter.job_count("deleted", len(deleted_jobs))
     for identifier in deleted_jobs:
         dbt_cloud_change = Change(
             identifier=identifier,
@@ -376,22 +1156,26 @@ def build_change_set(
             action="delete",
             proj_id=tracked_jobs[identifier].project_id,
             env_id=tracked_jobs[identifier].environment_id,
-            sync_function=dbt_cloud.delete_job,
+            operation=ChangeOperation.DELETE_JOB,
+            dbt_cloud=dbt_cloud,
             parameters={"job": tracked_jobs[identifier]},
+            previous=tracked_jobs[identifier],
         )
-        dbt_cloud_change_set.append(dbt_cloud_change)
+        yield dbt_cloud_change
 
     # -- ENV VARS --
     # Now that we have replicated all jobs we can get their IDs for further API calls
     mapping_job_identifier_job_id = dbt_cloud.build_mapping_job_identifier_job_id(cloud_jobs)
-    if not output_json:
-        logger.debug(f"Mapping of job identifier to id: {mapping_job_identifier_job_id}")
+    reporter.job_ids(mapping_job_identifier_job_id)
 
     # Replicate the env vars from the YML to dbt Cloud
     for job in defined_jobs.values():
         if job.identifier in mapping_job_identifier_job_id:  # the job already exists
             job_id = mapping_job_identifier_job_id[job.identifier]
-            all_env_vars_for_job = dbt_cloud.get_env_vars(project_id=job.project_id, job_id=job_id)
+            with span("fetch_env_vars"):
+                all_env_vars_for_job = dbt_cloud.get_env_vars(
+                    project_id=job.project_id, job_id=job_id
+                )
             for env_var_yml in job.custom_environment_variables:
                 env_var_yml.job_definition_id = job_id
                 same_env_var, env_var_id, diff_data = check_env_var_same(
@@ -411,7 +1195,8 @@ def build_change_set(
                         action=action,
                         proj_id=job.project_id,
                         env_id=job.environment_id,
-                        sync_function=dbt_cloud.update_env_var,
+                        operation=ChangeOperation.UPDATE_ENV_VAR,
+                        dbt_cloud=dbt_cloud,
                         parameters={
                             "project_id": job.project_id,
                             "job_id": job_id,
@@ -419,8 +1204,9 @@ def build_change_set(
                             "env_var_id": env_var_id,
                         },
                         differences=diff_data,
+                        previous=all_env_vars_for_job[env_var_yml.name],
                     )
-                    dbt_cloud_change_set.append(dbt_cloud_change)
+                    yield dbt_cloud_change
 
         else:  # the job doesn't exist yet so it doesn't have an ID
             for env_var_yml in job.custom_environment_variables:
@@ -430,7 +1216,8 @@ def build_change_set(
                     action="create",
                     proj_id=job.project_id,
                     env_id=job.environment_id,
-                    sync_function=dbt_cloud.update_env_var,
+                    operation=ChangeOperation.UPDATE_ENV_VAR,
+                    dbt_cloud=dbt_cloud,
                     parameters={
                         "project_id": job.project_id,
                         "job_id": None,
@@ -439,7 +1226,7 @@ def build_change_set(
                         "yml_job_identifier": job.identifier,
                     },
                 )
-                dbt_cloud_change_set.append(dbt_cloud_change)
+                yield dbt_cloud_change
 
     # Delete the env vars from dbt Cloud that are not in the yml
     for job in defined_jobs.values():
@@ -448,7 +1235,10 @@ def build_change_set(
             job_id = mapping_job_identifier_job_id[job.identifier]
 
             # We get the env vars from dbt Cloud, now that the YML ones have been replicated
-            env_var_dbt_cloud = dbt_cloud.get_env_vars(project_id=job.project_id, job_id=job_id)
+            with span("fetch_env_vars"):
+                env_var_dbt_cloud = dbt_cloud.get_env_vars(
+                    project_id=job.project_id, job_id=job_id
+                )
 
             # And we get the list of env vars defined for a given job in the YML
             env_vars_for_job = [env_var.name for env_var in job.custom_environment_variables]
@@ -456,23 +1246,22 @@ def build_change_set(
             for env_var, env_var_val in env_var_dbt_cloud.items():
                 # If the env var is not in the YML but is defined at the "job" level in dbt Cloud, we delete it
                 if env_var not in env_vars_for_job and env_var_val.id:
-                    if not output_json:
-                        logger.info(f"{env_var} not in the YML file but in the dbt Cloud job")
+                    reporter.extra_env_var(job.identifier, env_var)
                     dbt_cloud_change = Change(
                         identifier=f"{job.identifier}:{env_var}",
                         type="env var overwrite",
                         action="delete",
                         proj_id=job.project_id,
                         env_id=job.environment_id,
-                        sync_function=dbt_cloud.delete_env_var,
+                        operation=ChangeOperation.DELETE_ENV_VAR,
+                        dbt_cloud=dbt_cloud,
                         parameters={
                             "project_id": job.project_id,
                             "env_var_id": env_var_val.id,
                         },
+                        previous=env_var_val,
                     )
-                    dbt_cloud_change_set.append(dbt_cloud_change)
+                    yield dbt_cloud_change
 
     # Filtering out the change set, if project_id(s), environment_id(s) are passed as arguments to function
     # TODO: Confirm if this is the desired functionality, remove otherwise
-
-    return dbt_cloud_change_set
@@ -0,0 +1,71 @@
+"""The dependencies between the jobs of the YML files.
+
+A job can refer to another job of the YML files by its identifier, with
+`deferring_job_identifier` or `job_completion_trigger_condition.condition.job_identifier`,
+instead of its ID. When the job referred to is created by the sync, its ID is only known once it
+is created, so the job referring to it has to be created or updated after it.
+"""
+
+from beartype.typing import Dict, Hashable, List, Set, TypeVar
+
+from dbt_jobs_as_code.schemas.job import JobDefinition
+
+Node = TypeVar("Node", bound=Hashable)
+
+
+class JobReferenceError(Exception):
+    pass
+
+
+def topological_levels(dependencies: Dict[Node, Set[Node]]) -> List[List[Node]]:
+    """Group the nodes in levels, each node being in a level after the nodes it depends on.
+
+    The dependencies which are not nodes are ignored, and the nodes of a level keep the order
+    of `dependencies`.
+    """
+    remaining = {
+        node: {dependency for dependency in node_dependencies if dependency in dependencies}
+        for node, node_dependencies in dependencies.items()
+    }
+    levels: List[List[Node]] = []
+    while remaining:
+        level = [node for node, node_dependencies in remaining.items() if not node_dependencies]
+        if not level:
+            cycle = ", ".join(sorted(str(node) for node in remaining))
+            raise JobReferenceError(f"There is a cycle in the references between {cycle}")
+        levels.append(level)
+        for node in level:
+            del remaining[node]
+        done = set(level)
+        for node_dependencies in remaining.values():
+            node_dependencies -= done
+    return levels
+
+
+def check_job_references(
+    defined_jobs: Dict[str, JobDefinition], existing_identifiers: Set[str]
+) -> None:
+    """Check that the jobs referred to by identifier can be resolved to an ID.
+
+    The jobs referred to must be in the YML files or in `existing_identifiers`, the jobs in
+    dbt Cloud that are not deleted by the sync. The jobs to create can't refer to each other in
+    a cycle, since none of them would have an ID to refer to.
+    """
+    for identifier, job in defined_jobs.items():
+        for reference in job.job_references():
+            if reference not in defined_jobs and reference not in existing_identifiers:
+                raise JobReferenceError(
+                    f"The job {identifier} refers to the job {reference}, which is not in the "
+                    "YML files"
+                )
+    created_jobs = {
+        identifier: job
+        for identifier, job in defined_jobs.items()
+        if identifier not in existing_identifiers
+    }
+    topological_levels(
+        {
+            identifier: set(job.job_references()) & created_jobs.keys()
+            for identifier, job in created_jobs.items()
+        }
+    )
@@ -0,0 +1,225 @@
+"""Record the changes applied by `sync`, so that an interrupted sync can be resumed.
+
+The journal is a JSON Lines file. Its first line is the plan, with everything needed to apply
+each change again. A line is then appended for each change applied, with the IDs returned by
+dbt Cloud, and a last line once all the changes were applied successfully.
+
+When resuming, the changes already applied are checked against dbt Cloud, fetching only their
+jobs, and the other changes are applied without listing and comparing all the jobs again.
+"""
+
+import json
+import os
+import threading
+
+from beartype.typing import Dict, List, Optional, Tuple
+from loguru import logger
+from pydantic import BaseModel
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+    Change,
+    ChangeOperation,
+    ChangeSet,
+    _dbt_cloud_client,
+    _resolve_created_job_id,
+    json_serializer_type,
+)
+from dbt_jobs_as_code.instrumentation import span
+from dbt_jobs_as_code.schemas import check_job_mapping_same
+from dbt_jobs_as_code.schemas.custom_environment_variable import CustomEnvironmentVariable
+from dbt_jobs_as_code.schemas.job import JobDefinition
+
+JOURNAL_VERSION = 1
+
+
+class JournalError(Exception):
+    pass
+
+
+def _model_to_json(model: BaseModel) -> dict:
+    # the env var overwrites of a job are separate changes, and their JSON can't be loaded back
+    if isinstance(model, JobDefinition):
+        return model.model_dump(mode="json", exclude={"custom_environment_variables"})
+    return model.model_dump(mode="json")
+
+
+def change_to_entry(change: Change) -> dict:
+    """Return what is needed to apply the change again, as JSON."""
+    if change.operation is None or change.dbt_cloud is None:
+        raise JournalError(f"The change {change} has no operation and can't be journaled")
+    return {
+        "identifier": change.identifier,
+        "type": change.type,
+        "action": change.action,
+        "project_id": change.proj_id,
+        "environment_id": change.env_id,
+        "operation": change.operation.value,
+        "account_id": change.dbt_cloud.account_id,
+        "parameters": {
+            key: _model_to_json(value) if isinstance(value, BaseModel) else value
+            for key, value in change.parameters.items()
+        },
+        "differences": change.differences,
+    }
+
+
+def change_from_entry(entry: dict, dbt_cloud: DBTCloud) -> Change:
+    parameters = dict(entry["parameters"])
+    if "job" in parameters:
+        parameters["job"] = JobDefinition(**parameters["job"])
+    if "custom_env_var" in parameters:
+        parameters["custom_env_var"] = CustomEnvironmentVariable(**parameters["custom_env_var"])
+    return Change(
+        identifier=entry["identifier"],
+        type=entry["type"],
+        action=entry["action"],
+        proj_id=entry["project_id"],
+        env_id=entry["environment_id"],
+        operation=ChangeOperation(entry["operation"]),
+        dbt_cloud=dbt_cloud,
+        parameters=parameters,
+        differences=entry["differences"],
+    )
+
+
+class ApplyJournal:
+    """Append the plan and each change applied to the journal file at `path`."""
+
+    def __init__(self, path: str, indices: Optional[Dict[int, int]] = None):
+        self.path = path
+        # the index in the plan of each change, by id() of the change, once the plan is written
+        self._indices = indices
+        # the changes are applied in parallel
+        self._lock = threading.Lock()
+
+    def record_plan(self, changes: List[Change]) -> None:
+        """Start the journal with the plan, unless the sync is resumed from this journal."""
+        if self._indices is not None:
+            return
+        entries = [change_to_entry(change) for change in changes]
+        with open(self.path, "w") as f:
+            f.write(
+                json.dumps(
+                    {"event": "plan", "version": JOURNAL_VERSION, "changes": entries},
+                    default=json_serializer_type,
+                )
+                + "\n"
+            )
+        self._indices = {id(change): index for index, change in enumerate(changes)}
+
+    def record_applied(self, change: Change, applied_change: dict) -> None:
+        self._append({"event": "applied", "index": self._indices[id(change)], **applied_change})
+
+    def record_done(self) -> None:
+        self._append({"event": "done"})
+
+    def _append(self, line: dict) -> None:
+        # the file is flushed after each change, so that it is complete if the sync is killed
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(line, default=json_serializer_type) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_journal(path: str) -> Tuple[List[dict], Dict[int, dict], bool]:
+    """Return the changes planned, the changes applied by index and whether the sync is done."""
+    plan: List[dict] = []
+    applied: Dict[int, dict] = {}
+    done = False
+    with open(path) as f:
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                # the last line can be incomplete if the sync was killed while writing it
+                if line.endswith("\n"):
+                    raise JournalError(f"Line {number} of the journal is invalid: {e}")
+                break
+            if record["event"] == "plan":
+                if record.get("version") != JOURNAL_VERSION:
+                    raise JournalError(f"Unsupported journal version {record.get('version')}")
+                plan = record["changes"]
+            elif record["event"] == "applied":
+                applied[record["index"]] = record
+            elif record["event"] == "done":
+                done = True
+    return plan, applied, done
+
+
+def _still_applied(change: Change, applied: dict, dbt_cloud: DBTCloud) -> bool:
+    """Check that a change applied before the sync was interrupted is still in dbt Cloud.
+
+    Deletions are trusted, dbt Cloud confirmed them and the journal doesn't recreate anything.
+    """
+    if change.operation in (ChangeOperation.CREATE_JOB, ChangeOperation.UPDATE_JOB):
+        try:
+            cloud_job = dbt_cloud.get_job(applied["job_id"])
+        except DBTCloudException:
+            return False
+        return check_job_mapping_same(change.parameters["job"], cloud_job)[0]
+    if change.operation == ChangeOperation.UPDATE_ENV_VAR:
+        env_var = change.parameters["custom_env_var"]
+        cloud_env_vars = dbt_cloud.get_env_vars(
+            project_id=change.parameters["project_id"], job_id=applied["job_id"]
+        )
+        return (
+            env_var.name in cloud_env_vars and cloud_env_vars[env_var.name].value == env_var.value
+        )
+    return True
+
+
+def resume_change_set(
+    path: str,
+    disable_ssl_verification: bool,
+    credentials_mapping: Optional[Dict[int, dict]] = None,
+) -> Optional[ChangeSet]:
+    """Return the changes of the journal left to apply, or None if there is no sync to resume.
+
+    A change applied that doesn't match dbt Cloud anymore is applied again. A job created
+    which doesn't match is updated instead of being created again.
+    """
+    if not os.path.exists(path):
+        return None
+    plan, applied, done = read_journal(path)
+    if not plan or done:
+        return None
+
+    clients: Dict[int, DBTCloud] = {}
+    created_job_ids = {
+        plan[index]["identifier"]: entry["job_id"]
+        for index, entry in applied.items()
+        if plan[index]["operation"] == ChangeOperation.CREATE_JOB.value and entry.get("job_id")
+    }
+    remaining: List[Change] = []
+    indices: Dict[int, int] = {}
+    with span("verify_journal"):
+        for index, entry in enumerate(plan):
+            account_id = entry["account_id"]
+            if account_id not in clients:
+                clients[account_id] = _dbt_cloud_client(
+                    account_id, disable_ssl_verification, credentials_mapping
+                )
+            change = change_from_entry(entry, clients[account_id])
+            # before the comparison with dbt Cloud, where the references are job IDs
+            _resolve_created_job_id(change, created_job_ids)
+            if index in applied:
+                if _still_applied(change, applied[index], clients[account_id]):
+                    continue
+                logger.warning(f"{change} doesn't match dbt Cloud anymore, applying it again.")
+                if change.operation == ChangeOperation.CREATE_JOB and applied[index].get("job_id"):
+                    change.parameters["job"].id = applied[index]["job_id"]
+                    change.operation = ChangeOperation.UPDATE_JOB
+            indices[id(change)] = index
+            remaining.append(change)
+
+    logger.info(
+        "Resuming the sync recorded in {path}: {applied} changes already applied, "
+        "{remaining} changes left.",
+        path=path,
+        applied=len(plan) - len(remaining),
+        remaining=len(remaining),
+    )
+    return ChangeSet(root=remaining, journal=ApplyJournal(path, indices))
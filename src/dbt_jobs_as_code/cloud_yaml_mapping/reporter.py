@@ -0,0 +1,181 @@
+"""Report the progress of the comparison of the YML jobs with the dbt Cloud jobs.
+
+- `quiet` reports nothing
+- `summary` reports the number of jobs in each category, without anything per job
+- `full` reports each job as it is compared, with the differences of the jobs that changed,
+  printed to stderr instead of stdout when the output is JSON
+- `json` writes each job compared as a line of JSON to stderr, in batches
+"""
+
+import json
+import sys
+import threading
+from contextlib import contextmanager
+
+from beartype.typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+from loguru import logger
+
+if TYPE_CHECKING:
+    import rich.console
+
+REPORT_MODES = ["quiet", "summary", "full", "json"]
+# the number of jobs reported at once in JSON
+BATCH_SIZE = 200
+
+_report_mode: Optional[str] = None
+# the consoles printing to stdout and to stderr
+_consoles: Dict[bool, "rich.console.Console"] = {}
+_console_lock = threading.Lock()
+
+
+def _shared_console(stderr: bool = False) -> "rich.console.Console":
+    with _console_lock:
+        if stderr not in _consoles:
+            from rich.console import Console
+
+            _consoles[stderr] = Console(stderr=stderr)
+        return _consoles[stderr]
+
+
+def json_serializer_type(obj):
+    if isinstance(obj, type):
+        return obj.__name__
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class Reporter:
+    """Receive the progress of a comparison, the base class reports nothing."""
+
+    def excluded_job(self, identifier: str) -> None:
+        pass
+
+    def excluded_jobs(self, count: int, pattern: str) -> None:
+        pass
+
+    def job_count(self, category: str, count: int) -> None:
+        """The number of `existing`, `new` or `deleted` jobs."""
+
+    def job_compared(self, identifier: str, diff_data: Optional[dict]) -> None:
+        """An existing job was compared, `diff_data` is None when it is identical."""
+
+    def job_ids(self, mapping_job_identifier_job_id: dict) -> None:
+        pass
+
+    def extra_env_var(self, identifier: str, env_var: str) -> None:
+        pass
+
+    def flush(self) -> None:
+        """Write what is still buffered, at the end of the comparison."""
+
+
+class SummaryReporter(Reporter):
+    def __init__(self) -> None:
+        self.identical = 0
+        self.different = 0
+
+    def excluded_jobs(self, count: int, pattern: str) -> None:
+        if count > 0:
+            logger.info(f"Excluded {count} jobs matching pattern '{pattern}'")
+
+    def job_count(self, category: str, count: int) -> None:
+        logger.info("Detected {count} {category} jobs.", count=count, category=category)
+
+    def job_compared(self, identifier: str, diff_data: Optional[dict]) -> None:
+        if diff_data is None:
+            self.identical += 1
+        else:
+            self.different += 1
+
+    def flush(self) -> None:
+        if self.identical or self.different:
+            logger.info(
+                "{identical} identical jobs, {different} different jobs.",
+                identical=self.identical,
+                different=self.different,
+            )
+            self.identical = self.different = 0
+
+
+class FullReporter(SummaryReporter):
+    def __init__(self, stderr: bool = False) -> None:
+        super().__init__()
+        # the differences don't go to stdout when it is used for the JSON output
+        self._stderr = stderr
+
+    def excluded_job(self, identifier: str) -> None:
+        logger.debug(f"Excluding job with identifier '{identifier}' (matches pattern)")
+
+    def job_compared(self, identifier: str, diff_data: Optional[dict]) -> None:
+        logger.info("Checking for differences in {identifier}", identifier=identifier)
+        if diff_data is None:
+            logger.success(f"✅ Job {identifier} is identical")
+        else:
+            _shared_console(self._stderr).print(
+                f"❌ Job {identifier} is different - Diff:\n{json.dumps(diff_data, indent=2, default=json_serializer_type)}"
+            )
+
+    def job_ids(self, mapping_job_identifier_job_id: dict) -> None:
+        logger.debug(f"Mapping of job identifier to id: {mapping_job_identifier_job_id}")
+
+    def extra_env_var(self, identifier: str, env_var: str) -> None:
+        logger.info(f"{env_var} not in the YML file but in the dbt Cloud job")
+
+
+class JsonReporter(Reporter):
+    def __init__(self) -> None:
+        self._lines: List[str] = []
+
+    def job_compared(self, identifier: str, diff_data: Optional[dict]) -> None:
+        self._lines.append(
+            json.dumps(
+                {
+                    "event": "job_compared",
+                    "identifier": identifier,
+                    "identical": diff_data is None,
+                    "differences": (diff_data or {}).get("differences", {}),
+                },
+                default=json_serializer_type,
+            )
+        )
+        if len(self._lines) >= BATCH_SIZE:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._lines:
+            sys.stderr.write("\n".join(self._lines) + "\n")
+            sys.stderr.flush()
+            self._lines = []
+
+
+_REPORTERS = {
+    "quiet": Reporter,
+    "summary": SummaryReporter,
+    "full": FullReporter,
+    "json": JsonReporter,
+}
+
+
+def create_reporter(output_json: bool = False) -> Reporter:
+    """Return a reporter for a comparison, using the mode set with `report_mode`.
+
+    Without a mode set, the comparison is reported in full, unless the output is JSON.
+    """
+    mode = _report_mode or ("quiet" if output_json else "full")
+    if mode == "full":
+        return FullReporter(stderr=output_json)
+    return _REPORTERS[mode]()
+
+
+@contextmanager
+def report_mode(mode: Optional[str]) -> Iterator[None]:
+    """Report the comparisons run in the block with `mode`, or the default mode if None."""
+    global _report_mode
+    previous, _report_mode = _report_mode, mode
+    try:
+        yield
+    finally:
+        _report_mode = previous
+
+
+def get_report_mode() -> Optional[str]:
+    return _report_mode
@@ -0,0 +1,479 @@
+"""Compare the YML jobs with dbt Cloud one shard at a time.
+
+A shard is a project, or an environment of a project, with the YML jobs and the dbt Cloud jobs
+it contains. Shards are independent, except when a job is triggered by the completion of a job
+from another shard, or when a job moved from one shard to another. Such shards are compared
+together, so that the result is the same as comparing the whole account at once.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+
+from beartype.typing import Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+    ChangeSet,
+    _account_filters,
+    _dbt_cloud_client,
+    _jobs_by_account,
+    _load_credentials_mapping,
+    _load_jobs_to_compare,
+    compute_change_set,
+)
+from dbt_jobs_as_code.instrumentation import PhaseTiming, merge_timings, span
+from dbt_jobs_as_code.schemas.job import JobDefinition
+
+SHARD_BY_CHOICES = ["project", "environment"]
+
+# (project_id, environment_id), the environment is None when sharding by project
+ShardKey = Tuple[int, Optional[int]]
+
+
+@dataclass
+class Shard:
+    """The YML jobs of one or several projects or environments compared together.
+
+    `account_id` is only set when the YML files define jobs for several accounts, to tell the
+    shards of the different accounts apart.
+    """
+
+    keys: List[ShardKey]
+    defined_jobs: Dict[str, JobDefinition]
+    account_id: Optional[int] = None
+
+    @property
+    def name(self) -> str:
+        name = ", ".join(
+            f"project {project_id}"
+            if environment_id is None
+            else f"project {project_id} env {environment_id}"
+            for project_id, environment_id in self.keys
+        )
+        return name if self.account_id is None else f"account {self.account_id} {name}"
+
+    def get_cloud_jobs(
+        self, dbt_cloud: DBTCloud, environment_ids: List[int]
+    ) -> List[JobDefinition]:
+        """Return the jobs of the shard in dbt Cloud, limited to `environment_ids` if provided."""
+        cloud_jobs = []
+        for project_id, environment_id in self.keys:
+            cloud_jobs.extend(
+                dbt_cloud.get_jobs(
+                    project_ids=[project_id],
+                    environment_ids=environment_ids
+                    if environment_id is None
+                    else [environment_id],
+                )
+            )
+        return cloud_jobs
+
+
+class _ShardGroups:
+    """Union-find of the shard keys, to merge the shards that need to be compared together."""
+
+    def __init__(self) -> None:
+        self.parents: Dict[ShardKey, ShardKey] = {}
+
+    def add(self, key: ShardKey) -> None:
+        self.parents.setdefault(key, key)
+
+    def find(self, key: ShardKey) -> ShardKey:
+        self.add(key)
+        while self.parents[key] != key:
+            self.parents[key] = self.parents[self.parents[key]]
+            key = self.parents[key]
+        return key
+
+    def union(self, key: ShardKey, other_key: ShardKey) -> None:
+        root, other_root = sorted([self.find(key), self.find(other_key)], key=_sort_key)
+        self.parents[other_root] = root
+
+    def groups(self) -> List[List[ShardKey]]:
+        groups: Dict[ShardKey, List[ShardKey]] = {}
+        for key in sorted(self.parents, key=_sort_key):
+            groups.setdefault(self.find(key), []).append(key)
+        return list(groups.values())
+
+
+def _sort_key(key: ShardKey) -> Tuple[int, int]:
+    return key[0], key[1] if key[1] is not None else -1
+
+
+def _cloud_identifier(name: str) -> Optional[str]:
+    try:
+        return JobDefinition._extract_identifier_from_name(name).identifier
+    except ValueError:
+        return None
+
+
+def plan_shards(
+    defined_jobs: Dict[str, JobDefinition],
+    dbt_cloud: DBTCloud,
+    shard_by: str,
+    project_ids: List[int],
+    environment_ids: List[int],
+    output_json: bool = False,
+) -> List[Shard]:
+    """Split the YML jobs into shards, by project or by environment.
+
+    The jobs in dbt Cloud are listed page by page, without being kept, to find the shards that
+    only exist in dbt Cloud and the shards that need to be compared together:
+    - a job triggered by the completion of a job from another shard
+    - a job referring by identifier to a job from another shard
+    - a job identifier found in another shard in dbt Cloud, because the job moved or because the
+      identifier is duplicated
+    """
+
+    def shard_key(project_id: int, environment_id: int) -> ShardKey:
+        return project_id, environment_id if shard_by == "environment" else None
+
+    shard_groups = _ShardGroups()
+    for job in defined_jobs.values():
+        shard_groups.add(shard_key(job.project_id, job.environment_id))
+
+    cloud_job_keys: Dict[int, ShardKey] = {}
+    cloud_identifier_keys: Dict[str, ShardKey] = {}
+    cloud_triggers: List[Tuple[ShardKey, int]] = []
+    with span("list_shards"):
+        for page in dbt_cloud.iter_raw_job_pages(
+            project_ids=project_ids, environment_ids=environment_ids
+        ):
+            for job in page:
+                key = shard_key(job["project_id"], job["environment_id"])
+                shard_groups.add(key)
+                cloud_job_keys[job["id"]] = key
+                identifier = _cloud_identifier(job["name"])
+                if identifier is not None:
+                    shard_groups.union(cloud_identifier_keys.setdefault(identifier, key), key)
+                trigger = job.get("job_completion_trigger_condition")
+                if trigger:
+                    cloud_triggers.append((key, trigger["condition"]["job_id"]))
+
+    for job in defined_jobs.values():
+        key = shard_key(job.project_id, job.environment_id)
+        if job.identifier in cloud_identifier_keys:
+            shard_groups.union(key, cloud_identifier_keys[job.identifier])
+        trigger = job.job_completion_trigger_condition
+        if trigger is not None and trigger.condition.job_id is not None:
+            cloud_triggers.append((key, trigger.condition.job_id))
+        for reference in job.job_references():
+            if reference in defined_jobs:
+                referred_job = defined_jobs[reference]
+                shard_groups.union(
+                    key, shard_key(referred_job.project_id, referred_job.environment_id)
+                )
+            elif reference in cloud_identifier_keys:
+                shard_groups.union(key, cloud_identifier_keys[reference])
+    for key, trigger_job_id in cloud_triggers:
+        if trigger_job_id in cloud_job_keys:
+            shard_groups.union(key, cloud_job_keys[trigger_job_id])
+
+    shards = []
+    for keys in shard_groups.groups():
+        group_keys = set(keys)
+        shards.append(
+            Shard(
+                keys=keys,
+                defined_jobs={
+                    identifier: job
+                    for identifier, job in defined_jobs.items()
+                    if shard_key(job.project_id, job.environment_id) in group_keys
+                },
+            )
+        )
+        if len(keys) > 1 and not output_json:
+            logger.info(
+                "Comparing {name} together, they share job completion triggers or job identifiers.",
+                name=shards[-1].name,
+            )
+    return shards
+
+
+def iter_change_set_shards(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool = False,
+    exclude_identifiers_matching: Optional[str] = None,
+    output_json: bool = False,
+    shard_by: str = "project",
+    account_credentials: Optional[str] = None,
+) -> Iterator[Tuple[str, ChangeSet]]:
+    """Compare the YML files with dbt Cloud one shard at a time, to bound the memory used.
+
+    The name and the change set of each shard are yielded once computed. The dbt Cloud jobs and
+    env vars of a shard are released before the next shard is compared, so the caller should
+    apply the change set and drop it before asking for the next one.
+    """
+    for dbt_cloud, account_environment_ids, shards in _iter_account_shards(
+        config,
+        yml_vars,
+        disable_ssl_verification,
+        project_ids,
+        environment_ids,
+        limit_projects_envs_to_yml,
+        shard_by,
+        _load_credentials_mapping(account_credentials),
+        output_json,
+    ):
+        while shards:
+            shard = shards.pop(0)
+            with span("shard", shard=shard.name):
+                with span("list_cloud_jobs"):
+                    cloud_jobs = shard.get_cloud_jobs(dbt_cloud, account_environment_ids)
+                change_set = compute_change_set(
+                    shard.defined_jobs,
+                    cloud_jobs,
+                    dbt_cloud,
+                    exclude_identifiers_matching=exclude_identifiers_matching,
+                    output_json=output_json,
+                )
+                del cloud_jobs
+
+                yield shard.name, change_set
+
+                del shard, change_set
+                dbt_cloud.clear_env_var_cache()
+
+
+def _iter_account_shards(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+    shard_by: str,
+    credentials_mapping: Optional[Dict[int, dict]],
+    output_json: bool,
+) -> Iterator[Tuple[DBTCloud, List[int], List[Shard]]]:
+    """Load the YML jobs and yield the client, the environment filter and the shards of each
+    account, the shards of an account being planned when the previous account is done."""
+    loaded = _load_jobs_to_compare(
+        config, yml_vars, project_ids, environment_ids, limit_projects_envs_to_yml
+    )
+    if loaded is None:
+        return
+    defined_jobs, project_ids, environment_ids = loaded
+
+    jobs_by_account = _jobs_by_account(defined_jobs)
+    multi_account = len(jobs_by_account) > 1
+    del defined_jobs
+    for account_id in list(jobs_by_account):
+        account_jobs = jobs_by_account.pop(account_id)
+        dbt_cloud = _dbt_cloud_client(account_id, disable_ssl_verification, credentials_mapping)
+        account_project_ids, account_environment_ids = _account_filters(
+            account_jobs, project_ids, environment_ids, limit_projects_envs_to_yml
+        )
+        shards = plan_shards(
+            account_jobs,
+            dbt_cloud,
+            shard_by,
+            account_project_ids,
+            account_environment_ids,
+            output_json,
+        )
+        if multi_account:
+            for shard in shards:
+                shard.account_id = account_id
+        yield dbt_cloud, account_environment_ids, shards
+
+
+@dataclass
+class ShardTask:
+    """What a worker process needs to compare, and optionally sync, a shard."""
+
+    index: int
+    shard: Shard
+    account_id: int
+    credentials_mapping: Optional[Dict[int, dict]]
+    disable_ssl_verification: bool
+    environment_ids: List[int]
+    exclude_identifiers_matching: Optional[str]
+    output_json: bool
+    apply: bool
+    fail_fast: bool
+    record_timings: bool
+    trace_requests: bool
+    report_mode: Optional[str] = None
+    apply_workers: int = 1
+
+
+@dataclass
+class ShardResult:
+    """The changes of a shard, as JSON, and what the worker process recorded."""
+
+    index: int
+    name: str
+    plan_json: dict
+    applied_json: dict
+    apply_success: bool = True
+    error: Optional[str] = None
+    phases: List[PhaseTiming] = field(default_factory=list)
+    requests: list = field(default_factory=list)
+
+    @property
+    def change_count(self) -> int:
+        return len(self.plan_json["job_changes"]) + len(
+            self.plan_json["env_var_overwrite_changes"]
+        )
+
+
+def run_shard(task: ShardTask) -> ShardResult:
+    """Compare a shard with dbt Cloud and apply the changes if requested.
+
+    This runs in a worker process. Errors are returned in the result instead of being raised, so
+    that the other shards are not impacted.
+    """
+    from dbt_jobs_as_code.cloud_yaml_mapping.reporter import report_mode
+    from dbt_jobs_as_code.instrumentation import start_timings, stop_timings
+    from dbt_jobs_as_code.instrumentation.request_trace import (
+        start_request_trace,
+        stop_request_trace,
+    )
+
+    timings = start_timings() if task.record_timings else None
+    request_trace = start_request_trace() if task.trace_requests else None
+    result = ShardResult(
+        index=task.index,
+        name=task.shard.name,
+        plan_json={"job_changes": [], "env_var_overwrite_changes": []},
+        applied_json={"job_changes": [], "env_var_overwrite_changes": []},
+    )
+    try:
+        dbt_cloud = _dbt_cloud_client(
+            task.account_id, task.disable_ssl_verification, task.credentials_mapping
+        )
+        with span("shard", shard=task.shard.name), report_mode(task.report_mode):
+            with span("list_cloud_jobs"):
+                cloud_jobs = task.shard.get_cloud_jobs(dbt_cloud, task.environment_ids)
+            change_set = compute_change_set(
+                task.shard.defined_jobs,
+                cloud_jobs,
+                dbt_cloud,
+                exclude_identifiers_matching=task.exclude_identifiers_matching,
+                output_json=task.output_json,
+            )
+            result.plan_json = change_set.to_json()
+            if task.apply and len(change_set) > 0:
+                change_set.apply(fail_fast=task.fail_fast, workers=task.apply_workers)
+                result.applied_json = change_set.to_applied_json()
+                result.apply_success = change_set.apply_success
+    except (Exception, SystemExit) as e:
+        result.error = f"{type(e).__name__}: {e}"
+        result.apply_success = False
+    finally:
+        stop_timings()
+        stop_request_trace()
+    if timings is not None:
+        result.phases = list(timings.phases.values())
+    if request_trace is not None:
+        result.requests = request_trace.records
+    return result
+
+
+def run_sharded(
+    config: str,
+    yml_vars: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+    exclude_identifiers_matching: Optional[str],
+    shard_by: str,
+    workers: Optional[int],
+    apply: bool,
+    fail_fast: bool = False,
+    output_json: bool = False,
+    account_credentials: Optional[str] = None,
+    apply_workers: int = 1,
+) -> Iterator[ShardResult]:
+    """Compare, and sync when `apply` is set, each shard in its own worker process.
+
+    The results are yielded as the shards complete. The timings and the requests of the workers
+    are added to the ones of the current process. With `fail_fast`, the shards not started yet
+    are cancelled once a shard fails.
+    """
+    from dbt_jobs_as_code.cloud_yaml_mapping.reporter import get_report_mode
+    from dbt_jobs_as_code.instrumentation import get_timings
+    from dbt_jobs_as_code.instrumentation.request_trace import get_request_trace, record_request
+
+    credentials_mapping = _load_credentials_mapping(account_credentials)
+    tasks = []
+    for dbt_cloud, account_environment_ids, shards in _iter_account_shards(
+        config,
+        yml_vars,
+        disable_ssl_verification,
+        project_ids,
+        environment_ids,
+        limit_projects_envs_to_yml,
+        shard_by,
+        credentials_mapping,
+        output_json,
+    ):
+        tasks.extend(
+            ShardTask(
+                index=len(tasks) + index,
+                shard=shard,
+                account_id=dbt_cloud.account_id,
+                credentials_mapping=credentials_mapping,
+                disable_ssl_verification=disable_ssl_verification,
+                environment_ids=account_environment_ids,
+                exclude_identifiers_matching=exclude_identifiers_matching,
+                output_json=output_json,
+                apply=apply,
+                fail_fast=fail_fast,
+                record_timings=get_timings() is not None,
+                trace_requests=get_request_trace() is not None,
+                report_mode=get_report_mode(),
+                apply_workers=apply_workers,
+            )
+            for index, shard in enumerate(shards)
+        )
+    if not tasks:
+        return
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if not output_json:
+        logger.info(
+            "Comparing {count} shards with {workers} worker processes.",
+            count=len(tasks),
+            workers=workers,
+        )
+
+    # spawn rather than fork, the parent process may have threads running
+    with (
+        span("run_shards"),
+        ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor,
+    ):
+        futures = {executor.submit(run_shard, task): task for task in tasks}
+        for future in as_completed(futures):
+            if future.cancelled():
+                continue
+            try:
+                result = future.result()
+            except Exception as e:
+                # the worker process died, e.g. it ran out of memory
+                task = futures[future]
+                result = ShardResult(
+                    index=task.index,
+                    name=task.shard.name,
+                    plan_json={"job_changes": [], "env_var_overwrite_changes": []},
+                    applied_json={"job_changes": [], "env_var_overwrite_changes": []},
+                    apply_success=False,
+                    error=f"{type(e).__name__}: {e}",
+                )
+            merge_timings(result.phases)
+            for record in result.requests:
+                record_request(record)
+            yield result
+            if fail_fast and not result.apply_success:
+                for pending in futures:
+                    pending.cancel()
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Optional
+
+from beartype.typing import Optional
 
 from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
 from dbt_jobs_as_code.schemas.job import JobDefinition
@@ -1,6 +1,8 @@
-from io import StringIO
-from typing import Any, Dict, Optional
+import os
+import sys
+from io import StringIO, TextIOBase
 
+from beartype.typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from ruamel.yaml import YAML
 
 from dbt_jobs_as_code.schemas.job import JobDefinition
@@ -34,26 +36,55 @@ def apply_templated_fields(
     return result
 
 
-def export_jobs_yml(
-    jobs: list[JobDefinition], include_linked_id: bool = False, template_file: Optional[str] = None
-):
-    """Export a list of job definitions to YML
+SCHEMA_HEADER = "# yaml-language-server: $schema=https://raw.githubusercontent.com/dbt-labs/dbt-jobs-as-code/main/src/dbt_jobs_as_code/schemas/load_job_schema.json"
 
-    Args:
-        jobs: List of job definitions to export
-        include_linked_id: Whether to include the linked ID in the export
-        template_file: Path to a YAML file containing field templates to apply
+
+class JobsYmlWriter:
+    """Write a jobs YML file to a stream, one job at a time.
+
+    Each job is dumped and written as soon as it is added, so that the whole file is never held
+    in memory. The output is the same as dumping all the jobs at once.
     """
-    yaml = YAML()
-    template_config = {}
-    if template_file:
-        with open(template_file, "r") as f:
-            # Replace curly braces with custom delimiters in template file content
-            content = f.read()
-            content = escape_curly_braces(content)
-            template_config = yaml.load(content)
-
-    export_yml = {"jobs": {}}
+
+    def __init__(self, stream: TextIOBase):
+        self.stream = stream
+        self.job_count = 0
+        self.yaml = YAML()
+        self.yaml.width = 4096
+        self.yaml.block_seq_indent = 2
+        self.stream.write(f"{SCHEMA_HEADER}\n\n")
+
+    def write_job(self, yaml_key: str, job_dict: Dict[Any, Any]) -> None:
+        chunk = StringIO()
+        # the job is dumped under `jobs` to be indented like in the whole file
+        self.yaml.dump({"jobs": {yaml_key: job_dict}}, chunk)
+        jobs_line, job_yml = chunk.getvalue().split("\n", 1)
+        if self.job_count == 0:
+            self.stream.write(f"{jobs_line}\n")
+        # Convert back to standard template syntax before output
+        self.stream.write(unescape_curly_braces(job_yml))
+        self.job_count += 1
+
+    def close(self) -> None:
+        if self.job_count == 0:
+            self.stream.write("jobs: {}\n")
+
+
+def _load_template_config(template_file: Optional[str]) -> Dict[str, str]:
+    if not template_file:
+        return {}
+    with open(template_file, "r") as f:
+        # Replace curly braces with custom delimiters in template file content
+        content = f.read()
+        content = escape_curly_braces(content)
+        return YAML().load(content) or {}
+
+
+def _jobs_to_export(
+    jobs: Iterable[JobDefinition], include_linked_id: bool, template_file: Optional[str]
+) -> Iterator[Tuple[str, JobDefinition, Dict[Any, Any]]]:
+    """The YML key, the job and its YML content, for each job as it is iterated over."""
+    template_config = _load_template_config(template_file)
     for id, cloud_job in enumerate(jobs):
         yaml_key = cloud_job.identifier if cloud_job.identifier else f"import_{id + 1}"
         job_dict = cloud_job.to_load_format(include_linked_id)
@@ -61,21 +92,68 @@ def export_jobs_yml(
         if template_config:
             job_dict = apply_templated_fields(job_dict, template_config)
 
-        export_yml["jobs"][yaml_key] = job_dict
-
-    print(
-        "# yaml-language-server: $schema=https://raw.githubusercontent.com/dbt-labs/dbt-jobs-as-code/main/src/dbt_jobs_as_code/schemas/load_job_schema.json"
-    )
-    print("")
-
-    yaml.width = 4096
-    yaml.block_seq_indent = 2
-    # Convert back to standard template syntax before output
-    stream = StringIO()
-    yaml.dump(export_yml, stream)
-    yaml_str = stream.getvalue()
-    yaml_str = unescape_curly_braces(yaml_str)
-    print(yaml_str, end="")
+        yield yaml_key, cloud_job, job_dict
+
+
+def export_jobs_yml(
+    jobs: Iterable[JobDefinition],
+    include_linked_id: bool = False,
+    template_file: Optional[str] = None,
+):
+    """Export job definitions to YML, printing each job as soon as it is converted
+
+    Args:
+        jobs: Job definitions to export, they are converted as they are iterated over
+        include_linked_id: Whether to include the linked ID in the export
+        template_file: Path to a YAML file containing field templates to apply
+    """
+    writer = JobsYmlWriter(sys.stdout)
+    for yaml_key, _, job_dict in _jobs_to_export(jobs, include_linked_id, template_file):
+        writer.write_job(yaml_key, job_dict)
+    writer.close()
+
+
+def export_jobs_yml_to_dir(
+    jobs: Iterable[JobDefinition],
+    output_dir: str,
+    split_by: str = "project",
+    include_linked_id: bool = False,
+    template_file: Optional[str] = None,
+) -> List[str]:
+    """Export job definitions to one YML file per project or per environment
+
+    The files are named `project_<id>.yml` or `environment_<id>.yml` and can be given to `plan`
+    or `sync` with a glob pattern. The jobs are written to their file as they are converted.
+
+    Args:
+        jobs: Job definitions to export, they are converted as they are iterated over
+        output_dir: Directory where the files are written, created if needed
+        split_by: `project` or `environment`, what each file contains the jobs of
+        include_linked_id: Whether to include the linked ID in the export
+        template_file: Path to a YAML file containing field templates to apply
+
+    Returns:
+        The paths of the files written
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    files: Dict[int, TextIOBase] = {}
+    writers: Dict[int, JobsYmlWriter] = {}
+    try:
+        for yaml_key, cloud_job, job_dict in _jobs_to_export(
+            jobs, include_linked_id, template_file
+        ):
+            group_id = cloud_job.project_id if split_by == "project" else cloud_job.environment_id
+            if group_id not in writers:
+                path = os.path.join(output_dir, f"{split_by}_{group_id}.yml")
+                files[group_id] = open(path, "w")
+                writers[group_id] = JobsYmlWriter(files[group_id])
+            writers[group_id].write_job(yaml_key, job_dict)
+        for writer in writers.values():
+            writer.close()
+    finally:
+        for file in files.values():
+            file.close()
+    return [file.name for file in files.values()]
 
 
 def escape_curly_braces(yaml_str: str) -> str:
@@ -1,10 +1,17 @@
-from beartype.typing import List, Optional
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import copy_context
+
+from beartype.typing import Deque, Iterable, Iterator, List, Optional
 from loguru import logger
 
 from dbt_jobs_as_code.client import DBTCloud
 from dbt_jobs_as_code.loader.load import load_job_configuration
 from dbt_jobs_as_code.schemas.job import JobDefinition
 
+# the number of env vars overwrites fetched in parallel when importing jobs
+ENV_VARS_WORKERS = 8
+
 
 def get_account_id(config_files: Optional[List[str]], account_id: Optional[int]) -> int:
     """Get account ID from either config file or direct input"""
@@ -43,3 +50,43 @@ def fetch_jobs(
     if job_ids:
         cloud_jobs = [job for job in cloud_jobs if job.id in job_ids]
     return cloud_jobs
+
+
+def _add_env_vars(dbt_cloud: DBTCloud, cloud_job: JobDefinition) -> JobDefinition:
+    logger.info(f"Getting env vars overwrites for job {cloud_job.id}:{cloud_job.name}")
+    env_vars = dbt_cloud.get_env_vars(
+        project_id=cloud_job.project_id,
+        job_id=cloud_job.id,  # type: ignore # in that case, we have an ID as we are importing
+    )
+    for env_var in env_vars.values():
+        if env_var.value:
+            cloud_job.custom_environment_variables.append(env_var)
+    return cloud_job
+
+
+def iter_jobs_with_env_vars(
+    dbt_cloud: DBTCloud, cloud_jobs: Iterable[JobDefinition], workers: int = ENV_VARS_WORKERS
+) -> Iterator[JobDefinition]:
+    """Add their env vars overwrites to the jobs, fetching them in parallel.
+
+    The jobs are yielded in order as soon as their env vars are fetched, so that they can be
+    exported while the env vars of the next jobs are still being fetched. Only a few jobs ahead
+    of the one yielded are fetched at a time.
+    """
+    jobs = iter(cloud_jobs)
+    pending: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        try:
+            for cloud_job in jobs:
+                # the threads get a copy of the current context to nest their spans
+                pending.append(
+                    pool.submit(copy_context().run, _add_env_vars, dbt_cloud, cloud_job)
+                )
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # when the export stops early, the env vars not being fetched yet are not needed
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,154 @@
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from beartype.typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+from dbt_jobs_as_code.instrumentation.memory import get_memory_profile
+from dbt_jobs_as_code.instrumentation.telemetry import (
+    SpanData,
+    get_telemetry,
+    telemetry_span,
+)
+
+if TYPE_CHECKING:
+    import rich.table
+
+# The names of the spans currently open, from the outermost one
+_span_path: ContextVar[Tuple[str, ...]] = ContextVar("span_path", default=())
+_timings: Optional["Timings"] = None
+
+
+@dataclass
+class PhaseTiming:
+    path: Tuple[str, ...]
+    calls: int = 0
+    total_seconds: float = 0.0
+
+
+class Timings:
+    """The time spent in each phase, aggregated by the path of nested spans leading to it.
+
+    Phases are kept in the order in which they first started, so that a phase is listed after
+    the phase containing it.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[Tuple[str, ...], PhaseTiming] = {}
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def start(self, path: Tuple[str, ...]) -> None:
+        if path not in self.phases:
+            with self._lock:
+                self.phases.setdefault(path, PhaseTiming(path=path))
+
+    def record(self, path: Tuple[str, ...], seconds: float) -> None:
+        with self._lock:
+            phase = self.phases.setdefault(path, PhaseTiming(path=path))
+            phase.calls += 1
+            phase.total_seconds += seconds
+
+    def to_json(self) -> dict:
+        return {
+            "total_ms": round(self.elapsed_seconds() * 1000, 3),
+            "phases": [
+                {
+                    "phase": "/".join(phase.path),
+                    "calls": phase.calls,
+                    "total_ms": round(phase.total_seconds * 1000, 3),
+                }
+                for phase in self.phases.values()
+            ],
+        }
+
+    def to_table(self) -> "rich.table.Table":
+        """Return a table of the phases, indented according to their nesting."""
+        from rich.table import Table
+
+        table = Table(title=f"Timings - total {self.elapsed_seconds() * 1000:.1f} ms")
+        table.add_column("Phase", style="cyan", no_wrap=True)
+        table.add_column("Calls", justify="right")
+        table.add_column("Total (ms)", justify="right", style="green")
+
+        for phase in self.phases.values():
+            table.add_row(
+                "  " * (len(phase.path) - 1) + phase.path[-1],
+                str(phase.calls),
+                f"{phase.total_seconds * 1000:.1f}",
+            )
+        return table
+
+
+def start_timings() -> Timings:
+    """Start recording the time spent in spans, replacing any previous recording."""
+    global _timings
+    _timings = Timings()
+    return _timings
+
+
+def stop_timings() -> Optional[Timings]:
+    """Stop recording the spans and return what was recorded."""
+    global _timings
+    timings, _timings = _timings, None
+    return timings
+
+
+def get_timings() -> Optional[Timings]:
+    """Return the timings currently recording, if any."""
+    return _timings
+
+
+def merge_timings(phases: List[PhaseTiming]) -> None:
+    """Add phases timed in another process, nested under the spans currently open."""
+    timings = _timings
+    if timings is None:
+        return
+    prefix = _span_path.get()
+    for phase in phases:
+        path = prefix + phase.path
+        timings.start(path)
+        with timings._lock:
+            timings.phases[path].calls += phase.calls
+            timings.phases[path].total_seconds += phase.total_seconds
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[SpanData]]:
+    """Time the code in the block as the phase `name`, nested under the spans currently open.
+
+    When a memory profile is started, the memory allocated in the block is measured as well.
+    When telemetry is started, the block is also recorded as a span with the given attributes,
+    and that span is yielded. This is a no-op unless `start_timings`, `start_memory_profile` or
+    `start_telemetry` has been called.
+    """
+    timings = _timings
+    memory_profile = get_memory_profile()
+    if timings is None and memory_profile is None and get_telemetry() is None:
+        yield None
+        return
+
+    with telemetry_span(name, **attributes) as current:
+        if timings is None and memory_profile is None:
+            yield current
+            return
+
+        path = _span_path.get() + (name,)
+        if timings is not None:
+            timings.start(path)
+        memory_token = memory_profile.start(path) if memory_profile is not None else None
+        token = _span_path.set(path)
+        started_at = time.perf_counter()
+        try:
+            yield current
+        finally:
+            if timings is not None:
+                timings.record(path, time.perf_counter() - started_at)
+            if memory_profile is not None:
+                memory_profile.record(path, memory_token)
+            _span_path.reset(token)
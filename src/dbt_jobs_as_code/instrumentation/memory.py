@@ -0,0 +1,151 @@
+import threading
+import tracemalloc
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+
+from beartype.typing import TYPE_CHECKING, Dict, Optional, Tuple
+
+if TYPE_CHECKING:
+    import rich.table
+
+_memory_profile: Optional["MemoryProfile"] = None
+# The innermost phase currently profiled
+_current_frame: ContextVar[Optional["_Frame"]] = ContextVar("memory_frame", default=None)
+
+
+@dataclass
+class _Frame:
+    start_bytes: int
+    peak_bytes: int
+    parent: Optional["_Frame"]
+
+
+@dataclass
+class PhaseMemory:
+    """The memory allocated during a phase.
+
+    `peak_bytes` is the highest memory in use during one call of the phase, above the memory in
+    use when it started. `retained_bytes` is the memory still in use at the end of the calls.
+    """
+
+    path: Tuple[str, ...]
+    calls: int = 0
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+
+
+def _mb(size: int) -> float:
+    return round(size / 1024 / 1024, 3)
+
+
+class MemoryProfile:
+    """The peak of memory allocated in each phase, measured with tracemalloc.
+
+    tracemalloc only has one peak for the whole process, so it is reset at the start and end of
+    each phase and folded into the phase containing it. Phases running in parallel threads are
+    measured together.
+    """
+
+    def __init__(self) -> None:
+        self.phases: Dict[Tuple[str, ...], PhaseMemory] = {}
+        self._started_tracemalloc = not tracemalloc.is_tracing()
+        if self._started_tracemalloc:
+            tracemalloc.start()
+        self._start_bytes = tracemalloc.get_traced_memory()[0]
+        self._peak_bytes = self._start_bytes
+        self._lock = threading.Lock()
+
+    def _fold_peak(self, frame: Optional[_Frame]) -> Tuple[int, int]:
+        """Report the peak since the last reset to `frame` and to the overall peak."""
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        if frame is not None:
+            frame.peak_bytes = max(frame.peak_bytes, peak)
+        self._peak_bytes = max(self._peak_bytes, peak)
+        return current, peak
+
+    def start(self, path: Tuple[str, ...]) -> Token:
+        with self._lock:
+            self.phases.setdefault(path, PhaseMemory(path=path))
+            parent = _current_frame.get()
+            current, _ = self._fold_peak(parent)
+        return _current_frame.set(_Frame(start_bytes=current, peak_bytes=current, parent=parent))
+
+    def record(self, path: Tuple[str, ...], token: Token) -> None:
+        frame = _current_frame.get()
+        _current_frame.reset(token)
+        if frame is None:
+            return
+        with self._lock:
+            current, _ = self._fold_peak(frame)
+            if frame.parent is not None:
+                frame.parent.peak_bytes = max(frame.parent.peak_bytes, frame.peak_bytes)
+            phase = self.phases.setdefault(path, PhaseMemory(path=path))
+            phase.calls += 1
+            phase.peak_bytes = max(phase.peak_bytes, frame.peak_bytes - frame.start_bytes)
+            phase.retained_bytes += current - frame.start_bytes
+
+    def peak_bytes(self) -> int:
+        """The highest memory allocated since the profile started."""
+        with self._lock:
+            self._fold_peak(_current_frame.get())
+            return self._peak_bytes - self._start_bytes
+
+    def stop(self) -> None:
+        self.peak_bytes()
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+
+    def to_json(self) -> dict:
+        return {
+            "peak_mb": _mb(self.peak_bytes()),
+            "phases": [
+                {
+                    "phase": "/".join(phase.path),
+                    "calls": phase.calls,
+                    "peak_mb": _mb(phase.peak_bytes),
+                    "retained_mb": _mb(phase.retained_bytes),
+                }
+                for phase in self.phases.values()
+            ],
+        }
+
+    def to_table(self) -> "rich.table.Table":
+        """Return a table of the phases, indented according to their nesting."""
+        from rich.table import Table
+
+        table = Table(title=f"Memory - peak {_mb(self.peak_bytes()):.1f} MB")
+        table.add_column("Phase", style="cyan", no_wrap=True)
+        table.add_column("Calls", justify="right")
+        table.add_column("Peak (MB)", justify="right", style="green")
+        table.add_column("Retained (MB)", justify="right")
+
+        for phase in self.phases.values():
+            table.add_row(
+                "  " * (len(phase.path) - 1) + phase.path[-1],
+                str(phase.calls),
+                f"{_mb(phase.peak_bytes):.1f}",
+                f"{_mb(phase.retained_bytes):.1f}",
+            )
+        return table
+
+
+def start_memory_profile() -> MemoryProfile:
+    """Start measuring the memory allocated in spans, replacing any previous profile."""
+    global _memory_profile
+    stop_memory_profile()
+    _memory_profile = MemoryProfile()
+    return _memory_profile
+
+
+def stop_memory_profile() -> Optional[MemoryProfile]:
+    """Stop measuring the memory and return the profile."""
+    global _memory_profile
+    memory_profile, _memory_profile = _memory_profile, None
+    if memory_profile is not None:
+        memory_profile.stop()
+    return memory_profile
+
+
+def get_memory_profile() -> Optional[MemoryProfile]:
+    return _memory_profile
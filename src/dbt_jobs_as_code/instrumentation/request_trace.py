@@ -0,0 +1,133 @@
+import json
+import math
+import threading
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from io import TextIOBase
+
+from beartype.typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import rich.table
+
+_request_trace: Optional["RequestTrace"] = None
+
+
+@dataclass
+class RequestRecord:
+    """A request sent to dbt Cloud.
+
+    `endpoint` is the URL template of the endpoint, without the IDs, so that requests can be
+    grouped by endpoint. `status` is None when no response was received.
+    """
+
+    method: str
+    endpoint: str
+    status: Optional[int]
+    bytes: int
+    latency_ms: float
+    started_at: str
+
+
+def _percentile(sorted_values: List[float], percentile: int) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    rank = max(1, math.ceil(percentile / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class RequestTrace:
+    """Keep the requests sent to dbt Cloud and optionally write them to a JSON Lines file."""
+
+    def __init__(self, trace_file: Optional[str] = None) -> None:
+        self.records: List[RequestRecord] = []
+        self._lock = threading.Lock()
+        self._file: Optional[TextIOBase] = open(trace_file, "w") if trace_file else None
+
+    def record(self, record: RequestRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+            if self._file is not None:
+                self._file.write(json.dumps(asdict(record)) + "\n")
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def summary(self) -> List[dict]:
+        """Return the number of requests and their latency percentiles for each endpoint."""
+        by_endpoint: Dict[Tuple[str, str], List[RequestRecord]] = defaultdict(list)
+        with self._lock:
+            for record in self.records:
+                by_endpoint[(record.method, record.endpoint)].append(record)
+
+        summary = []
+        for (method, endpoint), records in sorted(by_endpoint.items()):
+            latencies = sorted(record.latency_ms for record in records)
+            summary.append(
+                {
+                    "method": method,
+                    "endpoint": endpoint,
+                    "count": len(records),
+                    "errors": sum(1 for r in records if r.status is None or r.status >= 400),
+                    "bytes": sum(record.bytes for record in records),
+                    "total_ms": round(sum(latencies), 3),
+                    "p50_ms": round(_percentile(latencies, 50), 3),
+                    "p95_ms": round(_percentile(latencies, 95), 3),
+                    "p99_ms": round(_percentile(latencies, 99), 3),
+                }
+            )
+        return summary
+
+    def to_table(self) -> "rich.table.Table":
+        from rich.table import Table
+
+        table = Table(title="dbt Cloud requests")
+        table.add_column("Method", style="cyan")
+        table.add_column("Endpoint", style="magenta")
+        for column in ["Count", "Errors", "KB", "p50 (ms)", "p95 (ms)", "p99 (ms)"]:
+            table.add_column(column, justify="right")
+
+        for endpoint in self.summary():
+            table.add_row(
+                endpoint["method"],
+                endpoint["endpoint"],
+                str(endpoint["count"]),
+                str(endpoint["errors"]),
+                f"{endpoint['bytes'] / 1024:.1f}",
+                f"{endpoint['p50_ms']:.1f}",
+                f"{endpoint['p95_ms']:.1f}",
+                f"{endpoint['p99_ms']:.1f}",
+            )
+        return table
+
+
+def start_request_trace(trace_file: Optional[str] = None) -> RequestTrace:
+    """Start recording the requests sent to dbt Cloud, replacing any previous recording."""
+    global _request_trace
+    stop_request_trace()
+    _request_trace = RequestTrace(trace_file)
+    return _request_trace
+
+
+def stop_request_trace() -> Optional[RequestTrace]:
+    """Stop recording the requests, close the trace file and return what was recorded."""
+    global _request_trace
+    request_trace, _request_trace = _request_trace, None
+    if request_trace is not None:
+        request_trace.close()
+    return request_trace
+
+
+def get_request_trace() -> Optional[RequestTrace]:
+    """Return the request trace currently recording, if any."""
+    return _request_trace
+
+
+def record_request(record: RequestRecord) -> None:
+    """Record a request if a trace has been started."""
+    request_trace = _request_trace
+    if request_trace is not None:
+        request_trace.record(record)
@@ -0,0 +1,244 @@
+import json
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from importlib.metadata import version
+
+from beartype.typing import Any, Dict, Iterator, List, Optional, Tuple
+from loguru import logger
+
+SCOPE_NAME = "dbt_jobs_as_code"
+
+# OTLP enums
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_CLIENT = 3
+STATUS_CODE_ERROR = 2
+AGGREGATION_TEMPORALITY_CUMULATIVE = 2
+
+_telemetry: Optional["Telemetry"] = None
+_current_span: ContextVar[Optional["SpanData"]] = ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [
+        {"key": key, "value": _otlp_value(value)}
+        for key, value in attributes.items()
+        if value is not None
+    ]
+
+
+@dataclass
+class SpanData:
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str]
+    start_time_ns: int
+    end_time_ns: Optional[int] = None
+    kind: int = SPAN_KIND_INTERNAL
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def to_otlp(self) -> Dict[str, Any]:
+        otlp_span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time_ns),
+            "endTimeUnixNano": str(self.end_time_ns or self.start_time_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {},
+        }
+        if self.parent_span_id:
+            otlp_span["parentSpanId"] = self.parent_span_id
+        if self.error:
+            otlp_span["status"] = {"code": STATUS_CODE_ERROR, "message": self.error}
+        return otlp_span
+
+
+class Telemetry:
+    """Collect spans and counters for a run and export them in the OTLP JSON format.
+
+    `target` is either the URL of an OTLP/HTTP collector, like `http://localhost:4318`, or the
+    path of a file to which the OTLP JSON payloads are appended, one per line.
+    """
+
+    def __init__(self, target: str) -> None:
+        self.target = target
+        self.trace_id = secrets.token_hex(16)
+        self.start_time_ns = time.time_ns()
+        self.spans: List[SpanData] = []
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, Any], ...]], int] = {}
+        self._lock = threading.Lock()
+
+    def start_span(self, name: str, kind: int, attributes: Dict[str, Any]) -> SpanData:
+        parent = _current_span.get()
+        return SpanData(
+            name=name,
+            trace_id=self.trace_id,
+            span_id=secrets.token_hex(8),
+            parent_span_id=parent.span_id if parent else None,
+            start_time_ns=time.time_ns(),
+            kind=kind,
+            attributes=dict(attributes),
+        )
+
+    def end_span(self, span: SpanData) -> None:
+        span.end_time_ns = time.time_ns()
+        with self._lock:
+            self.spans.append(span)
+
+    def add(self, name: str, value: int, attributes: Dict[str, Any]) -> None:
+        key = (name, tuple(sorted(attributes.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def _resource(self) -> Dict[str, Any]:
+        return {
+            "attributes": _otlp_attributes(
+                {
+                    "service.name": "dbt-jobs-as-code",
+                    "service.version": version("dbt-jobs-as-code"),
+                }
+            )
+        }
+
+    def traces_payload(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = [span.to_otlp() for span in self.spans]
+        return {
+            "resourceSpans": [
+                {
+                    "resource": self._resource(),
+                    "scopeSpans": [{"scope": {"name": SCOPE_NAME}, "spans": spans}],
+                }
+            ]
+        }
+
+    def metrics_payload(self) -> Dict[str, Any]:
+        now_ns = str(time.time_ns())
+        data_points: Dict[str, List[Dict[str, Any]]] = {}
+        with self._lock:
+            for (name, attributes), value in sorted(self.counters.items()):
+                data_points.setdefault(name, []).append(
+                    {
+                        "attributes": _otlp_attributes(dict(attributes)),
+                        "startTimeUnixNano": str(self.start_time_ns),
+                        "timeUnixNano": now_ns,
+                        "asInt": str(value),
+                    }
+                )
+        metrics = [
+            {
+                "name": name,
+                "unit": "1",
+                "sum": {
+                    "aggregationTemporality": AGGREGATION_TEMPORALITY_CUMULATIVE,
+                    "isMonotonic": True,
+                    "dataPoints": points,
+                },
+            }
+            for name, points in data_points.items()
+        ]
+        return {
+            "resourceMetrics": [
+                {
+                    "resource": self._resource(),
+                    "scopeMetrics": [{"scope": {"name": SCOPE_NAME}, "metrics": metrics}],
+                }
+            ]
+        }
+
+    def export(self) -> None:
+        """Send the spans and counters to the target. Errors are logged but not raised."""
+        payloads = {"traces": self.traces_payload(), "metrics": self.metrics_payload()}
+        try:
+            if self.target.startswith(("http://", "https://")):
+                import requests
+
+                for signal, payload in payloads.items():
+                    response = requests.post(
+                        f"{self.target.rstrip('/')}/v1/{signal}",
+                        data=json.dumps(payload),
+                        headers={"Content-Type": "application/json"},
+                        timeout=10,
+                    )
+                    if response.status_code >= 400:
+                        logger.warning(
+                            f"The collector returned HTTP {response.status_code} for the {signal}"
+                        )
+            else:
+                with open(self.target, "a") as f:
+                    for payload in payloads.values():
+                        f.write(json.dumps(payload) + "\n")
+        except Exception as e:
+            logger.warning(f"Error exporting the telemetry to {self.target}: {e}")
+
+
+def start_telemetry(target: str) -> Telemetry:
+    """Start collecting spans and counters, to export them to `target` when stopped."""
+    global _telemetry
+    _telemetry = Telemetry(target)
+    return _telemetry
+
+
+def stop_telemetry() -> Optional[Telemetry]:
+    """Stop collecting spans and counters and export them."""
+    global _telemetry
+    telemetry, _telemetry = _telemetry, None
+    if telemetry is not None:
+        telemetry.export()
+    return telemetry
+
+
+def get_telemetry() -> Optional[Telemetry]:
+    return _telemetry
+
+
+@contextmanager
+def telemetry_span(
+    name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any
+) -> Iterator[Optional[SpanData]]:
+    """Record the block as a span, nested under the current span, if telemetry is started.
+
+    The span is yielded so that attributes only known at the end can be added to it.
+    """
+    telemetry = _telemetry
+    if telemetry is None:
+        yield None
+        return
+
+    current = telemetry.start_span(name, kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        telemetry.end_span(current)
+
+
+def add_to_counter(name: str, value: int = 1, **attributes: Any) -> None:
+    """Increment the counter `name` for the given attributes, if telemetry is started."""
+    telemetry = _telemetry
+    if telemetry is not None:
+        telemetry.add(name, value, attributes)
@@ -2,11 +2,10 @@ import glob
 import os
 
 from beartype.typing import List, Optional, Set
-from jinja2 import Environment, StrictUndefined, meta
-from jinja2.exceptions import UndefinedError
 from loguru import logger
 from ruamel.yaml import YAML
 
+from dbt_jobs_as_code.instrumentation import span
 from dbt_jobs_as_code.schemas.config import Config
 
 
@@ -19,6 +18,11 @@ def load_job_configuration(config_files: List[str], vars_file: Optional[List[str
 
     Can be a non-templated YAML or a templated one for which we need to replace Jinja values
     """
+    with span("load_job_configuration"):
+        return _load_job_configuration(config_files, vars_file)
+
+
+def _load_job_configuration(config_files: List[str], vars_file: Optional[List[str]]) -> Config:
     if vars_file:
         config = _load_yaml_with_template(config_files, vars_file)
     else:
@@ -45,7 +49,8 @@ def load_job_configuration(config_files: List[str], vars_file: Optional[List[str
     for identifier, job in config.get("jobs", {}).items():
         job["identifier"] = identifier
 
-    return Config(**config)
+    with span("validate_jobs"):
+        return Config(**config)
 
 
 def _validate_job_identifiers(jobs: dict) -> None:
@@ -82,8 +87,9 @@ def _load_yaml_no_template(config_files: List[str]) -> dict:
                     f"{config_file} is a templated YAML file. Please remove the variables {jinja_vars} or provide the variables values."
                 )
 
-            yaml = YAML(typ="safe")
-            config = yaml.load(config_string)
+            with span("parse_yaml"):
+                yaml = YAML(typ="safe")
+                config = yaml.load(config_string)
             if config:
                 # Merge the jobs from each file into combined_config
                 if "jobs" in config and config["jobs"] is not None and config["jobs"] != {}:
@@ -137,7 +143,11 @@ def _load_vars_files(vars_file: List[str]) -> dict:
 def _load_yaml_with_template(config_files: List[str], vars_file: List[str]) -> dict:
     """Load a job YAML file into a Config object"""
     # Load and merge vars files
-    template_vars_values = _load_vars_files(vars_file)
+    with span("load_vars_files"):
+        template_vars_values = _load_vars_files(vars_file)
+
+    from jinja2 import Environment, StrictUndefined
+    from jinja2.exceptions import UndefinedError
 
     # Load and combine config files
     combined_config = {}
@@ -146,17 +156,19 @@ def _load_yaml_with_template(config_files: List[str], vars_file: List[str]) -> d
     for config_path in config_files:
         with open(config_path) as f:
             config_string_unrendered = f.read()
-            template = env.from_string(config_string_unrendered)
 
-            try:
-                config_string_rendered = template.render(template_vars_values)
-            except UndefinedError as e:
-                raise LoadingJobsYAMLError(
-                    f"Some variables didn't have a value: {e.message}."
-                ) from e
+            with span("render_jinja"):
+                template = env.from_string(config_string_unrendered)
+                try:
+                    config_string_rendered = template.render(template_vars_values)
+                except UndefinedError as e:
+                    raise LoadingJobsYAMLError(
+                        f"Some variables didn't have a value: {e.message}."
+                    ) from e
 
-            yaml = YAML(typ="safe")
-            config = yaml.load(config_string_rendered)
+            with span("parse_yaml"):
+                yaml = YAML(typ="safe")
+                config = yaml.load(config_string_rendered)
             if config:
                 # Merge the jobs from each file
                 if "jobs" in config and config["jobs"] is not None:
@@ -173,6 +185,12 @@ def _load_yaml_with_template(config_files: List[str], vars_file: List[str]) -> d
 
 def _get_jinja_variables(input: str) -> Set[str]:
     """Get the variables from a Jinja template"""
+    # most YAML files are not templated, so we don't import Jinja for them
+    if "{{" not in input and "{%" not in input:
+        return set()
+
+    from jinja2 import Environment, meta
+
     env = Environment()
     parsed_input = env.parse(input)
     return meta.find_undeclared_variables(parsed_input)
@@ -220,14 +238,15 @@ def resolve_file_paths(
     if not config_pattern:
         return [], []
 
-    config_files = _resolve_pattern(config_pattern)
-    if not config_files:
-        raise LoadingJobsYAMLError(f"No files found matching pattern: {config_pattern}")
+    with span("resolve_config_files"):
+        config_files = _resolve_pattern(config_pattern)
+        if not config_files:
+            raise LoadingJobsYAMLError(f"No files found matching pattern: {config_pattern}")
 
-    vars_files = []
-    if vars_pattern:
-        vars_files = _resolve_pattern(vars_pattern)
-        if not vars_files:
-            raise LoadingJobsYAMLError(f"No files found matching pattern: {vars_pattern}")
+        vars_files = []
+        if vars_pattern:
+            vars_files = _resolve_pattern(vars_pattern)
+            if not vars_files:
+                raise LoadingJobsYAMLError(f"No files found matching pattern: {vars_pattern}")
 
     return config_files, vars_files
@@ -1,23 +1,16 @@
 import json
 import os
 import sys
+from contextlib import contextmanager
 from importlib.metadata import version
 from pathlib import Path
-from typing import List
 
 import click
+from beartype.typing import Iterator, List, Optional, Tuple
 from loguru import logger
-from rich.console import Console
-from ruamel.yaml import YAML
-
-from dbt_jobs_as_code.client import DBTCloud
-from dbt_jobs_as_code.cloud_yaml_mapping.change_set import build_change_set, json_serializer_type
-from dbt_jobs_as_code.cloud_yaml_mapping.validate_link import can_be_linked
-from dbt_jobs_as_code.exporter.export import export_jobs_yml
-from dbt_jobs_as_code.importer import check_job_fields, fetch_jobs, get_account_id
-from dbt_jobs_as_code.loader.load import load_job_configuration, resolve_file_paths
-from dbt_jobs_as_code.schemas.config import generate_config_schema
-from dbt_jobs_as_code.schemas.job import filter_jobs_by_import_filter
+
+# The subcommands import what they need when they run, so that `--help`, `--version` or
+# `validate` don't pay for importing the dbt Cloud client, the diffing code or rich.
 
 VERSION = version("dbt-jobs-as-code")
 
@@ -73,6 +66,303 @@ option_exclude_identifiers_matching = click.option(
     help="Exclude jobs from dbt Cloud if their identifiers match this regex pattern.",
 )
 
+option_cloud_cache = click.option(
+    "--cloud-cache",
+    type=str,
+    envvar="DBT_JOBS_AS_CODE_CLOUD_CACHE",
+    show_envvar=True,
+    help="[Optional] Path to a local snapshot of the dbt Cloud jobs, updated in place at each run. `plan` only downloads the jobs updated since the previous run, and lists all the jobs every 10 runs to find the deleted ones. `sync` lists all the jobs.",
+)
+
+option_timings = click.option(
+    "--timings",
+    "show_timings",
+    is_flag=True,
+    help="Print the time spent in each phase of the command and a summary of the requests sent to dbt Cloud. With --json, the timings are added under the `timings` key.",
+)
+
+option_request_trace = click.option(
+    "--request-trace",
+    type=str,
+    help="[Optional] Path to a JSON Lines file where each request sent to dbt Cloud is recorded, with its endpoint, status, size and latency.",
+)
+
+option_otel_export = click.option(
+    "--otel-export",
+    type=str,
+    envvar="DBT_JOBS_AS_CODE_OTEL_EXPORT",
+    show_envvar=True,
+    help="[Optional] Export OpenTelemetry spans and metrics for the command, in the OTLP JSON format. Either the URL of an OTLP/HTTP collector, like http://localhost:4318, or the path of a file to append them to.",
+)
+
+option_profile_memory = click.option(
+    "--profile-memory",
+    is_flag=True,
+    help="Print the peak memory allocated in each phase of the command, measured with tracemalloc. This slows down the command. With --json, the profile is added under the `memory` key.",
+)
+
+option_account_credentials = click.option(
+    "--account-credentials",
+    type=str,
+    envvar="DBT_ACCOUNT_CREDENTIALS",
+    help="[Optional] YML file mapping each dbt Cloud account to the environment variable with its API key and to its base URL, for YML files with jobs in several accounts. Accounts not in the file use DBT_API_KEY_<account_id> and DBT_BASE_URL_<account_id>, or DBT_API_KEY and DBT_BASE_URL.",
+)
+option_shard_by = click.option(
+    "--shard-by",
+    type=click.Choice(["project", "environment"]),
+    help="Compare each project or environment separately, in parallel worker processes. Projects or environments linked by job completion triggers, or by a job moved between them, are compared together.",
+)
+option_report = click.option(
+    "--report",
+    type=click.Choice(["quiet", "summary", "full", "json"]),
+    help="How the comparison of each job is reported: `quiet` reports nothing, `summary` only the number of jobs identical, different, new and deleted, `full` each job with its differences, on stderr with --json, and `json` each job as a line of JSON on stderr. Defaults to `full`, or `quiet` with --json.",
+)
+option_apply_workers = click.option(
+    "--apply-workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="[Optional] Number of changes applied in parallel, among the changes that don't depend on each other. Ignored with --fail-fast.",
+)
+option_shard_workers = click.option(
+    "--shard-workers",
+    type=click.IntRange(min=1),
+    help="[Optional] Number of worker processes used with --shard-by. Defaults to the number of CPUs.",
+)
+
+
+@contextmanager
+def _instrument_command(
+    command: str,
+    show_timings: bool,
+    output_json: bool = False,
+    request_trace_file: Optional[str] = None,
+    otel_export: Optional[str] = None,
+    profile_memory: bool = False,
+) -> Iterator[None]:
+    """Record the time spent in each phase of the command when `--timings` is used.
+
+    The requests sent to dbt Cloud are recorded as well, and written to `request_trace_file`
+    when provided. With `profile_memory`, the memory allocated in each phase is measured. Unless
+    the output is JSON, the timings, the summary of the requests and the memory profile are
+    printed when the command ends, even if it fails. With `otel_export`, the command, its phases
+    and its requests are exported as OpenTelemetry spans when it ends.
+    """
+    if not show_timings and not request_trace_file and not otel_export and not profile_memory:
+        yield
+        return
+
+    from contextlib import nullcontext
+
+    from dbt_jobs_as_code.instrumentation import start_timings, stop_timings
+    from dbt_jobs_as_code.instrumentation.memory import (
+        start_memory_profile,
+        stop_memory_profile,
+    )
+    from dbt_jobs_as_code.instrumentation.request_trace import (
+        start_request_trace,
+        stop_request_trace,
+    )
+    from dbt_jobs_as_code.instrumentation.telemetry import (
+        start_telemetry,
+        stop_telemetry,
+        telemetry_span,
+    )
+
+    timings = start_timings() if show_timings else None
+    request_trace = start_request_trace(request_trace_file)
+    memory_profile = start_memory_profile() if profile_memory else None
+    if otel_export:
+        start_telemetry(otel_export)
+    try:
+        with (
+            telemetry_span(f"dbt-jobs-as-code {command}", command=command)
+            if otel_export
+            else nullcontext()
+        ):
+            yield
+    finally:
+        stop_request_trace()
+        stop_telemetry()
+        stop_timings()
+        stop_memory_profile()
+        if not output_json and (timings is not None or memory_profile is not None):
+            from rich.console import Console
+
+            console = Console(stderr=True)
+            if timings is not None:
+                console.print(timings.to_table())
+                if request_trace.records:
+                    console.print(request_trace.to_table())
+            if memory_profile is not None:
+                console.print(memory_profile.to_table())
+
+
+def _instrumentation_json() -> dict:
+    """The timings, with the summary of the requests sent so far, and the memory profile."""
+    from dbt_jobs_as_code.instrumentation import get_timings
+    from dbt_jobs_as_code.instrumentation.memory import get_memory_profile
+    from dbt_jobs_as_code.instrumentation.request_trace import get_request_trace
+
+    output = {}
+    timings = get_timings()
+    if timings is not None:
+        request_trace = get_request_trace()
+        output["timings"] = {
+            **timings.to_json(),
+            "requests": request_trace.summary() if request_trace is not None else [],
+        }
+    memory_profile = get_memory_profile()
+    if memory_profile is not None:
+        output["memory"] = memory_profile.to_json()
+    return output
+
+
+def _collect_shard_results(results, command: str, output_json: bool) -> dict:
+    """Merge the results of the shards, logging the changes of each shard as it completes.
+
+    The changes are ordered by shard, whatever the order in which the shards completed.
+    """
+    from rich.console import Console
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import changes_json_table
+    from dbt_jobs_as_code.instrumentation import span
+
+    collected = []
+    for result in results:
+        collected.append(result)
+        if output_json:
+            continue
+        if result.error is not None:
+            logger.error(f"-- {command} -- {result.name} failed: {result.error}")
+        else:
+            logger.info(
+                "-- {command} -- {count} changes detected in {name}.",
+                command=command,
+                count=result.change_count,
+                name=result.name,
+            )
+
+    merged = {
+        "plan": {"job_changes": [], "env_var_overwrite_changes": []},
+        "applied": {"job_changes": [], "env_var_overwrite_changes": []},
+        "apply_success": True,
+        "shards": [],
+    }
+    for result in sorted(collected, key=lambda result: result.index):
+        for key in ["job_changes", "env_var_overwrite_changes"]:
+            merged["plan"][key].extend(result.plan_json[key])
+            merged["applied"][key].extend(result.applied_json[key])
+        merged["apply_success"] = merged["apply_success"] and result.apply_success
+        merged["shards"].append(
+            {
+                "name": result.name,
+                "changes": result.change_count,
+                "apply_success": result.apply_success,
+                "error": result.error,
+            }
+        )
+
+    if not output_json and any(result.change_count for result in collected):
+        with span("render_table"):
+            Console().log(changes_json_table(merged["plan"]))
+    return merged
+
+
+def _resume_change_set(
+    journal: Optional[str], disable_ssl_verification: bool, account_credentials: Optional[str]
+):
+    """Return the changes left to apply from the journal, or None if there is none."""
+    if not journal:
+        return None
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import _load_credentials_mapping
+    from dbt_jobs_as_code.cloud_yaml_mapping.journal import JournalError, resume_change_set
+
+    try:
+        return resume_change_set(
+            journal, disable_ssl_verification, _load_credentials_mapping(account_credentials)
+        )
+    except (OSError, JournalError, KeyError, ValueError) as e:
+        logger.error(f"Error resuming the sync from the journal {journal}: {e}")
+        sys.exit(1)
+
+
+def _stream_plan_jsonl(
+    config: str,
+    vars_yml: Optional[str],
+    disable_ssl_verification: bool,
+    project_ids: List[int],
+    environment_ids: List[int],
+    limit_projects_envs_to_yml: bool,
+    exclude_identifiers_matching: Optional[str],
+    cloud_cache: Optional[str],
+    snapshot: Optional[str],
+    account_credentials: Optional[str],
+    shard_by: Optional[str],
+    shard_workers: Optional[int],
+) -> None:
+    """Print each change of the plan as a line of JSON, as soon as it is determined.
+
+    With --shard-by, the changes of a shard are printed when the shard completes.
+    """
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        iter_change_set,
+        json_serializer_type,
+    )
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshotError
+
+    def changes() -> Iterator[dict]:
+        if not shard_by:
+            for change in iter_change_set(
+                config,
+                vars_yml,
+                disable_ssl_verification,
+                project_ids,
+                environment_ids,
+                limit_projects_envs_to_yml,
+                exclude_identifiers_matching,
+                output_json=True,
+                cloud_cache=cloud_cache,
+                snapshot=snapshot,
+                account_credentials=account_credentials,
+            ):
+                yield change.to_json()
+            return
+
+        from dbt_jobs_as_code.cloud_yaml_mapping.shards import run_sharded
+
+        for result in run_sharded(
+            config,
+            vars_yml,
+            disable_ssl_verification,
+            project_ids,
+            environment_ids,
+            limit_projects_envs_to_yml,
+            exclude_identifiers_matching,
+            shard_by=shard_by,
+            workers=shard_workers,
+            apply=False,
+            output_json=True,
+            account_credentials=account_credentials,
+        ):
+            if result.error is not None:
+                logger.error(f"-- PLAN -- {result.name} failed: {result.error}")
+                shard_errors.append(result.name)
+            yield from result.plan_json["job_changes"]
+            yield from result.plan_json["env_var_overwrite_changes"]
+
+    shard_errors: List[str] = []
+    try:
+        for change in changes():
+            print(json.dumps(change, default=json_serializer_type), flush=True)
+    except CloudSnapshotError as e:
+        logger.error(f"Error planning against the snapshot {snapshot}: {e}")
+        sys.exit(1)
+    if shard_errors:
+        logger.error("-- PLAN -- Some shards could not be compared. Check the logs.")
+        sys.exit(1)
+
 
 @click.group(
     help=f"dbt-jobs-as-code {VERSION}\n\nA CLI to allow defining dbt Cloud jobs as code",
@@ -92,11 +382,36 @@ def cli() -> None:
 @option_limit_projects_envs_to_yml
 @option_json_output
 @option_exclude_identifiers_matching
+@option_cloud_cache
+@option_timings
+@option_request_trace
+@option_otel_export
+@option_profile_memory
 @click.option(
     "--fail-fast",
     is_flag=True,
     help="Stop subsequent operations if any step fails during sync.",
 )
+@option_apply_workers
+@click.option(
+    "--bounded-memory",
+    is_flag=True,
+    help="Compare and sync one project at a time, or one environment with --shard-by environment, releasing the data of each before the next one, to limit the memory used for large accounts.",
+)
+@option_shard_by
+@option_shard_workers
+@option_account_credentials
+@option_report
+@click.option(
+    "--resume",
+    type=str,
+    help="[Optional] Path to a journal file recording each change applied. If the file contains a sync that didn't complete, only the changes left are applied, after checking that the jobs of the changes already applied are unchanged, and CONFIG is not compared with dbt Cloud again. Otherwise, a new sync is run and recorded in the file.",
+)
+@click.option(
+    "--rollback-artifact",
+    type=str,
+    help="[Optional] Path to a file where the state in dbt Cloud of the jobs and env var overwrites about to be changed is saved before applying the changes, to restore them with the `rollback` command.",
+)
 def sync(
     config: str,
     vars_yml,
@@ -105,14 +420,42 @@ def sync(
     limit_projects_envs_to_yml,
     disable_ssl_verification,
     output_json: bool,
-    exclude_identifiers_matching: str,
+    exclude_identifiers_matching: Optional[str],
+    cloud_cache: Optional[str],
+    show_timings: bool,
+    request_trace: Optional[str],
+    otel_export: Optional[str],
+    profile_memory: bool,
     fail_fast: bool,
+    apply_workers: int,
+    bounded_memory: bool,
+    shard_by: Optional[str],
+    shard_workers: Optional[int],
+    account_credentials: Optional[str],
+    report: Optional[str],
+    resume: Optional[str],
+    rollback_artifact: Optional[str],
 ):
     """Synchronize a dbt Cloud job config file against dbt Cloud.
     This command will update dbt Cloud with the changes in the local YML file. It is recommended to run a `plan` first to see what will be changed.
 
     CONFIG is the path to your YML jobs config file (also supports glob patterns for those files or a directory).
     """
+    from rich.console import Console
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        build_change_set,
+        json_serializer_type,
+    )
+    from dbt_jobs_as_code.cloud_yaml_mapping.reporter import report_mode
+    from dbt_jobs_as_code.cloud_yaml_mapping.shards import iter_change_set_shards, run_sharded
+    from dbt_jobs_as_code.instrumentation import span
+    from dbt_jobs_as_code.snapshot.rollback import (
+        RollbackArtifactError,
+        record_created,
+        save_rollback_artifact,
+    )
+
     cloud_project_ids = []
     cloud_environment_ids = []
 
@@ -122,50 +465,231 @@ def sync(
         )
         sys.exit(1)
 
+    if (bounded_memory or shard_by) and cloud_cache:
+        logger.error("You cannot use --bounded-memory or --shard-by with --cloud-cache.")
+        sys.exit(1)
+
+    if (bounded_memory or shard_by) and (resume or rollback_artifact):
+        logger.error(
+            "You cannot use --bounded-memory or --shard-by with --resume or --rollback-artifact."
+        )
+        sys.exit(1)
+
+    click.get_current_context().with_resource(report_mode(report))
+    click.get_current_context().with_resource(
+        _instrument_command(
+            "sync",
+            show_timings,
+            output_json,
+            request_trace,
+            otel_export,
+            profile_memory=profile_memory,
+        )
+    )
+
     if project_id:
         cloud_project_ids = list(project_id)
 
     if environment_id:
         cloud_environment_ids = list(environment_id)
 
+    if shard_by and not bounded_memory:
+        logger.info("-- SYNC -- Invoking run_sharded")
+        merged = _collect_shard_results(
+            run_sharded(
+                config,
+                vars_yml,
+                disable_ssl_verification,
+                cloud_project_ids,
+                cloud_environment_ids,
+                limit_projects_envs_to_yml,
+                exclude_identifiers_matching,
+                shard_by=shard_by,
+                workers=shard_workers,
+                apply=True,
+                fail_fast=fail_fast,
+                output_json=output_json,
+                account_credentials=account_credentials,
+                apply_workers=apply_workers,
+            ),
+            "SYNC",
+            output_json,
+        )
+        if output_json:
+            output = {
+                **merged["plan"],
+                "applied": merged["applied"],
+                "apply_success": merged["apply_success"],
+                "shards": merged["shards"],
+                **_instrumentation_json(),
+            }
+            print(json.dumps(output, default=json_serializer_type))
+        elif not any(shard["changes"] for shard in merged["shards"]):
+            logger.success("-- SYNC -- No changes detected.")
+        if not merged["apply_success"]:
+            logger.error("-- SYNC -- There were some errors during the sync. Check the logs.")
+            sys.exit(1)
+        return
+
     logger.info("-- SYNC -- Invoking build_change_set")
-    change_set = build_change_set(
-        config,
-        vars_yml,
-        disable_ssl_verification,
-        cloud_project_ids,
-        cloud_environment_ids,
-        limit_projects_envs_to_yml,
-        exclude_identifiers_matching,
-        output_json=output_json,
-    )
-    plan_json = (
-        change_set.to_json()
-        if len(change_set) > 0
-        else {"job_changes": [], "env_var_overwrite_changes": []}
+    resumed = False
+    if bounded_memory:
+        shards = iter_change_set_shards(
+            config,
+            vars_yml,
+            disable_ssl_verification,
+            cloud_project_ids,
+            cloud_environment_ids,
+            limit_projects_envs_to_yml,
+            exclude_identifiers_matching,
+            output_json=output_json,
+            shard_by=shard_by or "project",
+            account_credentials=account_credentials,
+        )
+    else:
+        change_set = _resume_change_set(resume, disable_ssl_verification, account_credentials)
+        if change_set is not None:
+            # the rollback artifact was saved before the sync being resumed was interrupted
+            resumed = True
+        else:
+            change_set = build_change_set(
+                config,
+                vars_yml,
+                disable_ssl_verification,
+                cloud_project_ids,
+                cloud_environment_ids,
+                limit_projects_envs_to_yml,
+                exclude_identifiers_matching,
+                output_json=output_json,
+                cloud_cache=cloud_cache,
+                account_credentials=account_credentials,
+                for_sync=True,
+            )
+            if resume:
+                from dbt_jobs_as_code.cloud_yaml_mapping.journal import ApplyJournal
+
+                change_set.journal = ApplyJournal(resume)
+        shards = [(None, change_set)]
+
+    plan_json = {"job_changes": [], "env_var_overwrite_changes": []}
+    applied_json = {"job_changes": [], "env_var_overwrite_changes": []}
+    apply_success = True
+    change_count = 0
+    for shard_name, change_set in shards:
+        if len(change_set) > 0:
+            change_count += len(change_set)
+            if output_json:
+                for key, changes in change_set.to_json().items():
+                    plan_json[key].extend(changes)
+            else:
+                logger.info(
+                    "-- SYNC -- {count} changes detected{shard}.",
+                    count=len(change_set),
+                    shard=f" in {shard_name}" if shard_name else "",
+                )
+                with span("render_table"):
+                    console = Console()
+                    console.log(change_set.to_table())
+
+            if rollback_artifact and not resumed:
+                try:
+                    save_rollback_artifact(rollback_artifact, change_set)
+                except (OSError, RollbackArtifactError) as e:
+                    logger.error(f"Error saving the rollback artifact {rollback_artifact}: {e}")
+                    sys.exit(1)
+            change_set.apply(fail_fast=fail_fast, workers=apply_workers)
+            if rollback_artifact:
+                record_created(rollback_artifact, change_set)
+            if output_json:
+                for key, changes in change_set.to_applied_json().items():
+                    applied_json[key].extend(changes)
+            apply_success = apply_success and change_set.apply_success
+        # drop the change set before computing the next one
+        del change_set
+        if fail_fast and not apply_success:
+            break
+
+    if change_count == 0 and not output_json:
+        logger.success("-- SYNC -- No changes detected.")
+
+    if output_json:
+        output = {
+            **plan_json,
+            "applied": applied_json,
+            "apply_success": apply_success,
+            **_instrumentation_json(),
+        }
+        print(json.dumps(output, default=json_serializer_type))
+
+    if not apply_success:
+        logger.error("-- SYNC -- There were some errors during the sync. Check the logs.")
+        sys.exit(1)
+
+
+@cli.command()
+@option_disable_ssl_verification
+@click.argument("artifact", type=str)
+@option_json_output
+@option_account_credentials
+@click.option("--dry-run", is_flag=True, help="In dry run mode we don't update dbt Cloud.")
+@click.option(
+    "--fail-fast",
+    is_flag=True,
+    help="Stop subsequent operations if any step fails during the rollback.",
+)
+@option_apply_workers
+def rollback(
+    artifact: str,
+    disable_ssl_verification: bool,
+    output_json: bool,
+    account_credentials: Optional[str],
+    dry_run: bool,
+    fail_fast: bool,
+    apply_workers: int,
+):
+    """Restore the jobs and env var overwrites changed by a `sync` run with --rollback-artifact.
+
+    The jobs updated and deleted are restored, the jobs created are deleted, and so are their
+    env var overwrites.
+
+    ARTIFACT is the path of the file saved by `sync --rollback-artifact`.
+    """
+    from rich.console import Console
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        _load_credentials_mapping,
+        json_serializer_type,
     )
+    from dbt_jobs_as_code.snapshot.rollback import RollbackArtifactError, rollback_change_set
 
-    if len(change_set) == 0:
-        if not output_json:
-            logger.success("-- SYNC -- No changes detected.")
-    else:
-        if not output_json:
-            logger.info("-- SYNC -- {count} changes detected.", count=len(change_set))
-            console = Console()
-            console.log(change_set.to_table())
+    try:
+        change_set = rollback_change_set(
+            artifact, disable_ssl_verification, _load_credentials_mapping(account_credentials)
+        )
+    except RollbackArtifactError as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+    if not output_json:
+        if len(change_set) == 0:
+            logger.success("-- ROLLBACK -- Nothing to restore.")
+            return
+        logger.info("-- ROLLBACK -- {count} changes to restore.", count=len(change_set))
+        Console().log(change_set.to_table())
 
-    change_set.apply(fail_fast=fail_fast)
+    if not dry_run:
+        change_set.apply(fail_fast=fail_fast, workers=apply_workers)
 
     if output_json:
         output = {
-            **plan_json,
+            **change_set.to_json(),
             "applied": change_set.to_applied_json(),
             "apply_success": change_set.apply_success,
         }
         print(json.dumps(output, default=json_serializer_type))
 
     if not change_set.apply_success:
-        logger.error("-- SYNC -- There were some errors during the sync. Check the logs.")
+        logger.error("-- ROLLBACK -- There were some errors during the rollback. Check the logs.")
         sys.exit(1)
 
 
@@ -178,21 +702,62 @@ def sync(
 @option_limit_projects_envs_to_yml
 @option_json_output
 @option_exclude_identifiers_matching
+@option_cloud_cache
+@click.option(
+    "--snapshot",
+    type=str,
+    help="[Optional] Path to a snapshot file created with the `snapshot` command. The plan is computed against this file, without connecting to dbt Cloud.",
+)
+@option_timings
+@option_request_trace
+@option_otel_export
+@option_profile_memory
+@option_shard_by
+@option_shard_workers
+@option_account_credentials
+@option_report
+@click.option(
+    "--jsonl",
+    "output_jsonl",
+    is_flag=True,
+    help="Print each change as a JSON object on its own line as soon as it is determined, instead of all the changes at the end.",
+)
 def plan(
     config: str,
-    vars_yml: str,
-    project_id: List[int],
-    environment_id: List[int],
+    vars_yml: Optional[str],
+    project_id: Tuple[int, ...],
+    environment_id: Tuple[int, ...],
     limit_projects_envs_to_yml: bool,
     disable_ssl_verification: bool,
     output_json: bool,
-    exclude_identifiers_matching: str,
+    exclude_identifiers_matching: Optional[str],
+    cloud_cache: Optional[str],
+    snapshot: Optional[str],
+    show_timings: bool,
+    request_trace: Optional[str],
+    otel_export: Optional[str],
+    profile_memory: bool,
+    shard_by: Optional[str],
+    shard_workers: Optional[int],
+    account_credentials: Optional[str],
+    report: Optional[str],
+    output_jsonl: bool,
 ):
     """Check the difference between a local file and dbt Cloud without updating dbt Cloud.
     This command will not update dbt Cloud.
 
     CONFIG is the path to your YML jobs config file (also supports glob patterns for those files or a directory).
     """
+    from rich.console import Console
+
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        build_change_set,
+        json_serializer_type,
+    )
+    from dbt_jobs_as_code.cloud_yaml_mapping.reporter import report_mode
+    from dbt_jobs_as_code.instrumentation import span
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshotError
+
     cloud_project_ids = []
     cloud_environment_ids = []
 
@@ -202,46 +767,363 @@ def plan(
         )
         sys.exit(1)
 
+    if snapshot and cloud_cache:
+        logger.error("You cannot use --snapshot with --cloud-cache.")
+        sys.exit(1)
+
+    if shard_by and (snapshot or cloud_cache):
+        logger.error("You cannot use --shard-by with --snapshot or --cloud-cache.")
+        sys.exit(1)
+
+    if output_json and output_jsonl:
+        logger.error("You cannot use --json with --jsonl.")
+        sys.exit(1)
+
+    click.get_current_context().with_resource(report_mode(report))
+    click.get_current_context().with_resource(
+        _instrument_command(
+            "plan",
+            show_timings,
+            output_json,
+            request_trace,
+            otel_export,
+            profile_memory=profile_memory,
+        )
+    )
+
     if project_id:
         cloud_project_ids = list(project_id)
 
     if environment_id:
         cloud_environment_ids = list(environment_id)
 
-    change_set = build_change_set(
-        config,
-        vars_yml,
-        disable_ssl_verification,
-        cloud_project_ids,
-        cloud_environment_ids,
-        limit_projects_envs_to_yml,
-        exclude_identifiers_matching,
-        output_json=output_json,
-    )
-    if len(change_set) == 0:
+    if output_jsonl:
+        _stream_plan_jsonl(
+            config,
+            vars_yml,
+            disable_ssl_verification,
+            cloud_project_ids,
+            cloud_environment_ids,
+            limit_projects_envs_to_yml,
+            exclude_identifiers_matching,
+            cloud_cache,
+            snapshot,
+            account_credentials,
+            shard_by,
+            shard_workers,
+        )
+        return
+
+    if shard_by:
+        from dbt_jobs_as_code.cloud_yaml_mapping.shards import run_sharded
+
+        merged = _collect_shard_results(
+            run_sharded(
+                config,
+                vars_yml,
+                disable_ssl_verification,
+                cloud_project_ids,
+                cloud_environment_ids,
+                limit_projects_envs_to_yml,
+                exclude_identifiers_matching,
+                shard_by=shard_by,
+                workers=shard_workers,
+                apply=False,
+                output_json=output_json,
+                account_credentials=account_credentials,
+            ),
+            "PLAN",
+            output_json,
+        )
         if output_json:
-            print(json.dumps({"job_changes": [], "env_var_overwrite_changes": []}))
-        else:
+            plan_json = {**merged["plan"], "shards": merged["shards"]}
+            plan_json.update(_instrumentation_json())
+            print(json.dumps(plan_json, default=json_serializer_type))
+        elif not any(shard["changes"] for shard in merged["shards"]):
             logger.success("-- PLAN -- No changes detected.")
+        if not merged["apply_success"]:
+            logger.error("-- PLAN -- Some shards could not be compared. Check the logs.")
+            sys.exit(1)
+        return
+
+    try:
+        change_set = build_change_set(
+            config,
+            vars_yml,
+            disable_ssl_verification,
+            cloud_project_ids,
+            cloud_environment_ids,
+            limit_projects_envs_to_yml,
+            exclude_identifiers_matching,
+            output_json=output_json,
+            cloud_cache=cloud_cache,
+            snapshot=snapshot,
+            account_credentials=account_credentials,
+        )
+    except CloudSnapshotError as e:
+        logger.error(f"Error planning against the snapshot {snapshot}: {e}")
+        sys.exit(1)
+    if output_json:
+        plan_json = (
+            change_set.to_json()
+            if len(change_set) > 0
+            else {"job_changes": [], "env_var_overwrite_changes": []}
+        )
+        plan_json.update(_instrumentation_json())
+        print(json.dumps(plan_json, default=json_serializer_type))
+    elif len(change_set) == 0:
+        logger.success("-- PLAN -- No changes detected.")
     else:
-        if output_json:
-            print(json.dumps(change_set.to_json(), default=json_serializer_type))
-        else:
-            logger.info("-- PLAN -- {count} changes detected.", count=len(change_set))
+        logger.info("-- PLAN -- {count} changes detected.", count=len(change_set))
+        with span("render_table"):
             console = Console()
             console.log(change_set.to_table())
 
 
+@cli.command()
+@option_disable_ssl_verification
+@click.argument("config", type=str)
+@option_vars_yml
+@option_project_ids
+@option_environment_ids
+@option_limit_projects_envs_to_yml
+@click.option(
+    "--interval",
+    type=float,
+    default=60,
+    show_default=True,
+    help="Number of seconds between two polls of dbt Cloud.",
+)
+@click.option(
+    "--webhook-url",
+    type=str,
+    help="[Optional] URL to POST the drift events to. By default, events are printed to stdout as JSON Lines.",
+)
+@click.option(
+    "--reconcile-every",
+    type=click.IntRange(min=1),
+    default=60,
+    show_default=True,
+    help="List all the jobs every this number of polls, to find the jobs deleted from dbt Cloud. The other polls only download the jobs updated since the previous poll.",
+)
+@click.option(
+    "--max-polls",
+    type=int,
+    hidden=True,
+    help="Stop after this number of polls.",
+)
+@option_account_credentials
+def monitor(
+    config,
+    vars_yml,
+    project_id,
+    environment_id,
+    limit_projects_envs_to_yml,
+    interval,
+    webhook_url,
+    reconcile_every,
+    max_polls,
+    account_credentials,
+    disable_ssl_verification,
+):
+    """
+    Continuously monitor dbt Cloud for jobs diverging from the YML config.
+
+    The config is loaded once and dbt Cloud is polled incrementally: only the jobs updated since the previous poll are compared to the YML config.
+    The jobs deleted from dbt Cloud are found by listing all the jobs, once every --reconcile-every polls.
+    A drift event is emitted when a managed job diverges from the config, and a resolved event when it gets back in line with it.
+
+    CONFIG is the path to your YML jobs config file (also supports glob patterns for those files or a directory).
+    """
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        _dbt_cloud_client,
+        _load_credentials_mapping,
+        load_defined_jobs,
+        resolve_config_files,
+    )
+    from dbt_jobs_as_code.loader.load import LoadingJobsYAMLError
+    from dbt_jobs_as_code.monitor import DriftMonitor, json_lines_emitter, webhook_emitter
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshot
+
+    if limit_projects_envs_to_yml and (project_id or environment_id):
+        logger.error(
+            "You cannot use --limit-projects-envs-to-yml with --project-id or --environment-id. Please remove the --limit-projects-envs-to-yml flag."
+        )
+        sys.exit(1)
+
+    config_files, vars_files = resolve_config_files(config, vars_yml)
+    if not config_files:
+        logger.error(f"No files found matching pattern: {config}")
+        sys.exit(1)
+
+    try:
+        defined_jobs, cloud_project_ids, cloud_environment_ids = load_defined_jobs(
+            config_files,
+            vars_files,
+            list(project_id),
+            list(environment_id),
+            limit_projects_envs_to_yml,
+        )
+    except (LoadingJobsYAMLError, KeyError) as e:
+        logger.error(f"Error loading jobs YAML file ({type(e).__name__}): {e}")
+        sys.exit(1)
+
+    if not defined_jobs:
+        logger.error("No jobs to monitor in the YML config")
+        sys.exit(1)
+
+    account_ids = sorted({job.account_id for job in defined_jobs.values()})
+    if len(account_ids) > 1:
+        logger.error(
+            f"The jobs YAML files define jobs for the accounts {account_ids}, monitor only supports a single account."
+        )
+        sys.exit(1)
+
+    dbt_cloud = _dbt_cloud_client(
+        account_ids[0], disable_ssl_verification, _load_credentials_mapping(account_credentials)
+    )
+    drift_monitor = DriftMonitor(
+        defined_jobs=defined_jobs,
+        dbt_cloud=dbt_cloud,
+        snapshot=CloudSnapshot(
+            account_id=dbt_cloud.account_id,
+            project_ids=cloud_project_ids,
+            environment_ids=cloud_environment_ids,
+        ),
+        emit=webhook_emitter(webhook_url) if webhook_url else json_lines_emitter(),
+        reconcile_every=reconcile_every,
+    )
+
+    logger.info(f"Monitoring {len(defined_jobs)} jobs every {interval} seconds")
+    try:
+        drift_monitor.run(interval=interval, max_polls=max_polls)
+    except KeyboardInterrupt:
+        logger.info("Stopping the monitor")
+
+
+@cli.command()
+@option_disable_ssl_verification
+@click.option("--host", type=str, default="127.0.0.1", show_default=True, help="Host to bind to.")
+@click.option("--port", type=int, default=8765, show_default=True, help="Port to listen on.")
+@option_account_credentials
+def serve(host, port, account_credentials, disable_ssl_verification):
+    """
+    Run a local HTTP server to plan and sync configs without starting a new process each time.
+
+    The server exposes `POST /plan` and `POST /sync`, which take a JSON config bundle and return the same JSON as `plan --json` and `sync --json`.
+    The dbt Cloud connections and a snapshot of the jobs are kept in memory for each account, so that following requests only parse the jobs that changed.
+    The jobs of each account of a config bundle are compared with the credentials of this account.
+    """
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import _load_credentials_mapping
+    from dbt_jobs_as_code.server import JobsAsCodeServer
+
+    app = JobsAsCodeServer(
+        disable_ssl_verification=disable_ssl_verification,
+        credentials_mapping=_load_credentials_mapping(account_credentials),
+    )
+    http_server = app.make_http_server(host, port)
+    logger.info(f"Listening on http://{host}:{http_server.server_port}")
+    try:
+        http_server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping the server")
+    finally:
+        http_server.server_close()
+
+
+@cli.command()
+@option_disable_ssl_verification
+@click.argument("output", type=str)
+@click.option(
+    "--config",
+    type=str,
+    help="The path to your YML jobs config file (also supports glob patterns for those files or a directory).",
+)
+@click.option("--account-id", type=int, help="The ID of your dbt Cloud account.")
+@option_project_ids
+@option_environment_ids
+@option_account_credentials
+def snapshot(
+    output,
+    config,
+    account_id,
+    project_id,
+    environment_id,
+    account_credentials,
+    disable_ssl_verification,
+):
+    """
+    Save the dbt Cloud jobs and their env vars overwrites to a snapshot file.
+
+    The snapshot can then be used with `plan --snapshot` to plan changes without connecting to dbt Cloud.
+
+    OUTPUT is the path of the snapshot file to create, a gzipped JSON Lines file.
+
+    Either --config or --account-id must be provided to mention what Account ID to use.
+    """
+    from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+        _dbt_cloud_client,
+        _load_credentials_mapping,
+    )
+    from dbt_jobs_as_code.importer import get_account_id
+    from dbt_jobs_as_code.loader.load import resolve_file_paths
+    from dbt_jobs_as_code.snapshot.cloud_snapshot import export_snapshot
+
+    try:
+        config_files, _ = resolve_file_paths(config, None)
+        cloud_account_id = get_account_id(config_files, account_id)
+    except ValueError as e:
+        logger.error(f"Error creating the snapshot: {e}")
+        sys.exit(1)
+
+    dbt_cloud = _dbt_cloud_client(
+        cloud_account_id, disable_ssl_verification, _load_credentials_mapping(account_credentials)
+    )
+
+    job_count = export_snapshot(
+        output,
+        dbt_cloud,
+        project_ids=list(project_id),
+        environment_ids=list(environment_id),
+    )
+    logger.success(f"Saved {job_count} jobs to the snapshot {output}")
+
+
 @cli.command()
 @option_disable_ssl_verification
 @click.argument("config", type=str)
 @option_vars_yml
 @click.option("--online", is_flag=True, help="Connect to dbt Cloud to check that IDs are correct.")
-def validate(config, vars_yml, online, disable_ssl_verification):
+@option_timings
+@option_request_trace
+@option_otel_export
+@option_profile_memory
+def validate(
+    config,
+    vars_yml,
+    online,
+    disable_ssl_verification,
+    show_timings,
+    request_trace,
+    otel_export,
+    profile_memory,
+):
     """Check that the config file is valid
 
     CONFIG is the path to your YML jobs config file (also supports glob patterns for those files or a directory).
     """
+    from dbt_jobs_as_code.loader.load import load_job_configuration, resolve_file_paths
+
+    click.get_current_context().with_resource(
+        _instrument_command(
+            "validate",
+            show_timings,
+            request_trace_file=request_trace,
+            otel_export=otel_export,
+            profile_memory=profile_memory,
+        )
+    )
+
     try:
         config_files, vars_files = resolve_file_paths(config, vars_yml)
         defined_jobs = load_job_configuration(config_files, vars_files).jobs.values()
@@ -252,6 +1134,8 @@ def validate(config, vars_yml, online, disable_ssl_verification):
         if not online:
             return
 
+        from dbt_jobs_as_code.client import DBTCloud
+
         # Retrieve the list of Project IDs and Environment IDs from the config file
         config_project_ids = set([job.project_id for job in defined_jobs])
         config_environment_ids = set([job.environment_id for job in defined_jobs])
@@ -372,6 +1256,18 @@ def validate(config, vars_yml, online, disable_ssl_verification):
     type=str,
     help="Only import jobs where the identifier prefix, before `:` contains this value, is empty or is '*'.",
 )
+@click.option(
+    "--output-dir",
+    type=str,
+    help="[Optional] Write the jobs to one YML file per project (or environment with --split-by) in this directory instead of printing them.",
+)
+@click.option(
+    "--split-by",
+    type=click.Choice(["project", "environment"]),
+    default="project",
+    show_default=True,
+    help="With --output-dir, whether each file contains the jobs of a project or of an environment.",
+)
 def import_jobs(
     config,
     account_id,
@@ -384,6 +1280,8 @@ def import_jobs(
     managed_only=False,
     templated_fields=None,
     filter=None,
+    output_dir=None,
+    split_by="project",
 ):
     """
     Generate YML file for import.
@@ -393,7 +1291,22 @@ def import_jobs(
     Optional parameters: --project-id,  --environment-id, --job-id
 
     It is possible to repeat the optional parameters --job-id, --project-id, --environment-id option to import specific jobs.
+
+    With --output-dir, the jobs are written to one file per project or environment, that can be used with a glob pattern like `<output-dir>/*.yml`.
     """
+    from ruamel.yaml import YAML
+
+    from dbt_jobs_as_code.client import DBTCloud
+    from dbt_jobs_as_code.exporter.export import export_jobs_yml, export_jobs_yml_to_dir
+    from dbt_jobs_as_code.importer import (
+        check_job_fields,
+        fetch_jobs,
+        get_account_id,
+        iter_jobs_with_env_vars,
+    )
+    from dbt_jobs_as_code.loader.load import resolve_file_paths
+    from dbt_jobs_as_code.schemas.job_catalog import JobCatalog
+
     try:
         # Validate templated_fields file if provided
         if templated_fields:
@@ -421,24 +1334,24 @@ def import_jobs(
         cloud_jobs = fetch_jobs(dbt_cloud, list(job_id), list(project_id), list(environment_id))
 
         # Filter for managed jobs if requested
+        selected_jobs = JobCatalog(cloud_jobs)
         if managed_only:
-            cloud_jobs = [job for job in cloud_jobs if job.identifier is not None]
-
-        cloud_jobs = filter_jobs_by_import_filter(cloud_jobs, filter)
-
-        # Handle env vars
-        for cloud_job in cloud_jobs:
-            logger.info(f"Getting env vars overwrites for job {cloud_job.id}:{cloud_job.name}")
-            env_vars = dbt_cloud.get_env_vars(
-                project_id=cloud_job.project_id,
-                job_id=cloud_job.id,  # type: ignore # in that case, we have an ID as we are importing
+            selected_jobs = selected_jobs.managed()
+        cloud_jobs = list(selected_jobs.matching_import_filter(filter))
+
+        # Handle env vars, the jobs are exported while the env vars of the next ones are fetched
+        jobs_with_env_vars = iter_jobs_with_env_vars(dbt_cloud, cloud_jobs)
+        if output_dir:
+            files = export_jobs_yml_to_dir(
+                jobs_with_env_vars, output_dir, split_by, include_linked_id, templated_fields
             )
-            for env_var in env_vars.values():
-                if env_var.value:
-                    cloud_job.custom_environment_variables.append(env_var)
+            logger.success(
+                f"Exported {len(cloud_jobs)} jobs to {len(files)} YML files in {output_dir}"
+            )
+            return
 
         logger.success("YML file for the current dbt Cloud jobs")
-        export_jobs_yml(cloud_jobs, include_linked_id, templated_fields)
+        export_jobs_yml(jobs_with_env_vars, include_linked_id, templated_fields)
     except ValueError as e:
         logger.error(f"Error importing jobs: {e}")
         sys.exit(1)
@@ -457,6 +1370,10 @@ def link(config, project_id, environment_id, dry_run, disable_ssl_verification):
 
     The YAML file will need to contain a `linked_id` for each job that needs to be linked.
     """
+    from dbt_jobs_as_code.client import DBTCloud
+    from dbt_jobs_as_code.cloud_yaml_mapping.validate_link import can_be_linked
+    from dbt_jobs_as_code.loader.load import load_job_configuration, resolve_file_paths
+    from dbt_jobs_as_code.schemas.job_catalog import JobCatalog
 
     config_files, _ = resolve_file_paths(config, None)
     yaml_jobs = load_job_configuration(config_files, None).jobs
@@ -470,18 +1387,13 @@ def link(config, project_id, environment_id, dry_run, disable_ssl_verification):
     )
 
     # Filter jobs based on project_id and environment_id if provided
-    cloud_project_ids = list(project_id) if project_id else None
-    cloud_environment_ids = list(environment_id) if environment_id else None
+    selected_jobs = JobCatalog(yaml_jobs.values()).where(
+        project_ids=project_id, environment_ids=environment_id
+    )
 
     some_jobs_updated = False
-    for current_identifier, job_details in yaml_jobs.items():
-        # Skip if job doesn't match project_id filter
-        if cloud_project_ids and job_details.project_id not in cloud_project_ids:
-            continue
-        # Skip if job doesn't match environment_id filter
-        if cloud_environment_ids and job_details.environment_id not in cloud_environment_ids:
-            continue
-
+    for job_details in selected_jobs:
+        current_identifier = job_details.identifier
         linkable_check = can_be_linked(current_identifier, job_details, dbt_cloud)
         if not linkable_check.can_be_linked:
             logger.error(linkable_check.message)
@@ -535,6 +1447,9 @@ def unlink(
     Unlink the YML file to dbt Cloud.
     All relevant jobs get the part [[...]] removed from their name
     """
+    from dbt_jobs_as_code.client import DBTCloud
+    from dbt_jobs_as_code.loader.load import load_job_configuration, resolve_file_paths
+    from dbt_jobs_as_code.schemas.job_catalog import JobCatalog
 
     defined_jobs = None
     # we get the account id either from a parameter (e.g if the config file doesn't exist) or from the config file
@@ -564,18 +1479,15 @@ def unlink(
         disable_ssl_verification=disable_ssl_verification,
     )
     cloud_jobs = dbt_cloud.get_jobs(project_ids=project_ids, environment_ids=environment_ids)
-    selected_jobs = [job for job in cloud_jobs if job.identifier is not None]
+    selected_jobs = JobCatalog(cloud_jobs).managed()
     logger.info("Getting the jobs definition from dbt Cloud")
 
-    # Apply project_id and environment_id filters if provided
-    if project_id:
-        selected_jobs = [job for job in selected_jobs if job.project_id in project_id]
-    if environment_id:
-        selected_jobs = [job for job in selected_jobs if job.environment_id in environment_id]
-    if identifier:
-        selected_jobs = [job for job in selected_jobs if job.identifier in identifier]
+    # Apply project_id, environment_id and identifier filters if provided
+    selected_jobs = selected_jobs.where(
+        project_ids=project_id, environment_ids=environment_id, identifiers=identifier
+    )
     if defined_jobs:
-        selected_jobs = [job for job in selected_jobs if job.identifier in defined_jobs]
+        selected_jobs = selected_jobs.where(identifiers=defined_jobs.keys())
 
     for cloud_job in selected_jobs:
         current_identifier = cloud_job.identifier
@@ -623,6 +1535,9 @@ def deactivate_jobs(
     This can be useful when moving jobs from one project to another.
     When the new jobs have been created, this command can be used to deactivate the jobs from the old project.
     """
+    from dbt_jobs_as_code.client import DBTCloud
+    from dbt_jobs_as_code.loader.load import load_job_configuration
+    from dbt_jobs_as_code.schemas.job_catalog import JobCatalog
 
     # we get the account id either from a parameter (e.g if the config file doesn't exist) or from the config file
     if account_id:
@@ -641,18 +1556,10 @@ def deactivate_jobs(
     )
     cloud_jobs = dbt_cloud.get_jobs()
 
-    # First filter by job_id if provided
-    selected_cloud_jobs = cloud_jobs
-    if job_id:
-        selected_cloud_jobs = [job for job in cloud_jobs if job.id in job_id]
-
-    # Then apply project_id and environment_id filters if provided
-    if project_id:
-        selected_cloud_jobs = [job for job in selected_cloud_jobs if job.project_id in project_id]
-    if environment_id:
-        selected_cloud_jobs = [
-            job for job in selected_cloud_jobs if job.environment_id in environment_id
-        ]
+    # Filter by job_id, project_id and environment_id if provided
+    selected_cloud_jobs = JobCatalog(cloud_jobs).where(
+        job_ids=job_id, project_ids=project_id, environment_ids=environment_id
+    )
 
     for cloud_job in selected_cloud_jobs:
         if (
@@ -675,6 +1582,8 @@ def deactivate_jobs(
 
 @cli.command(hidden=True)
 def update_json_schema():
+    from dbt_jobs_as_code.schemas.config import generate_config_schema
+
     json_schema = generate_config_schema()
     Path("src/dbt_jobs_as_code/schemas/load_job_schema.json").write_text(json_schema)
 
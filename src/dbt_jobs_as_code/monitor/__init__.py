@@ -0,0 +1,234 @@
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from io import TextIOBase
+
+import requests
+from beartype.typing import Callable, Dict, List, Optional, Set
+from loguru import logger
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import json_serializer_type
+from dbt_jobs_as_code.schemas import check_job_mapping_same
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshot
+
+
+@dataclass
+class DriftEvent:
+    """A managed job diverging from its YML definition, or getting back in line with it.
+
+    - `event` is either `drift` or `resolved`
+    - `kind` is `changed` when the job is different in dbt Cloud, `missing` when the job is in
+      the YML but not in dbt Cloud and `unexpected` when a job has an identifier in dbt Cloud
+      but is not in the YML
+    """
+
+    event: str
+    kind: str
+    identifier: str
+    job_id: Optional[int] = None
+    project_id: Optional[int] = None
+    environment_id: Optional[int] = None
+    differences: Dict = field(default_factory=dict)
+    detected_at: str = field(
+        default_factory=lambda: datetime.now(timezone.utc).isoformat(timespec="seconds")
+    )
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), default=json_serializer_type)
+
+
+def json_lines_emitter(stream: TextIOBase = sys.stdout) -> Callable[[DriftEvent], None]:
+    """Write each drift event as a JSON line."""
+
+    def emit(event: DriftEvent) -> None:
+        stream.write(event.to_json() + "\n")
+        stream.flush()
+
+    return emit
+
+
+def webhook_emitter(url: str, timeout: float = 10) -> Callable[[DriftEvent], None]:
+    """POST each drift event to a webhook. Errors are logged and the monitor keeps running."""
+    session = requests.Session()
+
+    def emit(event: DriftEvent) -> None:
+        try:
+            response = session.post(
+                url,
+                data=event.to_json(),
+                headers={"Content-Type": "application/json"},
+                timeout=timeout,
+            )
+            if response.status_code >= 400:
+                logger.error(f"The webhook returned HTTP {response.status_code} for {event}")
+        except requests.RequestException as e:
+            logger.error(f"Error sending the drift event to the webhook: {e}")
+
+    return emit
+
+
+class DriftMonitor:
+    """Keep the YML jobs and a snapshot of dbt Cloud in memory and report drift between them.
+
+    Each poll refreshes the snapshot incrementally and only compares the jobs that changed in
+    dbt Cloud since the previous poll, so the cost of a poll depends on the number of jobs that
+    changed and not on the size of the account. The jobs deleted from dbt Cloud can only be seen
+    by listing all the jobs, which is done once every `reconcile_every` polls.
+
+    An event is emitted when a managed job starts diverging from the YML (or diverges
+    differently) and when it gets back in line with it.
+    """
+
+    def __init__(
+        self,
+        defined_jobs: Dict[str, JobDefinition],
+        dbt_cloud: DBTCloud,
+        snapshot: CloudSnapshot,
+        emit: Callable[[DriftEvent], None],
+        reconcile_every: int = 60,
+    ) -> None:
+        self.defined_jobs = defined_jobs
+        self.dbt_cloud = dbt_cloud
+        self.snapshot = snapshot
+        self.emit = emit
+        self.reconcile_every = reconcile_every
+        self._polls_since_reconcile = 0
+        self._managed_jobs: Dict[int, JobDefinition] = {}
+        self._job_ids_by_identifier: Dict[str, int] = {}
+        self._drift: Dict[str, str] = {}
+
+    def poll(self) -> List[DriftEvent]:
+        """Refresh the snapshot, then emit and return the drift events."""
+        self._polls_since_reconcile += 1
+        reconcile = self._polls_since_reconcile >= self.reconcile_every
+        refresh = self.snapshot.refresh(self.dbt_cloud, detect_deletions=reconcile)
+        if reconcile or refresh.full:
+            self._polls_since_reconcile = 0
+
+        if refresh.full:
+            self._managed_jobs = {}
+            self._job_ids_by_identifier = {}
+            changed_job_ids = set(self.snapshot.jobs)
+            identifiers_to_check = set(self.defined_jobs)
+        else:
+            changed_job_ids = refresh.updated_job_ids | refresh.deleted_job_ids
+            identifiers_to_check = set()
+
+        for job_id in changed_job_ids:
+            previous_job = self._managed_jobs.pop(job_id, None)
+            if previous_job is not None:
+                identifiers_to_check.add(previous_job.identifier)  # type: ignore
+                self._job_ids_by_identifier.pop(previous_job.identifier, None)  # type: ignore
+
+            if job_id not in self.snapshot.jobs:
+                continue
+            job = JobDefinition(**self.snapshot.jobs[job_id])
+            if job.identifier is not None:
+                self._managed_jobs[job_id] = job
+                self._job_ids_by_identifier[job.identifier] = job_id
+                identifiers_to_check.add(job.identifier)
+
+        events = []
+        for identifier in sorted(identifiers_to_check):
+            event = self._check_identifier(identifier)
+            if event is not None:
+                events.append(event)
+                self.emit(event)
+        return events
+
+    def run(self, interval: float, max_polls: Optional[int] = None) -> None:
+        """Poll dbt Cloud every `interval` seconds, until interrupted or `max_polls` is reached."""
+        polls = 0
+        while max_polls is None or polls < max_polls:
+            started_at = time.monotonic()
+            try:
+                events = self.poll()
+                logger.info(f"Polled dbt Cloud, {len(events)} drift events")
+            except (DBTCloudException, requests.RequestException) as e:
+                logger.error(f"Error polling dbt Cloud: {e}")
+            polls += 1
+            if max_polls is None or polls < max_polls:
+                time.sleep(max(0.0, interval - (time.monotonic() - started_at)))
+
+    def _check_identifier(self, identifier: str) -> Optional[DriftEvent]:
+        defined_job = self.defined_jobs.get(identifier)
+        cloud_job_id = self._job_ids_by_identifier.get(identifier)
+        cloud_job = self._managed_jobs.get(cloud_job_id) if cloud_job_id else None
+
+        if defined_job is None and cloud_job is None:
+            return self._resolve(identifier)
+
+        if defined_job is None:
+            return self._drifted(identifier, "unexpected", cloud_job, {})  # type: ignore
+
+        if cloud_job is None:
+            return self._drifted(identifier, "missing", defined_job, {})
+
+        is_same, diff_data = check_job_mapping_same(source_job=defined_job, dest_job=cloud_job)
+        differences = dict(diff_data.get("differences", {})) if diff_data else {}
+        env_var_differences = self._env_var_differences(defined_job, cloud_job)
+        if env_var_differences:
+            differences["env_vars"] = env_var_differences
+
+        if not differences:
+            return self._resolve(identifier, cloud_job)
+        return self._drifted(identifier, "changed", cloud_job, differences)
+
+    def _env_var_differences(
+        self, defined_job: JobDefinition, cloud_job: JobDefinition
+    ) -> Dict[str, Dict]:
+        # the env vars are only fetched for the jobs that changed since the last poll
+        self.dbt_cloud._clear_env_var_cache(cloud_job.id)
+        cloud_env_vars = self.dbt_cloud.get_env_vars(
+            project_id=cloud_job.project_id,
+            job_id=cloud_job.id,  # type: ignore
+        )
+        cloud_values = {
+            name: env_var.value for name, env_var in cloud_env_vars.items() if env_var.id
+        }
+        defined_values = {
+            env_var.name: env_var.value for env_var in defined_job.custom_environment_variables
+        }
+
+        names: Set[str] = set(cloud_values) | set(defined_values)
+        return {
+            name: {"old_value": cloud_values.get(name), "new_value": defined_values.get(name)}
+            for name in sorted(names)
+            if cloud_values.get(name) != defined_values.get(name)
+        }
+
+    def _drifted(
+        self, identifier: str, kind: str, job: JobDefinition, differences: Dict
+    ) -> Optional[DriftEvent]:
+        signature = json.dumps([kind, differences], sort_keys=True, default=json_serializer_type)
+        if self._drift.get(identifier) == signature:
+            return None
+        self._drift[identifier] = signature
+        return DriftEvent(
+            event="drift",
+            kind=kind,
+            identifier=identifier,
+            job_id=job.id,
+            project_id=job.project_id,
+            environment_id=job.environment_id,
+            differences=differences,
+        )
+
+    def _resolve(
+        self, identifier: str, job: Optional[JobDefinition] = None
+    ) -> Optional[DriftEvent]:
+        if identifier not in self._drift:
+            return None
+        kind = json.loads(self._drift.pop(identifier))[0]
+        return DriftEvent(
+            event="resolved",
+            kind=kind,
+            identifier=identifier,
+            job_id=job.id if job else None,
+            project_id=job.project_id if job else None,
+            environment_id=job.environment_id if job else None,
+        )
@@ -1,5 +1,4 @@
 from beartype.typing import Any, Dict, Optional, Tuple
-from deepdiff import DeepDiff
 
 from dbt_jobs_as_code.schemas.custom_environment_variable import (
     CustomEnvironmentVariable,
@@ -12,6 +11,8 @@ def _get_mismatched_dict_entries(
     dict_source: dict[str, Any], dict_dest: dict[str, Any]
 ) -> dict[str, Any]:
     """Returns a dict with the mismatched entries between two dicts"""
+    # deepdiff is slow to import and only needed when comparing jobs
+    from deepdiff import DeepDiff
 
     return DeepDiff(dict_source, dict_dest, ignore_order=True)
 
@@ -19,9 +20,12 @@ def _get_mismatched_dict_entries(
 def _job_to_dict(job: JobDefinition):
     dict_vals = job.model_dump(
         exclude={
-            "id",  # we want to exclude id because our YAML file will not have it
-            "custom_environment_variables",  # TODO: Add this back in. Requires extra API calls.
-            "linked_id",  # we want to exclude linked_id because dbt Cloud doesn't save it
+            "id": True,  # we want to exclude id because our YAML file will not have it
+            "custom_environment_variables": True,  # TODO: Add this back in. Requires extra API calls.
+            "linked_id": True,  # we want to exclude linked_id because dbt Cloud doesn't save it
+            # the references by identifier are compared once resolved to job IDs
+            "deferring_job_identifier": True,
+            "job_completion_trigger_condition": {"condition": {"job_identifier"}},
         }
     )
     return dict_vals
@@ -1,6 +1,6 @@
 from beartype.typing import Any, Dict, List, Literal, Optional
 from croniter import croniter
-from pydantic import BaseModel, Field, field_serializer
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, model_validator
 
 
 def set_one_of_string_integer(schema: Dict[str, Any]):
@@ -93,13 +93,27 @@ class Schedule(BaseModel):
 
 
 class Condition(BaseModel):
-    job_id: int = field_mandatory_int_allowed_as_string_in_schema
+    model_config = ConfigDict(
+        json_schema_extra={"anyOf": [{"required": ["job_id"]}, {"required": ["job_identifier"]}]}
+    )
+
+    job_id: Optional[int] = field_optional_int_allowed_as_string_in_schema
+    job_identifier: Optional[str] = Field(
+        default=None,
+        description="The identifier of the job in the YML files triggering this job, instead of its job_id. The job can be created in the same sync.",
+    )
     project_id: int = field_mandatory_int_allowed_as_string_in_schema
     statuses: List[Literal[10, 20, 30]] = Field(
         default=[10, 20, 30],
         description="The statuses that will trigger the job. 10=success 20=error 30=cancelled",
     )
 
+    @model_validator(mode="after")
+    def job_id_or_job_identifier(self):
+        if self.job_id is None and self.job_identifier is None:
+            raise ValueError("Either 'job_id' or 'job_identifier' is required")
+        return self
+
 
 class JobCompletionTriggerCondition(BaseModel):
     condition: Condition
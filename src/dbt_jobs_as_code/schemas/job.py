@@ -1,7 +1,7 @@
 import re
 from dataclasses import dataclass
 
-from beartype.typing import Any, List, Optional
+from beartype.typing import Any, Dict, List, Optional
 from pydantic import (
     BaseModel,
     ConfigDict,
@@ -22,6 +22,15 @@ from dbt_jobs_as_code.schemas.custom_environment_variable import CustomEnvironme
 
 JOB_TYPES_WITHOUT_SCHEDULE = ["ci", "merge"]
 
+# the fields not sent to dbt Cloud, the references by identifier are resolved to job IDs first
+PAYLOAD_EXCLUDE = {
+    "linked_id": True,
+    "identifier": True,
+    "custom_environment_variables": True,
+    "deferring_job_identifier": True,
+    "job_completion_trigger_condition": {"condition": {"job_identifier"}},
+}
+
 
 @dataclass
 class IdentifierInfo:
@@ -93,6 +102,10 @@ class JobDefinition(BaseModel):
     settings: Settings
     execution: Execution = Execution()
     deferring_job_definition_id: Optional[int] = field_optional_int_allowed_as_string_in_schema
+    deferring_job_identifier: Optional[str] = Field(
+        default=None,
+        description="The identifier of the job in the YML files to defer to, instead of its deferring_job_definition_id. The job can be created in the same sync.",
+    )
     deferring_environment_id: Optional[int] = field_optional_int_allowed_as_string_in_schema
     run_generate_sources: bool
     run_lint: Optional[bool] = False
@@ -206,9 +219,7 @@ class JobDefinition(BaseModel):
         # otherwise, it means that we are "unlinking" the job from the job.yml
         if self.identifier:
             payload.name = f"{self.name} [[{self.identifier}]]"
-        return payload.model_dump_json(
-            exclude={"linked_id", "identifier", "custom_environment_variables"}
-        )
+        return payload.model_dump_json(exclude=PAYLOAD_EXCLUDE)
 
     def to_load_format(self, include_linked_id: bool = False):
         """Generate a dict following our YML format to dump as YML later."""
@@ -228,11 +239,39 @@ class JobDefinition(BaseModel):
             exclude_dict["linked_id"] = True
 
         data = self.model_dump(exclude=exclude_dict)
+        # the references by identifier are only exported when they are used
+        if data["deferring_job_identifier"] is None:
+            del data["deferring_job_identifier"]
+        if data["job_completion_trigger_condition"] is not None:
+            condition = data["job_completion_trigger_condition"]["condition"]
+            if condition["job_identifier"] is None:
+                del condition["job_identifier"]
         data["custom_environment_variables"] = []
         for env_var in self.custom_environment_variables:
             data["custom_environment_variables"].append({env_var.name: env_var.value})
         return data
 
+    def job_references(self) -> List[str]:
+        """The identifiers of the jobs this job defers to or is triggered by."""
+        references = []
+        if self.deferring_job_identifier:
+            references.append(self.deferring_job_identifier)
+        if (
+            self.job_completion_trigger_condition is not None
+            and self.job_completion_trigger_condition.condition.job_identifier
+        ):
+            references.append(self.job_completion_trigger_condition.condition.job_identifier)
+        return references
+
+    def resolve_job_references(self, job_ids: Dict[str, int]) -> None:
+        """Set the IDs of the jobs referred to by identifier, when they are in `job_ids`."""
+        if self.deferring_job_identifier in job_ids:
+            self.deferring_job_definition_id = job_ids[self.deferring_job_identifier]
+        if self.job_completion_trigger_condition is not None:
+            condition = self.job_completion_trigger_condition.condition
+            if condition.job_identifier in job_ids:
+                condition.job_id = job_ids[condition.job_identifier]
+
     def to_url(self, account_url: str) -> str:
         """Generate a URL for the job in dbt Cloud."""
         return f"{account_url}/deploy/{self.account_id}/projects/{self.project_id}/jobs/{self.id}"
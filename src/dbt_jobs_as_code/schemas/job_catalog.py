@@ -0,0 +1,193 @@
+"""An in-memory catalog of jobs, indexed to filter them without scanning all the jobs."""
+
+import re
+
+from beartype.typing import AbstractSet, Any, Dict, Iterable, Iterator, List, Optional, Set
+
+from dbt_jobs_as_code.schemas.job import JobDefinition
+
+
+class _Indexes:
+    """The jobs of a catalog and the positions of the jobs in `jobs`, by value of each field."""
+
+    def __init__(self, jobs: Iterable[JobDefinition]):
+        self.jobs = list(jobs)
+        self.by_id: Dict[int, List[int]] = {}
+        self.by_identifier: Dict[str, List[int]] = {}
+        self.by_project: Dict[int, List[int]] = {}
+        self.by_environment: Dict[int, List[int]] = {}
+        self.by_import_filter: Dict[str, List[int]] = {}
+        for position, job in enumerate(self.jobs):
+            # the jobs of the YML files don't have an ID
+            job_id = getattr(job, "id", None)
+            if job_id is not None:
+                self.by_id.setdefault(job_id, []).append(position)
+            if job.identifier is not None:
+                self.by_identifier.setdefault(job.identifier, []).append(position)
+            self.by_project.setdefault(job.project_id, []).append(position)
+            self.by_environment.setdefault(job.environment_id, []).append(position)
+            import_filter = getattr(job, "_filter_import", None) or ""
+            self.by_import_filter.setdefault(import_filter, []).append(position)
+
+
+class JobCatalog:
+    """Jobs indexed by ID, identifier, project, environment and import filter.
+
+    The queries return a new catalog with the matching jobs, in the order they were added, so
+    that they can be chained. They only look up the values asked for in the indexes, the jobs
+    that don't match are not visited. The catalogs returned are views sharing the indexes of
+    the catalog they were queried from, so they are not indexed again.
+
+    Several jobs can have the same identifier in dbt Cloud, the lookups by identifier return
+    the last one, like a dict built from the jobs would.
+    """
+
+    def __init__(self, jobs: Iterable[JobDefinition]):
+        self._indexes = _Indexes(jobs)
+        # the positions of the jobs of this view in the indexes, None for all the jobs
+        self._positions: Optional[List[int]] = None
+        self._position_set: AbstractSet[int] = frozenset()
+
+    def __len__(self) -> int:
+        if self._positions is None:
+            return len(self._indexes.jobs)
+        return len(self._positions)
+
+    def __iter__(self) -> Iterator[JobDefinition]:
+        if self._positions is None:
+            return iter(self._indexes.jobs)
+        return (self._indexes.jobs[position] for position in self._positions)
+
+    def get(self, job_id: int) -> Optional[JobDefinition]:
+        positions = self._lookup(self._indexes.by_id, job_id)
+        return self._indexes.jobs[positions[-1]] if positions else None
+
+    def by_identifier(self, identifier: str) -> Optional[JobDefinition]:
+        positions = self._lookup(self._indexes.by_identifier, identifier)
+        return self._indexes.jobs[positions[-1]] if positions else None
+
+    def identifiers(self) -> AbstractSet[str]:
+        return self._last_position_by_identifier().keys()
+
+    def jobs_by_identifier(self) -> Dict[str, JobDefinition]:
+        return {
+            identifier: self._indexes.jobs[position]
+            for identifier, position in self._last_position_by_identifier().items()
+        }
+
+    def job_ids_by_identifier(self) -> Dict[str, Optional[int]]:
+        return {
+            identifier: self._indexes.jobs[position].id
+            for identifier, position in self._last_position_by_identifier().items()
+        }
+
+    def where(
+        self,
+        job_ids: Optional[Iterable[int]] = None,
+        identifiers: Optional[Iterable[str]] = None,
+        project_ids: Optional[Iterable[int]] = None,
+        environment_ids: Optional[Iterable[int]] = None,
+    ) -> "JobCatalog":
+        """The jobs matching all the criteria, each matching any of its values.
+
+        A criterion that is None or empty doesn't filter the jobs.
+        """
+        selected: Optional[Set[int]] = None
+        for index, values in (
+            (self._indexes.by_id, job_ids),
+            (self._indexes.by_identifier, identifiers),
+            (self._indexes.by_project, project_ids),
+            (self._indexes.by_environment, environment_ids),
+        ):
+            if not values:
+                continue
+            positions = {position for value in values for position in self._lookup(index, value)}
+            selected = positions if selected is None else selected & positions
+        if selected is None:
+            return self
+        return self._subset(selected)
+
+    def excluding(self, identifiers: Iterable[str]) -> "JobCatalog":
+        """The jobs without the ones with the given identifiers."""
+        excluded = {
+            position
+            for identifier in identifiers
+            for position in self._lookup(self._indexes.by_identifier, identifier)
+        }
+        if not excluded:
+            return self
+        return self._subset(
+            {position for position in self._all_positions() if position not in excluded}
+        )
+
+    def managed(self) -> "JobCatalog":
+        """The jobs with an identifier, managed by dbt-jobs-as-code."""
+        if self._positions is None:
+            return self._subset(
+                {
+                    position
+                    for positions in self._indexes.by_identifier.values()
+                    for position in positions
+                }
+            )
+        return self._subset(
+            {
+                position
+                for position in self._positions
+                if self._indexes.jobs[position].identifier is not None
+            }
+        )
+
+    def identifiers_matching(self, pattern: "re.Pattern[str]") -> List[str]:
+        """The identifiers matching the regex, each identifier is only tested once."""
+        return [identifier for identifier in self.identifiers() if pattern.search(identifier)]
+
+    def matching_import_filter(self, filter_value: Optional[str]) -> "JobCatalog":
+        """The jobs to import for the filter, see `filter_jobs_by_import_filter`.
+
+        Only the distinct import filters of the jobs are compared with `filter_value`.
+        """
+        if not filter_value:
+            return self
+        return self._subset(
+            {
+                position
+                for import_filter in self._indexes.by_import_filter
+                if not import_filter or import_filter == "*" or filter_value in import_filter
+                for position in self._lookup(self._indexes.by_import_filter, import_filter)
+            }
+        )
+
+    def _all_positions(self) -> Iterable[int]:
+        if self._positions is None:
+            return range(len(self._indexes.jobs))
+        return self._positions
+
+    def _lookup(self, index: Dict[Any, List[int]], value: Any) -> List[int]:
+        """The positions of the jobs of this view with `value` in `index`."""
+        positions = index.get(value, [])
+        if self._positions is None:
+            return positions
+        return [position for position in positions if position in self._position_set]
+
+    def _last_position_by_identifier(self) -> Dict[str, int]:
+        if self._positions is None:
+            return {
+                identifier: positions[-1]
+                for identifier, positions in self._indexes.by_identifier.items()
+            }
+        last_positions: Dict[str, int] = {}
+        for position in self._positions:
+            identifier = self._indexes.jobs[position].identifier
+            if identifier is not None:
+                last_positions[identifier] = position
+        return last_positions
+
+    def _subset(self, positions: Set[int]) -> "JobCatalog":
+        if len(positions) == len(self):
+            return self
+        subset = JobCatalog.__new__(JobCatalog)
+        subset._indexes = self._indexes
+        subset._positions = sorted(positions)
+        subset._position_set = positions
+        return subset
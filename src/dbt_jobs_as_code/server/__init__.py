@@ -0,0 +1,253 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import ExitStack
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from beartype.typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException, DBTCloudParamsException
+from dbt_jobs_as_code.client.credentials import AccountCredentialsError, get_account_credentials
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+    ChangeSet,
+    _account_filters,
+    _jobs_by_account,
+    compute_change_set,
+    json_serializer_type,
+    load_defined_jobs,
+)
+from dbt_jobs_as_code.loader.load import LoadingJobsYAMLError
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshot
+
+EMPTY_PLAN = {"job_changes": [], "env_var_overwrite_changes": []}
+
+
+class BundleError(Exception):
+    pass
+
+
+class AccountContext:
+    """The state kept between requests for a given account.
+
+    It holds a client, whose connection pool stays warm, and a snapshot of all the jobs of the
+    account which is refreshed at each request, only parsing again the jobs that changed.
+    Requests for the same account are processed one at a time, using `lock`.
+    """
+
+    def __init__(self, dbt_cloud: DBTCloud) -> None:
+        self.dbt_cloud = dbt_cloud
+        self.snapshot = CloudSnapshot(account_id=dbt_cloud.account_id)
+        self.lock = threading.Lock()
+        self._job_definitions: Dict[int, Tuple[dict, JobDefinition]] = {}
+
+    def get_jobs(self, project_ids: List[int], environment_ids: List[int]) -> List[JobDefinition]:
+        """Refresh the snapshot and return the jobs matching the filters."""
+        self.snapshot.refresh(self.dbt_cloud)
+        # env vars can have changed since the previous request
+        self.dbt_cloud.clear_env_var_cache()
+
+        jobs = []
+        for raw_job in self.snapshot.get_raw_jobs(project_ids, environment_ids):
+            # only parse again the jobs that changed since the previous request
+            cached = self._job_definitions.get(raw_job["id"])
+            if cached is None or cached[0] is not raw_job:
+                cached = (raw_job, JobDefinition(**raw_job))
+                self._job_definitions[raw_job["id"]] = cached
+            jobs.append(cached[1])
+        return jobs
+
+
+class JobsAsCodeServer:
+    """Plan and sync YML configs sent over HTTP, keeping the dbt Cloud state warm per account.
+
+    The credentials of each account are resolved like for the other commands, from
+    `credentials_mapping` or from the environment variables.
+    """
+
+    def __init__(
+        self,
+        disable_ssl_verification: bool = False,
+        credentials_mapping: Optional[Dict[int, dict]] = None,
+    ) -> None:
+        self.disable_ssl_verification = disable_ssl_verification
+        self.credentials_mapping = credentials_mapping
+        self._accounts: Dict[int, AccountContext] = {}
+        self._accounts_lock = threading.Lock()
+
+    def account_context(self, account_id: int) -> AccountContext:
+        with self._accounts_lock:
+            if account_id not in self._accounts:
+                credentials = get_account_credentials(account_id, self.credentials_mapping)
+                self._accounts[account_id] = AccountContext(
+                    DBTCloud(
+                        account_id=account_id,
+                        api_key=credentials.api_key,
+                        base_url=credentials.base_url,
+                        disable_ssl_verification=self.disable_ssl_verification,
+                    )
+                )
+            return self._accounts[account_id]
+
+    def plan(self, bundle: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the changes between the config bundle and dbt Cloud, like `plan --json`."""
+        change_set = self._run(bundle, apply=False)
+        return change_set.to_json() if len(change_set) > 0 else dict(EMPTY_PLAN)
+
+    def sync(self, bundle: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the changes between the config bundle and dbt Cloud, like `sync --json`."""
+        change_set = self._run(bundle, apply=True)
+        return {
+            **(change_set.to_json() if len(change_set) > 0 else EMPTY_PLAN),
+            "applied": change_set.to_applied_json(),
+            "apply_success": change_set.apply_success,
+        }
+
+    def _run(self, bundle: Dict[str, Any], apply: bool) -> ChangeSet:
+        """Compare the jobs of each account of the bundle with its own context.
+
+        The changes are merged in a single change set, ordered by account, each change being
+        applied with the client of its account. The locks of the accounts are taken in the
+        order of their IDs, so that concurrent requests can't wait for each other.
+        """
+        defined_jobs, project_ids, environment_ids = _load_bundle(bundle)
+        if not defined_jobs:
+            return ChangeSet()
+
+        limit_projects_envs_to_yml = bool(bundle.get("limit_projects_envs_to_yml", False))
+        change_set = ChangeSet()
+        with ExitStack() as locks:
+            for account_id, account_jobs in _jobs_by_account(defined_jobs).items():
+                context = self.account_context(account_id)
+                locks.enter_context(context.lock)
+                account_project_ids, account_environment_ids = _account_filters(
+                    account_jobs, project_ids, environment_ids, limit_projects_envs_to_yml
+                )
+                for change in compute_change_set(
+                    account_jobs,
+                    context.get_jobs(account_project_ids, account_environment_ids),
+                    context.dbt_cloud,
+                    exclude_identifiers_matching=bundle.get("exclude_identifiers_matching"),
+                    output_json=True,
+                ):
+                    change_set.append(change)
+            if apply:
+                change_set.apply(fail_fast=bool(bundle.get("fail_fast", False)))
+        return change_set
+
+    def make_http_server(self, host: str, port: int) -> ThreadingHTTPServer:
+        http_server = ThreadingHTTPServer((host, port), _RequestHandler)
+        http_server.daemon_threads = True
+        http_server.app = self  # type: ignore
+        return http_server
+
+
+def _write_files(directory: str, prefix: str, files: Any) -> List[str]:
+    """Write the content of the bundle files, ignoring their names to stay in `directory`."""
+    if files is None:
+        return []
+    if isinstance(files, str):
+        contents = [files]
+    elif isinstance(files, dict):
+        contents = [files[name] for name in sorted(files)]
+    elif isinstance(files, list):
+        contents = files
+    else:
+        raise BundleError(
+            f"'{prefix}' must be YML content, a list of them or a dict of file names"
+        )
+
+    paths = []
+    for index, content in enumerate(contents):
+        if not isinstance(content, str):
+            raise BundleError(f"The files in '{prefix}' must contain YML text")
+        path = os.path.join(directory, f"{prefix}_{index}.yml")
+        with open(path, "w") as f:
+            f.write(content)
+        paths.append(path)
+    return paths
+
+
+def _load_bundle(
+    bundle: Dict[str, Any],
+) -> Tuple[Dict[str, JobDefinition], List[int], List[int]]:
+    """Load the jobs from a config bundle.
+
+    A bundle is a JSON object with the YML files in `config` and optionally the vars files in
+    `vars`, along with the same filters as the CLI: `project_ids`, `environment_ids`,
+    `limit_projects_envs_to_yml` and `exclude_identifiers_matching`.
+    """
+    if not isinstance(bundle, dict) or "config" not in bundle:
+        raise BundleError("The request body must be a JSON object with a 'config' key")
+
+    with tempfile.TemporaryDirectory(prefix="dbt-jobs-as-code-") as tmp_dir:
+        config_files = _write_files(tmp_dir, "config", bundle["config"])
+        vars_files = _write_files(tmp_dir, "vars", bundle.get("vars"))
+        return load_defined_jobs(
+            config_files,
+            vars_files or None,
+            list(bundle.get("project_ids") or []),
+            list(bundle.get("environment_ids") or []),
+            bool(bundle.get("limit_projects_envs_to_yml", False)),
+        )
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: HTTPStatus, payload: Dict[str, Any]) -> None:
+        body = json.dumps(payload, default=json_serializer_type).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+        else:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        app: JobsAsCodeServer = self.server.app  # type: ignore
+        handlers = {"/plan": app.plan, "/sync": app.sync}
+        if self.path not in handlers:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Unknown path {self.path}"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            bundle = json.loads(self.rfile.read(length) or b"null")
+            self._send_json(HTTPStatus.OK, handlers[self.path](bundle))
+        except (
+            BundleError,
+            LoadingJobsYAMLError,
+            AccountCredentialsError,
+            KeyError,
+            ValueError,
+        ) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"{type(e).__name__}: {e}"})
+        except SystemExit:
+            # the comparison logs why the jobs of the bundle can't be compared, then exits
+            self._send_json(
+                HTTPStatus.BAD_REQUEST,
+                {
+                    "error": "The config bundle can't be compared with dbt Cloud, see the server logs"
+                },
+            )
+        except (DBTCloudException, DBTCloudParamsException, requests.RequestException) as e:
+            logger.error(f"Error calling dbt Cloud: {e}")
+            self._send_json(HTTPStatus.BAD_GATEWAY, {"error": f"{type(e).__name__}: {e}"})
+        except Exception as e:
+            logger.exception(f"Error processing {self.path}")
+            self._send_json(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"}
+            )
@@ -0,0 +1,389 @@
+import gzip
+import json
+import os
+from dataclasses import dataclass, field
+
+from beartype.typing import Dict, Iterable, List, Optional, Set
+from dateutil.parser import isoparse
+from loguru import logger
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.schemas.job import JobDefinition
+
+SNAPSHOT_FORMAT_VERSION = 1
+# the runs with a cached snapshot between two listings of all the jobs, that find the deleted jobs
+CACHE_LISTING_EVERY = 10
+
+
+class CloudSnapshotError(Exception):
+    pass
+
+
+@dataclass
+class SnapshotRefresh:
+    """What changed in a snapshot during a refresh."""
+
+    full: bool
+    updated_job_ids: Set[int] = field(default_factory=set)
+    deleted_job_ids: Set[int] = field(default_factory=set)
+
+
+def _latest_timestamp(timestamps: Iterable[Optional[str]]) -> Optional[str]:
+    existing_timestamps = [timestamp for timestamp in timestamps if timestamp]
+    if not existing_timestamps:
+        return None
+    return max(existing_timestamps, key=isoparse)
+
+
+class CloudSnapshotWriter:
+    """Stream the content of a snapshot to a gzipped JSON Lines file.
+
+    The first line is a header with the account and the filters used, followed by one line per
+    job and one line per job with env vars overwrites. The high-water mark is written last, once
+    all the jobs have been seen. The file is only moved to its final path when closed.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        account_id: int,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> None:
+        self.path = path
+        self.watermark: Optional[str] = None
+        self.runs_since_listing = 0
+        self.job_count = 0
+        self._tmp_path = f"{path}.tmp"
+        self._file = gzip.open(self._tmp_path, "wt", encoding="utf-8")
+        self._write(
+            {
+                "kind": "header",
+                "version": SNAPSHOT_FORMAT_VERSION,
+                "account_id": account_id,
+                "project_ids": sorted(set(project_ids or [])),
+                "environment_ids": sorted(set(environment_ids or [])),
+            }
+        )
+
+    def __enter__(self) -> "CloudSnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+            os.remove(self._tmp_path)
+
+    def _write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, separators=(",", ":")))
+        self._file.write("\n")
+
+    def write_jobs(self, raw_jobs: Iterable[dict]) -> None:
+        for job in raw_jobs:
+            self._write({"kind": "job", "data": job})
+            self.watermark = _latest_timestamp([self.watermark, job.get("updated_at")])
+            self.job_count += 1
+
+    def write_env_vars(self, project_id: int, job_id: int, raw_env_vars: Dict[str, dict]) -> None:
+        self._write(
+            {"kind": "env_vars", "project_id": project_id, "job_id": job_id, "data": raw_env_vars}
+        )
+
+    def close(self) -> None:
+        self._write({"kind": "watermark", "value": self.watermark})
+        if self.runs_since_listing:
+            self._write({"kind": "runs_since_listing", "value": self.runs_since_listing})
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+
+
+class CloudSnapshot:
+    """A local copy of the dbt Cloud jobs of an account, that can be refreshed incrementally.
+
+    The snapshot keeps the raw job payloads returned by the API along with a high-water mark,
+    the most recent `updated_at` seen. Refreshing it either lists all the jobs once, to also find
+    out which jobs were deleted, or only downloads the jobs updated since the high-water mark.
+
+    It can also hold the env vars overwrites of the jobs, to plan changes without calling
+    dbt Cloud at all.
+    """
+
+    def __init__(
+        self,
+        account_id: int,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> None:
+        self.account_id = account_id
+        self.project_ids = sorted(set(project_ids or []))
+        self.environment_ids = sorted(set(environment_ids or []))
+        self.watermark: Optional[str] = None
+        self.jobs: Dict[int, dict] = {}
+        self.env_vars: Dict[int, Dict[str, dict]] = {}
+        # the refreshes of a cached snapshot since all the jobs were listed
+        self.runs_since_listing = 0
+
+    def __len__(self):
+        return len(self.jobs)
+
+    def matches(
+        self,
+        account_id: int,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> bool:
+        """Check if the snapshot was taken for the given account and filters."""
+        return (
+            self.account_id == account_id
+            and self.project_ids == sorted(set(project_ids or []))
+            and self.environment_ids == sorted(set(environment_ids or []))
+        )
+
+    def covers(
+        self,
+        account_id: int,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> bool:
+        """Check if all the jobs for the given account and filters are in the snapshot."""
+        if self.account_id != account_id:
+            return False
+        if self.project_ids and not (project_ids and set(project_ids) <= set(self.project_ids)):
+            return False
+        if self.environment_ids and not (
+            environment_ids and set(environment_ids) <= set(self.environment_ids)
+        ):
+            return False
+        return True
+
+    def get_raw_jobs(
+        self,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> List[dict]:
+        """Return the raw jobs of the snapshot matching the filters."""
+        return [
+            job
+            for job in self.jobs.values()
+            if (not project_ids or job["project_id"] in project_ids)
+            and (not environment_ids or job["environment_id"] in environment_ids)
+        ]
+
+    def get_jobs(self) -> List[JobDefinition]:
+        """Return the job definitions of the jobs in the snapshot."""
+        return [JobDefinition(**job) for job in self.jobs.values()]
+
+    def refresh(self, dbt_cloud: DBTCloud, detect_deletions: bool = True) -> SnapshotRefresh:
+        """Bring the snapshot up to date with dbt Cloud.
+
+        Without a high-water mark, all the jobs are downloaded. With `detect_deletions`, all the
+        jobs are listed as well, in a single pass: the jobs that differ from the snapshot are
+        merged in place and the jobs not listed any more are dropped. Without it, only the jobs
+        updated since the high-water mark are downloaded, which is cheap but doesn't see the jobs
+        deleted from dbt Cloud.
+
+        The env vars overwrites of the updated and deleted jobs are dropped as they might be
+        outdated.
+        """
+        if dbt_cloud.account_id != self.account_id:
+            raise CloudSnapshotError(
+                f"The snapshot is for the account {self.account_id}, not {dbt_cloud.account_id}"
+            )
+
+        if self.watermark is None:
+            raw_jobs = dbt_cloud.get_raw_jobs(
+                project_ids=self.project_ids, environment_ids=self.environment_ids
+            )
+            self.jobs = {job["id"]: job for job in raw_jobs}
+            self.env_vars = {}
+            self.watermark = _latest_timestamp(job.get("updated_at") for job in raw_jobs)
+            logger.info(f"Downloaded {len(self.jobs)} jobs for the snapshot")
+            return SnapshotRefresh(full=True, updated_job_ids=set(self.jobs))
+
+        refresh = SnapshotRefresh(full=False)
+        if detect_deletions:
+            raw_jobs = dbt_cloud.get_raw_jobs(
+                project_ids=self.project_ids, environment_ids=self.environment_ids
+            )
+            refresh.deleted_job_ids = set(self.jobs) - {job["id"] for job in raw_jobs}
+            for job_id in refresh.deleted_job_ids:
+                del self.jobs[job_id]
+                self.env_vars.pop(job_id, None)
+        else:
+            raw_jobs = dbt_cloud.get_jobs_updated_since(
+                self.watermark, project_ids=self.project_ids, environment_ids=self.environment_ids
+            )
+        for job in raw_jobs:
+            # the dicts of the jobs that didn't change are kept, callers can cache their parsing
+            if self.jobs.get(job["id"]) != job:
+                refresh.updated_job_ids.add(job["id"])
+                self.env_vars.pop(job["id"], None)
+                self.jobs[job["id"]] = job
+        self.watermark = _latest_timestamp(
+            [self.watermark, *(job.get("updated_at") for job in raw_jobs)]
+        )
+
+        logger.info(
+            f"Refreshed the snapshot: {len(refresh.updated_job_ids)} updated jobs, "
+            f"{len(refresh.deleted_job_ids)} deleted jobs"
+        )
+        return refresh
+
+    def dump(self, path: str) -> None:
+        """Save the snapshot as a gzipped JSON Lines file."""
+        with CloudSnapshotWriter(
+            path, self.account_id, self.project_ids, self.environment_ids
+        ) as writer:
+            writer.write_jobs(self.jobs.values())
+            for job_id, raw_env_vars in self.env_vars.items():
+                writer.write_env_vars(self.jobs[job_id]["project_id"], job_id, raw_env_vars)
+            writer.watermark = self.watermark
+            writer.runs_since_listing = self.runs_since_listing
+
+    @classmethod
+    def load(cls, path: str) -> "CloudSnapshot":
+        """Load a snapshot saved with `dump` or with a `CloudSnapshotWriter`."""
+        snapshot = None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                record = json.loads(line)
+                if record["kind"] == "header":
+                    if record["version"] != SNAPSHOT_FORMAT_VERSION:
+                        raise CloudSnapshotError(
+                            f"Unsupported snapshot version {record['version']} in {path}"
+                        )
+                    snapshot = cls(
+                        account_id=record["account_id"],
+                        project_ids=record["project_ids"],
+                        environment_ids=record["environment_ids"],
+                    )
+                elif snapshot is None:
+                    raise CloudSnapshotError(f"The snapshot {path} doesn't start with a header")
+                elif record["kind"] == "job":
+                    snapshot.jobs[record["data"]["id"]] = record["data"]
+                elif record["kind"] == "env_vars":
+                    snapshot.env_vars[record["job_id"]] = record["data"]
+                elif record["kind"] == "watermark":
+                    snapshot.watermark = record["value"]
+                elif record["kind"] == "runs_since_listing":
+                    snapshot.runs_since_listing = record["value"]
+
+        if snapshot is None:
+            raise CloudSnapshotError(f"The snapshot {path} is empty")
+        return snapshot
+
+
+def refresh_cached_snapshot(
+    path: str,
+    dbt_cloud: DBTCloud,
+    project_ids: Optional[List[int]] = None,
+    environment_ids: Optional[List[int]] = None,
+    for_sync: bool = False,
+) -> CloudSnapshot:
+    """Load the snapshot cached at `path`, refresh it and save it back.
+
+    A new snapshot is started if the file doesn't exist, can't be read or was taken for a
+    different account or different filters.
+
+    Only the jobs updated since the previous run are downloaded, and all the jobs are listed
+    every `CACHE_LISTING_EVERY` runs to find the jobs deleted in dbt Cloud. With `for_sync`,
+    all the jobs are listed, as the changes are applied to them, and they are listed again at
+    the next run, to find the jobs deleted by the sync.
+    """
+    snapshot = None
+    if os.path.exists(path):
+        try:
+            snapshot = CloudSnapshot.load(path)
+        except (CloudSnapshotError, OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring the cached snapshot {path}: {e}")
+
+    if snapshot is None or not snapshot.matches(
+        dbt_cloud.account_id, project_ids, environment_ids
+    ):
+        snapshot = CloudSnapshot(
+            account_id=dbt_cloud.account_id,
+            project_ids=project_ids,
+            environment_ids=environment_ids,
+        )
+
+    snapshot.runs_since_listing += 1
+    list_all_jobs = for_sync or snapshot.runs_since_listing >= CACHE_LISTING_EVERY
+    refresh = snapshot.refresh(dbt_cloud, detect_deletions=list_all_jobs)
+    if for_sync:
+        snapshot.runs_since_listing = CACHE_LISTING_EVERY
+    elif list_all_jobs or refresh.full:
+        snapshot.runs_since_listing = 0
+    snapshot.dump(path)
+    return snapshot
+
+
+def export_snapshot(
+    path: str,
+    dbt_cloud: DBTCloud,
+    project_ids: Optional[List[int]] = None,
+    environment_ids: Optional[List[int]] = None,
+) -> int:
+    """Stream the jobs of an account and the env vars overwrites of its managed jobs to `path`.
+
+    Jobs are written page by page as they are downloaded, so the whole account never has to be
+    held in memory. Returns the number of jobs written.
+    """
+    managed_jobs: List[tuple[int, int]] = []
+    with CloudSnapshotWriter(path, dbt_cloud.account_id, project_ids, environment_ids) as writer:
+        for page in dbt_cloud.iter_raw_job_pages(project_ids, environment_ids):
+            writer.write_jobs(page)
+            managed_jobs.extend(
+                (job["project_id"], job["id"])
+                for job in page
+                if JobDefinition._extract_identifier_from_name(job["name"]).identifier
+            )
+
+        logger.info(f"Getting the env vars overwrites for {len(managed_jobs)} managed jobs")
+        for project_id, job_id in managed_jobs:
+            writer.write_env_vars(
+                project_id,
+                job_id,
+                dbt_cloud.get_raw_env_vars(project_id=project_id, job_id=job_id),
+            )
+
+    return writer.job_count
+
+
+class OfflineDBTCloud(DBTCloud):
+    """A dbt Cloud client reading jobs and env vars from a snapshot, without any network access.
+
+    It can be used to plan changes but raises an error when trying to apply them.
+    """
+
+    def __init__(self, snapshot: CloudSnapshot) -> None:
+        super().__init__(account_id=snapshot.account_id, api_key=None)
+        self.snapshot = snapshot
+
+    def _check_for_creds(self):
+        pass
+
+    def _offline_error(self, *args, **kwargs):
+        raise DBTCloudException("dbt Cloud can't be updated when planning from a snapshot")
+
+    create_job = update_job = delete_job = _offline_error  # type: ignore
+    create_env_var = update_env_var = delete_env_var = _offline_error  # type: ignore
+
+    def get_raw_jobs(
+        self,
+        project_ids: Optional[List[int]] = None,
+        environment_ids: Optional[List[int]] = None,
+    ) -> List[dict]:
+        if not self.snapshot.covers(self.account_id, project_ids, environment_ids):
+            raise CloudSnapshotError(
+                f"The snapshot (projects {self.snapshot.project_ids or 'all'}, environments "
+                f"{self.snapshot.environment_ids or 'all'}) doesn't contain all the jobs for "
+                f"the projects {project_ids or 'all'} and environments {environment_ids or 'all'}"
+            )
+        return self.snapshot.get_raw_jobs(project_ids, environment_ids)
+
+    def get_raw_env_vars(self, project_id: int, job_id: int) -> Dict[str, dict]:
+        if job_id not in self.snapshot.env_vars:
+            raise CloudSnapshotError(f"The env vars of the job {job_id} are not in the snapshot")
+        return self.snapshot.env_vars[job_id]
@@ -0,0 +1,311 @@
+"""Save the jobs and env var overwrites a sync is about to change, to be able to restore them.
+
+The rollback artifact is a gzipped JSON Lines file. The first line is a header, followed by one
+line per job or env var overwrite changed, with its state in dbt Cloud before the sync. The IDs
+of the jobs and env var overwrites created by the sync are appended once it is applied.
+
+Most of this state is already known from planning: the jobs updated or deleted and the env var
+overwrites changed. Only the env var overwrites of the jobs deleted are fetched.
+"""
+
+import gzip
+import json
+
+from beartype.typing import Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+    Change,
+    ChangeOperation,
+    ChangeSet,
+    _dbt_cloud_client,
+    json_serializer_type,
+)
+from dbt_jobs_as_code.instrumentation import span
+from dbt_jobs_as_code.schemas.custom_environment_variable import CustomEnvironmentVariable
+from dbt_jobs_as_code.schemas.job import JobDefinition
+
+ROLLBACK_FORMAT_VERSION = 1
+
+
+class RollbackArtifactError(Exception):
+    pass
+
+
+def _write(f, record: dict) -> None:
+    f.write(json.dumps(record, separators=(",", ":"), default=json_serializer_type))
+    f.write("\n")
+
+
+def _job_to_json(job: JobDefinition) -> dict:
+    # the env var overwrites are saved separately, and their JSON can't be loaded back
+    return job.model_dump(mode="json", exclude={"custom_environment_variables"})
+
+
+def _change_records(change: Change) -> Iterable[dict]:
+    """Return what needs to be saved to revert a change."""
+    if change.operation is None or change.dbt_cloud is None:
+        raise RollbackArtifactError(f"The change {change} has no operation and can't be saved")
+    record = {
+        "account_id": change.dbt_cloud.account_id,
+        "action": change.action.lower(),
+        "identifier": change.identifier,
+        "project_id": change.proj_id,
+        "environment_id": change.env_id,
+    }
+    if change.type == "job":
+        job = change.parameters["job"]
+        yield {
+            "kind": "job",
+            **record,
+            # the job to delete on rollback, its ID is only known once it is created
+            "job": _job_to_json(job) if change.operation == ChangeOperation.CREATE_JOB else None,
+            "previous": _job_to_json(change.previous) if change.previous else None,
+        }
+        if change.operation == ChangeOperation.DELETE_JOB:
+            # the env var overwrites of a job are deleted with it
+            env_vars = change.dbt_cloud.get_env_vars(project_id=job.project_id, job_id=job.id)
+            for name, env_var in env_vars.items():
+                if env_var.id:
+                    yield {
+                        "kind": "deleted_job_env_var",
+                        **record,
+                        "identifier": f"{change.identifier}:{name}",
+                        "job_identifier": change.identifier,
+                        "name": name,
+                        "value": env_var.value,
+                    }
+    else:
+        previous = change.previous
+        job_id = change.parameters.get("job_id") or (
+            previous.job_definition_id if previous is not None else None
+        )
+        if change.operation == ChangeOperation.UPDATE_ENV_VAR:
+            name = change.parameters["custom_env_var"].name
+        else:
+            name = change.identifier.rpartition(":")[2]
+        yield {
+            "kind": "env_var",
+            **record,
+            "job_id": job_id,
+            "name": name,
+            "previous": (
+                {"id": previous.id, "value": previous.value}
+                if previous is not None and previous.id
+                else None
+            ),
+        }
+
+
+def save_rollback_artifact(path: str, change_set: ChangeSet) -> None:
+    """Save the state in dbt Cloud of what the changes are about to modify."""
+    with span("save_rollback_artifact"), gzip.open(path, "wt", encoding="utf-8") as f:
+        _write(f, {"kind": "header", "version": ROLLBACK_FORMAT_VERSION})
+        for change in change_set:
+            for record in _change_records(change):
+                _write(f, record)
+    logger.info(f"Saved the state of the {len(change_set)} changes to {path}")
+
+
+def record_created(path: str, change_set: ChangeSet) -> None:
+    """Append the IDs of what the changes applied created, to delete them on rollback."""
+    created = [
+        change
+        for change in change_set.applied_changes
+        if change["action"].lower() == "create"
+        and (change.get("job_id") or change.get("env_var_id"))
+    ]
+    if not created:
+        return
+    with gzip.open(path, "at", encoding="utf-8") as f:
+        for change in created:
+            _write(
+                f,
+                {
+                    "kind": "created",
+                    "type": change["type"],
+                    "identifier": change["identifier"],
+                    "job_id": change.get("job_id"),
+                    "env_var_id": change.get("env_var_id"),
+                },
+            )
+
+
+def read_rollback_artifact(path: str) -> Tuple[List[dict], Dict[Tuple[str, str], dict]]:
+    """Return the records of the changes and the objects created, by type and identifier."""
+    records: List[dict] = []
+    created: Dict[Tuple[str, str], dict] = {}
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("kind") != "header" or header.get("version") != ROLLBACK_FORMAT_VERSION:
+                raise RollbackArtifactError(f"{path} is not a supported rollback artifact")
+            for line in f:
+                record = json.loads(line)
+                if record["kind"] == "created":
+                    created[(record["type"], record["identifier"])] = record
+                else:
+                    records.append(record)
+    except (OSError, EOFError, json.JSONDecodeError) as e:
+        raise RollbackArtifactError(f"Error reading the rollback artifact {path}: {e}")
+    return records, created
+
+
+def _change(record: dict, dbt_cloud: DBTCloud, **kwargs) -> Change:
+    return Change(
+        identifier=record["identifier"],
+        proj_id=record["project_id"],
+        env_id=record["environment_id"],
+        dbt_cloud=dbt_cloud,
+        **kwargs,
+    )
+
+
+def _revert_env_var(
+    record: dict, created: Dict[Tuple[str, str], dict], dbt_cloud: DBTCloud
+) -> Optional[Change]:
+    previous = record["previous"]
+    job_id = record["job_id"]
+    if previous is None:
+        # the overwrite was created by the sync
+        if job_id is None:
+            # its job was created too, and the overwrite is deleted with the job
+            return None
+        env_var_id = created.get(("env var overwrite", record["identifier"]), {}).get("env_var_id")
+        if env_var_id is None:
+            env_var = dbt_cloud.get_env_vars(project_id=record["project_id"], job_id=job_id).get(
+                record["name"]
+            )
+            env_var_id = env_var.id if env_var else None
+        if env_var_id is None:
+            return None
+        return _change(
+            record,
+            dbt_cloud,
+            type="env var overwrite",
+            action="DELETE",
+            operation=ChangeOperation.DELETE_ENV_VAR,
+            parameters={"project_id": record["project_id"], "env_var_id": env_var_id},
+        )
+    return _change(
+        record,
+        dbt_cloud,
+        type="env var overwrite",
+        action="UPDATE" if record["action"] != "delete" else "CREATE",
+        operation=ChangeOperation.UPDATE_ENV_VAR,
+        parameters={
+            "project_id": record["project_id"],
+            "job_id": job_id,
+            "custom_env_var": CustomEnvironmentVariable(
+                name=record["name"], value=previous["value"], job_definition_id=job_id
+            ),
+            # a deleted overwrite is created again
+            "env_var_id": previous["id"] if record["action"] != "delete" else None,
+        },
+        differences={"old_value": None, "new_value": previous["value"]},
+    )
+
+
+def _revert_job(
+    record: dict, created: Dict[Tuple[str, str], dict], dbt_cloud: DBTCloud
+) -> Optional[Change]:
+    if record["action"] == "update":
+        return _change(
+            record,
+            dbt_cloud,
+            type="job",
+            action="update",
+            operation=ChangeOperation.UPDATE_JOB,
+            parameters={"job": JobDefinition(**record["previous"])},
+        )
+    if record["action"] == "delete":
+        return _change(
+            record,
+            dbt_cloud,
+            type="job",
+            action="create",
+            operation=ChangeOperation.CREATE_JOB,
+            parameters={"job": JobDefinition(**{**record["previous"], "id": None})},
+        )
+    job = JobDefinition(**record["job"])
+    job.id = created.get(("job", record["identifier"]), {}).get("job_id")
+    if job.id is None:
+        # the ID is missing if the sync was interrupted, the job is looked up in its project
+        job.id = dbt_cloud.build_mapping_job_identifier_job_id(
+            dbt_cloud.get_jobs(project_ids=[record["project_id"]])
+        ).get(record["identifier"])
+    if job.id is None:
+        return None
+    return _change(
+        record,
+        dbt_cloud,
+        type="job",
+        action="delete",
+        operation=ChangeOperation.DELETE_JOB,
+        parameters={"job": job},
+    )
+
+
+def _restore_deleted_job_env_var(record: dict, dbt_cloud: DBTCloud) -> Change:
+    return _change(
+        record,
+        dbt_cloud,
+        type="env var overwrite",
+        action="CREATE",
+        operation=ChangeOperation.UPDATE_ENV_VAR,
+        parameters={
+            "project_id": record["project_id"],
+            "job_id": None,
+            "custom_env_var": CustomEnvironmentVariable(
+                name=record["name"], value=record["value"]
+            ),
+            "env_var_id": None,
+            # the ID of the job is only known once it is created again
+            "yml_job_identifier": record["job_identifier"],
+        },
+    )
+
+
+def rollback_change_set(
+    path: str,
+    disable_ssl_verification: bool,
+    credentials_mapping: Optional[Dict[int, dict]] = None,
+) -> ChangeSet:
+    """Return the changes restoring what was saved in the rollback artifact.
+
+    The env var overwrites are restored first, then the jobs, and finally the env var
+    overwrites of the jobs deleted, once those jobs are created again.
+    """
+    records, created = read_rollback_artifact(path)
+    clients: Dict[int, DBTCloud] = {}
+
+    def client(record: dict) -> DBTCloud:
+        if record["account_id"] not in clients:
+            clients[record["account_id"]] = _dbt_cloud_client(
+                record["account_id"], disable_ssl_verification, credentials_mapping
+            )
+        return clients[record["account_id"]]
+
+    env_var_changes = [
+        _revert_env_var(record, created, client(record))
+        for record in reversed(records)
+        if record["kind"] == "env_var"
+    ]
+    job_changes = [
+        _revert_job(record, created, client(record))
+        for record in reversed(records)
+        if record["kind"] == "job"
+    ]
+    restored_env_var_changes = [
+        _restore_deleted_job_env_var(record, client(record))
+        for record in records
+        if record["kind"] == "deleted_job_env_var"
+    ]
+    return ChangeSet(
+        root=[
+            change
+            for change in env_var_changes + job_changes + restored_env_var_changes
+            if change is not None
+        ]
+    )
@@ -1,7 +1,10 @@
+import threading
 from unittest.mock import Mock
 
-from dbt_jobs_as_code.client import DBTCloudException
-from dbt_jobs_as_code.cloud_yaml_mapping.change_set import Change, ChangeSet
+import pytest
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import Change, ChangeOperation, ChangeSet
 
 
 def test_change_set_to_json_empty():
@@ -368,3 +371,77 @@ def test_change_set_apply_all_success():
 
     # Verify apply_success is True
     assert change_set.apply_success is True
+
+
+@pytest.mark.parametrize(
+    "workers, fail_fast, expected", [(1, False, 1), (2, False, 2), (2, True, 1)]
+)
+def test_change_set_apply_workers(workers, fail_fast, expected):
+    """Test that ChangeSet.apply() applies the changes of a level on up to `workers` threads"""
+    change_set = ChangeSet()
+    lock = threading.Lock()
+    both_running = threading.Event()
+    running = [0]
+    max_running = [0]
+
+    def sync_function():
+        with lock:
+            running[0] += 1
+            max_running[0] = max(max_running[0], running[0])
+            if running[0] == 2:
+                both_running.set()
+        both_running.wait(0.5)
+        with lock:
+            running[0] -= 1
+
+    for identifier in ["job1", "job2"]:
+        change_set.append(
+            Change(
+                identifier=identifier,
+                type="job",
+                action="create",
+                proj_id=123,
+                env_id=456,
+                sync_function=sync_function,
+                parameters={},
+            )
+        )
+
+    change_set.apply(fail_fast=fail_fast, workers=workers)
+
+    assert change_set.apply_success is True
+    assert max_running[0] == expected
+
+
+def test_apply_dispatches_the_operation_to_the_client():
+    """Test that a change without sync_function is applied with the method of its client"""
+    dbt_cloud = Mock(spec=DBTCloud)
+    job = Mock()
+    change_set = ChangeSet()
+    change_set.append(
+        Change(
+            identifier="job1",
+            type="job",
+            action="delete",
+            proj_id=123,
+            env_id=456,
+            operation=ChangeOperation.DELETE_JOB,
+            dbt_cloud=dbt_cloud,
+            parameters={"job": job},
+        )
+    )
+
+    change_set.apply()
+
+    dbt_cloud.delete_job.assert_called_once_with(job=job)
+    assert change_set.apply_success is True
+
+
+def test_change_without_operation_cannot_be_applied():
+    """Test that a change needs an operation and a client, or a sync_function"""
+    change = Change(
+        identifier="job1", type="job", action="delete", proj_id=123, env_id=456, parameters={}
+    )
+
+    with pytest.raises(ValueError, match="DELETE Job job1"):
+        change.apply()
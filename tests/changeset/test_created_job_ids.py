@@ -0,0 +1,42 @@
+import json
+from unittest.mock import patch
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import build_change_set
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+def test_env_vars_of_a_new_job_use_the_id_of_the_job_created(tmp_path, monkeypatch):
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(3)
+        for name in ["DBT_A", "DBT_B", "DBT_C"]:
+            fake.add_project_env_var(10, name, "default")
+        yml_jobs = synthetic.yml_jobs(cloud_jobs)
+        yml_jobs["new_job"] = {
+            **yml_jobs["job_1"],
+            "name": "New job",
+            "custom_environment_variables": [{"DBT_A": "a"}, {"DBT_B": "b"}, {"DBT_C": "c"}],
+        }
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        monkeypatch.setenv("DBT_API_KEY", API_KEY)
+        monkeypatch.setenv("DBT_BASE_URL", fake.base_url)
+
+        change_set = build_change_set(str(jobs_file), None, False, [], [], output_json=True)
+        with patch.object(
+            DBTCloud,
+            "build_mapping_job_identifier_job_id",
+            side_effect=AssertionError("the jobs were listed again"),
+        ):
+            change_set.apply()
+
+        assert change_set.apply_success
+        new_job_id = max(fake.jobs)
+        assert sorted(
+            (env_var["name"], env_var["job_definition_id"])
+            for env_var in fake.env_vars.values()
+            if env_var["job_definition_id"] is not None
+        ) == [("DBT_A", new_job_id), ("DBT_B", new_job_id), ("DBT_C", new_job_id)]
@@ -0,0 +1,134 @@
+import json
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.cloud_yaml_mapping import change_set
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import ChangeExecutor
+from dbt_jobs_as_code.cloud_yaml_mapping.journal import JournalError, read_journal
+from dbt_jobs_as_code.main import cli
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+@pytest.fixture
+def interrupted_sync(tmp_path):
+    """A sync of 5 updated jobs and a new job with an env var, killed after applying 2 changes."""
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(10)
+        yml_jobs = synthetic.yml_jobs(cloud_jobs, changed_every=2)
+        fake.add_project_env_var(10, "DBT_ENV", "default")
+        yml_jobs["new_job"] = {
+            **yml_jobs["job_1"],
+            "name": "New job",
+            "custom_environment_variables": [{"DBT_ENV": "value"}],
+        }
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        journal = tmp_path / "journal.jsonl"
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+
+        execute = ChangeExecutor.execute
+        calls = []
+
+        def killed_after_two_changes(self, change):
+            calls.append(change)
+            if len(calls) == 3:
+                raise KeyboardInterrupt
+            return execute(self, change)
+
+        # the changes are applied one at a time by default, so the sync is killed at the same point
+        with patch.object(ChangeExecutor, "execute", killed_after_two_changes):
+            result = runner.invoke(cli, ["sync", "--resume", str(journal), str(jobs_file)])
+        assert result.exit_code != 0
+
+        yield runner, fake, jobs_file, journal
+
+
+def _threads(fake):
+    return sorted(job_id for job_id, job in fake.jobs.items() if job["settings"]["threads"] == 8)
+
+
+def test_journal_records_the_plan_and_the_changes_applied(interrupted_sync):
+    _, _, _, journal = interrupted_sync
+
+    plan, applied, done = read_journal(str(journal))
+
+    assert len(plan) == 7
+    assert sorted(applied) == [0, 1]
+    assert all(entry["job_id"] for entry in applied.values())
+    assert not done
+
+
+def test_resume_applies_the_changes_left_without_comparing_all_the_jobs(interrupted_sync):
+    runner, fake, jobs_file, journal = interrupted_sync
+    assert len(_threads(fake)) == 2
+
+    with patch.object(change_set, "build_change_set", side_effect=AssertionError):
+        result = runner.invoke(cli, ["sync", "--json", "--resume", str(journal), str(jobs_file)])
+
+    assert result.exit_code == 0, result.output
+    output = json.loads(result.output)
+    assert len(output["job_changes"]) == 4
+    assert output["apply_success"] is True
+    assert _threads(fake) == [2, 4, 6, 8, 10]
+    assert len(fake.jobs) == 11
+    assert [env_var["job_definition_id"] for env_var in fake.env_vars.values()] == [None, 11]
+    assert read_journal(str(journal))[2] is True
+
+    # the journal is complete, so the next sync compares the jobs again
+    result = runner.invoke(cli, ["sync", "--json", "--resume", str(journal), str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["job_changes"] == []
+
+
+def test_resume_applies_again_the_changes_reverted_in_dbt_cloud(interrupted_sync):
+    runner, fake, jobs_file, journal = interrupted_sync
+    reverted_job_id = _threads(fake)[0]
+    fake.jobs[reverted_job_id]["settings"]["threads"] = 4
+
+    result = runner.invoke(cli, ["sync", "--json", "--resume", str(journal), str(jobs_file)])
+
+    assert result.exit_code == 0, result.output
+    assert len(json.loads(result.output)["job_changes"]) == 5
+    assert _threads(fake) == [2, 4, 6, 8, 10]
+
+
+def test_invalid_journal(tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    journal.write_text('{"event": "plan", "version": 0, "changes": []}\n')
+
+    with pytest.raises(JournalError, match="version"):
+        read_journal(str(journal))
+
+    result = CliRunner().invoke(cli, ["sync", "--resume", str(journal), "jobs.yml"])
+    assert result.exit_code == 1
+
+
+def test_resume_keeps_the_jobs_referring_to_a_job_created(tmp_path):
+    """The references to jobs created by the sync are resolved before comparing with dbt Cloud"""
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(2)
+        yml_jobs = synthetic.yml_jobs(cloud_jobs)
+        yml_jobs["new_job"] = {**yml_jobs["job_2"], "name": "New job"}
+        yml_jobs["job_1"]["deferring_job_identifier"] = "new_job"
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        journal = tmp_path / "journal.jsonl"
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+
+        result = runner.invoke(cli, ["sync", "--resume", str(journal), str(jobs_file)])
+        assert result.exit_code == 0, result.output
+        # the sync is killed after applying all the changes, before recording that it's done
+        lines = journal.read_text().splitlines(keepends=True)
+        journal.write_text("".join(lines[:-1]))
+        assert sorted(read_journal(str(journal))[1]) == [0, 1]
+
+        result = runner.invoke(cli, ["sync", "--json", "--resume", str(journal), str(jobs_file)])
+
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["job_changes"] == []
+        assert len(fake.jobs) == 3
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.main import cli
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+
+@pytest.fixture
+def accounts(tmp_path):
+    """Two accounts on two fake dbt Cloud servers, with 4 jobs each and one job changed."""
+    with (
+        FakeDbtCloud(account_id=1, api_key="key-1") as first,
+        FakeDbtCloud(account_id=2, api_key="key-2") as second,
+    ):
+        first_jobs = first.seed_jobs(4)
+        # the job IDs of the second account start at 5
+        second_jobs = second.seed_jobs(8)[4:]
+        for job_id in range(1, 5):
+            del second.jobs[job_id]
+
+        yml_jobs = {
+            **synthetic.yml_jobs(first_jobs, changed_every=4),
+            **synthetic.yml_jobs(second_jobs, changed_every=4),
+        }
+        # job_5 is not in the YML and will be deleted from the second account
+        del yml_jobs["job_5"]
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+
+        credentials_file = tmp_path / "credentials.yml"
+        credentials_file.write_text(
+            f"accounts:\n  2:\n    api_key_env: SECOND_KEY\n    base_url: {second.base_url}\n"
+        )
+        runner = CliRunner(
+            env={
+                "DBT_API_KEY": "key-1",
+                "DBT_BASE_URL": first.base_url,
+                "SECOND_KEY": "key-2",
+                "DBT_ACCOUNT_CREDENTIALS": str(credentials_file),
+            }
+        )
+        yield runner, jobs_file, first, second
+
+
+def _changes(output):
+    return [(change["action"], change["identifier"]) for change in output["job_changes"]]
+
+
+def test_plan_and_sync_several_accounts(accounts):
+    runner, jobs_file, first, second = accounts
+
+    result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    # the changes are ordered by account
+    changes = _changes(json.loads(result.output))
+    assert changes[0] == ("UPDATE", "job_4")
+    assert sorted(changes[1:]) == [("DELETE", "job_5"), ("UPDATE", "job_8")]
+
+    result = runner.invoke(cli, ["sync", "--json", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["apply_success"] is True
+    assert first.jobs[4]["settings"]["threads"] == 8
+    assert second.jobs[8]["settings"]["threads"] == 8
+    assert sorted(second.jobs) == [6, 7, 8]
+
+    result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+    assert json.loads(result.output) == {"job_changes": [], "env_var_overwrite_changes": []}
+
+
+def test_sharded_plan_of_several_accounts(accounts):
+    runner, jobs_file, _, _ = accounts
+
+    result = runner.invoke(
+        cli, ["plan", "--json", "--shard-by", "project", "--shard-workers", "2", str(jobs_file)]
+    )
+
+    assert result.exit_code == 0, result.output
+    output = json.loads(result.output)
+    assert [shard["name"] for shard in output["shards"]] == [
+        "account 1 project 10",
+        "account 2 project 10",
+    ]
+    assert sorted(_changes(output)) == [
+        ("DELETE", "job_5"),
+        ("UPDATE", "job_4"),
+        ("UPDATE", "job_8"),
+    ]
+
+
+def test_missing_api_key_of_an_account(accounts):
+    runner, jobs_file, _, _ = accounts
+
+    result = runner.invoke(cli, ["plan", str(jobs_file)], env={"SECOND_KEY": None})
+
+    assert result.exit_code == 1
+
+
+def test_several_accounts_cannot_use_the_cloud_cache(accounts, tmp_path):
+    runner, jobs_file, _, _ = accounts
+
+    result = runner.invoke(
+        cli, ["plan", "--cloud-cache", str(tmp_path / "cache.jsonl.gz"), str(jobs_file)]
+    )
+
+    assert result.exit_code == 1
@@ -0,0 +1,136 @@
+import threading
+import time
+from contextlib import contextmanager
+from unittest.mock import patch
+
+import pytest
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.cloud_yaml_mapping import change_set
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import (
+    _account_id_from_files,
+    build_change_set,
+)
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+@pytest.fixture
+def fake_dbt_cloud(monkeypatch):
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        monkeypatch.setenv("DBT_API_KEY", API_KEY)
+        monkeypatch.setenv("DBT_BASE_URL", fake.base_url)
+        yield fake
+
+
+@pytest.fixture
+def jobs_file(fake_dbt_cloud, tmp_path):
+    cloud_jobs = fake_dbt_cloud.seed_jobs(20, projects=2)
+    jobs_yml, _ = synthetic.jobs_yml(cloud_jobs, "anchored", changed_every=5)
+    path = tmp_path / "jobs.yml"
+    path.write_text(jobs_yml)
+    return path
+
+
+@contextmanager
+def held_prefetch():
+    """Hold the prefetch thread before its first request until the end of the block."""
+    release = threading.Event()
+    check_for_creds = DBTCloud._check_for_creds
+
+    def held_check_for_creds(self):
+        if threading.current_thread().name == "prefetch-cloud-jobs":
+            release.wait(5)
+        check_for_creds(self)
+
+    with patch.object(DBTCloud, "_check_for_creds", held_check_for_creds):
+        try:
+            yield
+        finally:
+            release.set()
+            for thread in threading.enumerate():
+                if thread.name == "prefetch-cloud-jobs":
+                    thread.join(5)
+
+
+def _write(tmp_path, name, content):
+    path = tmp_path / name
+    path.write_text(content)
+    return str(path)
+
+
+def test_account_id_from_files(tmp_path):
+    plain = _write(tmp_path, "plain.yml", "jobs:\n  job_1:\n    account_id: 12\n")
+    quoted = _write(tmp_path, "quoted.yml", "account_id: '12'  # the account\njobs: {}\n")
+    templated = _write(
+        tmp_path, "templated.yml", "jobs:\n  a:\n    account_id: {{ account_id }}\n"
+    )
+    vars_file = _write(tmp_path, "vars.yml", "account_id: 12\n")
+    other = _write(tmp_path, "other.yml", "jobs:\n  job_2:\n    account_id: 13\n")
+
+    assert _account_id_from_files([plain, quoted]) == 12
+    assert _account_id_from_files([templated, vars_file]) == 12
+    assert _account_id_from_files([templated]) is None
+    assert _account_id_from_files([plain, other]) is None
+
+
+def test_cloud_jobs_are_listed_while_loading_the_yml(fake_dbt_cloud, jobs_file):
+    load_job_configuration = change_set.load_job_configuration
+    listed_while_loading = []
+
+    def slow_load_job_configuration(*args, **kwargs):
+        deadline = time.monotonic() + 5
+        while fake_dbt_cloud.request_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        listed_while_loading.append(fake_dbt_cloud.request_count > 0)
+        return load_job_configuration(*args, **kwargs)
+
+    with patch.object(change_set, "load_job_configuration", slow_load_job_configuration):
+        result = build_change_set(str(jobs_file), None, False, [10, 11], [], output_json=True)
+
+    assert listed_while_loading == [True]
+    assert sorted(change["identifier"] for change in result.to_json()["job_changes"]) == [
+        "job_10",
+        "job_15",
+        "job_20",
+        "job_5",
+    ]
+
+
+def test_wrong_account_guess_falls_back_to_listing_after_loading(fake_dbt_cloud, jobs_file):
+    with patch.object(change_set, "_prefetch_cloud_jobs", return_value=None):
+        build_change_set(str(jobs_file), None, False, [], [], output_json=True)
+        requests_without_prefetch = fake_dbt_cloud.request_count
+
+    with held_prefetch(), patch.object(change_set, "_account_id_from_files", return_value=99):
+        result = build_change_set(str(jobs_file), None, False, [], [], output_json=True)
+        assert fake_dbt_cloud.request_count == 2 * requests_without_prefetch
+
+    assert len(result.to_json()["job_changes"]) == 4
+    # the listing of the wrong account was cancelled before its first request
+    assert fake_dbt_cloud.request_count == 2 * requests_without_prefetch
+
+
+def test_invalid_config_sends_no_request(fake_dbt_cloud, tmp_path):
+    invalid = _write(
+        tmp_path,
+        "invalid.yml",
+        f"jobs:\n  job 1:\n    account_id: {fake_dbt_cloud.account_id}\n",
+    )
+
+    with held_prefetch(), pytest.raises(SystemExit):
+        build_change_set(invalid, None, False, [], [], output_json=True)
+
+    assert fake_dbt_cloud.request_count == 0
+
+
+def test_no_prefetch_when_limiting_to_the_yml_projects(fake_dbt_cloud, jobs_file):
+    with patch.object(change_set, "_prefetch_cloud_jobs") as prefetch:
+        result = build_change_set(
+            str(jobs_file), None, False, [], [], limit_projects_envs_to_yml=True, output_json=True
+        )
+
+    prefetch.assert_not_called()
+    assert len(result) == 4
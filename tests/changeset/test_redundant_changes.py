@@ -0,0 +1,56 @@
+import json
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import build_change_set
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+def _add_overwrite(fake, job_id, name, value):
+    fake.add_project_env_var(10, name, value).update(type="job", job_definition_id=job_id)
+
+
+def test_plan_has_no_redundant_change(tmp_path, monkeypatch):
+    """Each job and env var overwrite gets at most one change, and one sync is enough"""
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(4)
+        job_ids = {job["name"].split("[[")[1].rstrip("]"): job["id"] for job in cloud_jobs}
+        for name in ["DBT_A", "DBT_B"]:
+            fake.add_project_env_var(10, name, "default")
+        _add_overwrite(fake, job_ids["job_1"], "DBT_A", "same")
+        _add_overwrite(fake, job_ids["job_1"], "DBT_B", "old")
+        _add_overwrite(fake, job_ids["job_2"], "DBT_A", "extra")
+        _add_overwrite(fake, job_ids["job_4"], "DBT_A", "deleted with its job")
+
+        yml_jobs = synthetic.yml_jobs(cloud_jobs)
+        yml_jobs["job_1"] = {
+            **yml_jobs["job_1"],
+            "name": "Job 1 renamed",
+            "custom_environment_variables": [{"DBT_A": "same"}, {"DBT_B": "new"}],
+        }
+        yml_jobs["new_job"] = {
+            **yml_jobs["job_3"],
+            "name": "New job",
+            "custom_environment_variables": [{"DBT_A": "a"}],
+        }
+        del yml_jobs["job_4"]
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        monkeypatch.setenv("DBT_API_KEY", API_KEY)
+        monkeypatch.setenv("DBT_BASE_URL", fake.base_url)
+
+        change_set = build_change_set(str(jobs_file), None, False, [], [], output_json=True)
+        changes = sorted((change.action.lower(), change.identifier) for change in change_set)
+        assert changes == [
+            ("create", "new_job"),
+            ("create", "new_job:DBT_A"),
+            ("delete", "job_2:DBT_A"),
+            ("delete", "job_4"),
+            ("update", "job_1"),
+            ("update", "job_1:DBT_B"),
+        ]
+
+        change_set.apply()
+        assert change_set.apply_success
+        assert len(build_change_set(str(jobs_file), None, False, [], [], output_json=True)) == 0
@@ -0,0 +1,79 @@
+import pytest
+
+from dbt_jobs_as_code.client.credentials import (
+    DEFAULT_BASE_URL,
+    AccountCredentials,
+    AccountCredentialsError,
+    get_account_credentials,
+    load_credentials_mapping,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_environment(monkeypatch):
+    for name in ["DBT_API_KEY", "DBT_BASE_URL", "DBT_API_KEY_2", "DBT_BASE_URL_2"]:
+        monkeypatch.delenv(name, raising=False)
+
+
+def test_default_credentials(monkeypatch):
+    assert get_account_credentials(1) == AccountCredentials(
+        api_key=None, base_url=DEFAULT_BASE_URL
+    )
+
+    monkeypatch.setenv("DBT_API_KEY", "key")
+    monkeypatch.setenv("DBT_BASE_URL", "https://emea.dbt.com")
+    assert get_account_credentials(1) == AccountCredentials(
+        api_key="key", base_url="https://emea.dbt.com"
+    )
+
+
+def test_account_environment_variables_take_precedence(monkeypatch):
+    monkeypatch.setenv("DBT_API_KEY", "key")
+    monkeypatch.setenv("DBT_API_KEY_2", "key-2")
+    monkeypatch.setenv("DBT_BASE_URL_2", "https://au.dbt.com")
+
+    assert get_account_credentials(1).api_key == "key"
+    assert get_account_credentials(2) == AccountCredentials(
+        api_key="key-2", base_url="https://au.dbt.com"
+    )
+
+
+def test_credentials_file(monkeypatch, tmp_path):
+    credentials_file = tmp_path / "credentials.yml"
+    credentials_file.write_text(
+        "accounts:\n"
+        "  2:\n"
+        "    api_key_env: SECOND_ACCOUNT_KEY\n"
+        "    base_url: https://emea.dbt.com\n"
+        "  3:\n"
+    )
+    monkeypatch.setenv("DBT_API_KEY", "key")
+    monkeypatch.setenv("DBT_API_KEY_2", "ignored")
+    monkeypatch.setenv("SECOND_ACCOUNT_KEY", "key-2")
+
+    mapping = load_credentials_mapping(str(credentials_file))
+
+    assert mapping == {
+        2: {"api_key_env": "SECOND_ACCOUNT_KEY", "base_url": "https://emea.dbt.com"},
+        3: {},
+    }
+    assert get_account_credentials(2, mapping) == AccountCredentials(
+        api_key="key-2", base_url="https://emea.dbt.com"
+    )
+    assert get_account_credentials(3, mapping).api_key == "key"
+
+    monkeypatch.delenv("SECOND_ACCOUNT_KEY")
+    with pytest.raises(AccountCredentialsError, match="SECOND_ACCOUNT_KEY"):
+        get_account_credentials(2, mapping)
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["jobs: {}\n", "accounts:\n  2:\n    api_key: secret\n"],
+)
+def test_invalid_credentials_file(tmp_path, content):
+    credentials_file = tmp_path / "credentials.yml"
+    credentials_file.write_text(content)
+
+    with pytest.raises(AccountCredentialsError):
+        load_credentials_mapping(str(credentials_file))
@@ -0,0 +1,211 @@
+import json
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.schemas.custom_environment_variable import (
+    CustomEnvironmentVariable,
+    CustomEnvironmentVariablePayload,
+)
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+@pytest.fixture
+def fake_dbt_cloud():
+    with FakeDbtCloud(api_key=API_KEY, page_size=100) as fake:
+        yield fake
+
+
+def _client(fake):
+    return DBTCloud(account_id=fake.account_id, api_key=API_KEY, base_url=fake.base_url)
+
+
+def test_jobs_are_paginated(fake_dbt_cloud):
+    fake_dbt_cloud.seed_jobs(250, projects=2)
+    client = _client(fake_dbt_cloud)
+
+    jobs = client.get_jobs()
+    assert sorted(job.id for job in jobs) == list(range(1, 251))
+    assert fake_dbt_cloud.request_count == 3
+
+    assert {job.project_id for job in client.get_jobs(project_ids=[11])} == {11}
+    assert client.get_environments([10]) == [
+        {
+            "id": 100,
+            "account_id": synthetic.ACCOUNT_ID,
+            "project_id": 10,
+            "name": "Environment 100",
+            "type": "deployment",
+        }
+    ]
+
+
+def test_jobs_and_env_vars_can_be_managed(fake_dbt_cloud):
+    client = _client(fake_dbt_cloud)
+    job = JobDefinition(
+        identifier="new_job", **synthetic.yml_jobs([synthetic.raw_job(1)])["job_1"]
+    )
+
+    created = client.create_job(job)
+    assert created.identifier == "new_job"
+    assert client.get_job(created.id).name == "Job 1"
+
+    created.settings.threads = 16
+    client.update_job(created)
+    assert client.get_job(created.id).settings.threads == 16
+
+    fake_dbt_cloud.add_project_env_var(created.project_id, "DBT_ENV", "default")
+
+    client.update_env_var(
+        CustomEnvironmentVariable(name="DBT_ENV", value="first", job_definition_id=created.id),
+        project_id=created.project_id,
+        job_id=created.id,
+        env_var_id=None,
+    )
+    env_vars = client.get_env_vars(project_id=created.project_id, job_id=created.id)
+    assert env_vars["DBT_ENV"].value == "first"
+
+    client.delete_env_var(project_id=created.project_id, env_var_id=env_vars["DBT_ENV"].id)
+    assert client.get_raw_env_vars(project_id=created.project_id, job_id=created.id) == {
+        "DBT_ENV": {"project": {"id": 1, "value": "default"}}
+    }
+
+    client.delete_job(created)
+    assert client.get_jobs() == []
+
+
+def test_requests_without_the_api_key_are_rejected(fake_dbt_cloud):
+    client = DBTCloud(
+        account_id=fake_dbt_cloud.account_id, api_key="wrong", base_url=fake_dbt_cloud.base_url
+    )
+    response = client._request("GET", "/api/v2/accounts/{account_id}/jobs/")
+    assert response.status_code == 401
+
+
+def test_requests_are_rate_limited(fake_dbt_cloud):
+    fake_dbt_cloud.seed_jobs(250)
+    fake_dbt_cloud.rate_limit_every = 2
+
+    with pytest.raises(DBTCloudException, match="HTTP 429"):
+        _client(fake_dbt_cloud).get_jobs()
+
+    assert fake_dbt_cloud.rate_limited_count == 1
+
+
+def test_responses_are_delayed():
+    with FakeDbtCloud(latency_ms=20, jitter_ms=5, seed=1) as fake:
+        client = DBTCloud(account_id=fake.account_id, api_key=API_KEY, base_url=fake.base_url)
+        started_at = time.perf_counter()
+        client.get_jobs()
+        assert time.perf_counter() - started_at >= 0.015
+
+
+def test_sync_and_plan_against_the_fake_server(fake_dbt_cloud, tmp_path):
+    cloud_jobs = [dict(job) for job in fake_dbt_cloud.seed_jobs(30)]
+    fake_dbt_cloud.add_project_env_var(10, "DBT_ENV", "default")
+    yml_jobs = synthetic.yml_jobs(cloud_jobs, changed_every=10)
+    yml_jobs["job_1"]["custom_environment_variables"] = [{"DBT_ENV": "value"}]
+    yml_jobs["new_job"] = {**yml_jobs["job_2"], "name": "New job"}
+    del yml_jobs["job_3"]
+    jobs_file = tmp_path / "jobs.yml"
+    jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+
+    runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake_dbt_cloud.base_url})
+    result = runner.invoke(cli, ["sync", "--json", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    changes = json.loads(result.output)
+    assert sorted(
+        (change["action"], change["identifier"]) for change in changes["job_changes"]
+    ) == [
+        ("CREATE", "new_job"),
+        ("DELETE", "job_3"),
+        ("UPDATE", "job_10"),
+        ("UPDATE", "job_20"),
+        ("UPDATE", "job_30"),
+    ]
+    assert len(changes["env_var_overwrite_changes"]) == 1
+    assert len(fake_dbt_cloud.jobs) == 30
+    assert len(fake_dbt_cloud.env_vars) == 2
+
+    result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {"job_changes": [], "env_var_overwrite_changes": []}
+
+
+def test_env_var_payload_round_trip(fake_dbt_cloud):
+    fake_dbt_cloud.seed_jobs(1)
+    client = _client(fake_dbt_cloud)
+
+    created = client.create_env_var(
+        CustomEnvironmentVariablePayload(
+            name="DBT_ENV", value="value", job_definition_id=1, project_id=10, account_id=1
+        )
+    )
+
+    assert created["raw_value"] == "value"
+    assert client.get_env_vars(project_id=10, job_id=1)["DBT_ENV"].id == created["id"]
+
+
+def test_bounded_memory_sync_processes_one_project_at_a_time(fake_dbt_cloud, tmp_path):
+    cloud_jobs = [dict(job) for job in fake_dbt_cloud.seed_jobs(30, projects=3)]
+    # the jobs of the project 12 are only in dbt Cloud and will be deleted
+    yml_jobs = synthetic.yml_jobs(
+        [job for job in cloud_jobs if job["project_id"] != 12], changed_every=5
+    )
+    jobs_file = tmp_path / "jobs.yml"
+    jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+
+    runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake_dbt_cloud.base_url})
+    result = runner.invoke(
+        cli, ["sync", "--json", "--bounded-memory", "--timings", str(jobs_file)]
+    )
+    assert result.exit_code == 0, result.output
+
+    output = json.loads(result.output)
+    assert output["apply_success"] is True
+    assert sorted(
+        (change["action"], change["project_id"]) for change in output["job_changes"]
+    ) == sorted(
+        [
+            ("UPDATE", job["project_id"])
+            for job in cloud_jobs
+            if job["id"] % 5 == 0 and job["project_id"] != 12
+        ]
+        + [("DELETE", 12)] * 10
+    )
+    assert len(output["applied"]["job_changes"]) == len(output["job_changes"])
+    assert {job["project_id"] for job in fake_dbt_cloud.jobs.values()} == {10, 11}
+    phases = {phase["phase"]: phase["calls"] for phase in output["timings"]["phases"]}
+    assert phases["shard"] == 3
+    assert phases["shard/list_cloud_jobs"] == 3
+
+    result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+    assert json.loads(result.output) == {"job_changes": [], "env_var_overwrite_changes": []}
+
+
+def test_plan_jsonl_matches_plan_json(fake_dbt_cloud, tmp_path):
+    cloud_jobs = fake_dbt_cloud.seed_jobs(20, projects=2)
+    yml_jobs = synthetic.yml_jobs(cloud_jobs[1:], changed_every=4)
+    jobs_file = tmp_path / "jobs.yml"
+    jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+    runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake_dbt_cloud.base_url})
+
+    result = runner.invoke(cli, ["plan", "--jsonl", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    streamed = [json.loads(line) for line in result.output.splitlines()]
+
+    result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    assert streamed == json.loads(result.output)["job_changes"]
+    assert {change["action"] for change in streamed} == {"UPDATE", "DELETE"}
+
+    result = runner.invoke(cli, ["plan", "--jsonl", "--shard-by", "project", str(jobs_file)])
+    assert result.exit_code == 0, result.output
+    assert sorted(result.output.splitlines()) == sorted(json.dumps(change) for change in streamed)
@@ -0,0 +1,44 @@
+from unittest.mock import MagicMock
+
+from dbt_jobs_as_code.client import DBTCloud
+
+
+def _page(jobs, offset, total_count, limit=2):
+    return {
+        "data": jobs,
+        "extra": {
+            "filters": {"limit": limit, "offset": offset},
+            "pagination": {"total_count": total_count},
+        },
+    }
+
+
+def test_get_jobs_updated_since_stops_at_the_watermark():
+    client = DBTCloud(account_id=1, api_key="test")
+    client._make_request = MagicMock(
+        side_effect=[
+            _page(
+                [
+                    {"id": 5, "updated_at": "2024-01-05T00:00:00+00:00"},
+                    {"id": 4, "updated_at": "2024-01-04T00:00:00+00:00"},
+                ],
+                offset=0,
+                total_count=6,
+            ),
+            _page(
+                [
+                    {"id": 3, "updated_at": "2024-01-03T00:00:00+00:00"},
+                    {"id": 2, "updated_at": "2024-01-02T00:00:00+00:00"},
+                ],
+                offset=2,
+                total_count=6,
+            ),
+        ]
+    )
+
+    jobs = client.get_jobs_updated_since("2024-01-03T00:00:00+00:00", project_ids=[10])
+
+    assert [job["id"] for job in jobs] == [5, 4, 3]
+    assert client._make_request.call_count == 2
+    first_call_parameters = client._make_request.call_args_list[0][0][0]
+    assert first_call_parameters == {"offset": 0, "project_id": 10, "order_by": "-updated_at"}
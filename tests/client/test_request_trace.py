@@ -0,0 +1,76 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.instrumentation.request_trace import (
+    RequestRecord,
+    RequestTrace,
+    start_request_trace,
+    stop_request_trace,
+)
+
+
+def _response(status_code, json_data=None, headers=None, content=b"{}"):
+    response = MagicMock(spec=requests.Response)
+    response.status_code = status_code
+    response.json.return_value = json_data or {}
+    response.headers = headers or {}
+    response.content = content
+    return response
+
+
+@pytest.fixture
+def request_trace(tmp_path):
+    trace_file = tmp_path / "requests.jsonl"
+    yield start_request_trace(str(trace_file)), trace_file
+    stop_request_trace()
+
+
+def test_requests_are_recorded_with_their_endpoint_template(request_trace):
+    trace, trace_file = request_trace
+    client = DBTCloud(account_id=1, api_key="test")
+    client._session.get = MagicMock(
+        return_value=_response(200, {"data": {"DBT_A": {}}}, content=b"0123456789")
+    )
+
+    client.get_raw_env_vars(project_id=10, job_id=20)
+    client.get_raw_env_vars(project_id=11, job_id=21)
+    stop_request_trace()
+
+    assert client._session.get.call_args[1]["params"] == {"job_definition_id": 21}
+    lines = [json.loads(line) for line in trace_file.read_text().splitlines()]
+    assert len(lines) == 2
+    assert lines[0]["method"] == "GET"
+    assert lines[0]["endpoint"] == (
+        "/api/v3/accounts/{account_id}/projects/{project_id}/environment-variables/job/"
+    )
+    assert lines[0]["status"] == 200
+    assert lines[0]["bytes"] == 10
+
+    [summary] = trace.summary()
+    assert summary["count"] == 2
+    assert summary["bytes"] == 20
+
+
+def test_summary_percentiles():
+    trace = RequestTrace()
+    for latency in range(1, 101):
+        trace.record(
+            RequestRecord(
+                method="GET",
+                endpoint="/api/v2/accounts/{account_id}/jobs/",
+                status=500 if latency == 100 else 200,
+                bytes=1,
+                latency_ms=float(latency),
+                started_at="2024-01-01T00:00:00+00:00",
+            )
+        )
+
+    [summary] = trace.summary()
+
+    assert summary["count"] == 100
+    assert summary["errors"] == 1
+    assert (summary["p50_ms"], summary["p95_ms"], summary["p99_ms"]) == (50.0, 95.0, 99.0)
@@ -1,6 +1,7 @@
 from unittest.mock import MagicMock
 
 import pytest
+import requests
 
 from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
 
@@ -49,7 +50,7 @@ def jobs_list_api_response(job_api_response):
 class TestTrailingSlashInBaseUrl:
     def test_get_job_url_has_no_double_slash(self, base_url, job_api_response):
         client = DBTCloud(account_id=1, api_key="test", base_url=base_url)
-        mock_response = MagicMock()
+        mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 200
         mock_response.json.return_value = job_api_response
         client._session.get = MagicMock(return_value=mock_response)
@@ -64,7 +65,7 @@ class TestTrailingSlashInBaseUrl:
 
     def test_get_jobs_url_has_no_double_slash(self, base_url, jobs_list_api_response):
         client = DBTCloud(account_id=1, api_key="test", base_url=base_url)
-        mock_response = MagicMock()
+        mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 200
         mock_response.json.return_value = jobs_list_api_response
         client._session.get = MagicMock(return_value=mock_response)
@@ -79,7 +80,7 @@ class TestTrailingSlashInBaseUrl:
 
     def test_update_job_url_has_no_double_slash(self, base_url, job_api_response):
         client = DBTCloud(account_id=1, api_key="test", base_url=base_url)
-        mock_response = MagicMock()
+        mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 200
         mock_response.json.return_value = job_api_response
         client._session.post = MagicMock(return_value=mock_response)
@@ -98,7 +99,7 @@ class TestTrailingSlashInBaseUrl:
 
     def test_delete_job_url_has_no_double_slash(self, base_url, job_api_response):
         client = DBTCloud(account_id=1, api_key="test", base_url=base_url)
-        mock_response = MagicMock()
+        mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 200
         client._session.delete = MagicMock(return_value=mock_response)
 
@@ -117,7 +118,7 @@ class TestTrailingSlashInBaseUrl:
 
     def test_create_job_url_has_no_double_slash(self, base_url, job_api_response):
         client = DBTCloud(account_id=1, api_key="test", base_url=base_url)
-        mock_response = MagicMock()
+        mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = 200
         mock_response.json.return_value = job_api_response
         client._session.post = MagicMock(return_value=mock_response)
@@ -146,7 +147,7 @@ class TestGetJobsErrorHandling:
     @pytest.mark.parametrize("status_code", [401, 403, 404, 500, 502])
     def test_get_jobs_raises_on_api_error(self, status_code):
         client = DBTCloud(account_id=1, api_key="test", base_url="https://cloud.getdbt.com")
-        mock_response = MagicMock()
+        mock_response = MagicMock(spec=requests.Response)
         mock_response.status_code = status_code
         mock_response.json.return_value = {
             "status": {"code": status_code, "user_message": "error"}
@@ -0,0 +1,167 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import Change, apply_levels
+from dbt_jobs_as_code.cloud_yaml_mapping.dependencies import (
+    JobReferenceError,
+    check_job_references,
+    topological_levels,
+)
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+def _yml_job(job_id, **fields):
+    return {
+        "account_id": 1,
+        "project_id": 10,
+        "environment_id": 100,
+        "name": f"Job {job_id}",
+        "settings": {"threads": 4, "target_name": "prod"},
+        "run_generate_sources": False,
+        "execute_steps": ["dbt build"],
+        "generate_docs": False,
+        "schedule": {"cron": "0 * * * *"},
+        "triggers": {"schedule": False},
+        **fields,
+    }
+
+
+def _trigger(job_identifier):
+    return {"condition": {"job_identifier": job_identifier, "project_id": 10, "statuses": [10]}}
+
+
+def _defined_jobs(yml_jobs):
+    return {
+        identifier: JobDefinition(identifier=identifier, **job)
+        for identifier, job in yml_jobs.items()
+    }
+
+
+def test_topological_levels():
+    levels = topological_levels({"c": {"b"}, "b": {"a"}, "a": set(), "d": {"a", "unknown"}})
+
+    assert levels == [["a"], ["b", "d"], ["c"]]
+
+
+def test_topological_levels_with_a_cycle():
+    with pytest.raises(JobReferenceError, match="a, b"):
+        topological_levels({"a": {"b"}, "b": {"a"}, "c": set()})
+
+
+def test_check_job_references():
+    defined_jobs = _defined_jobs(
+        {
+            "new_1": _yml_job(1, deferring_job_identifier="existing"),
+            "new_2": _yml_job(2, job_completion_trigger_condition=_trigger("new_1")),
+        }
+    )
+    check_job_references(defined_jobs, {"existing"})
+
+    with pytest.raises(JobReferenceError, match="new_1 refers to the job existing"):
+        check_job_references(defined_jobs, set())
+
+    # the jobs to create can't refer to each other, but existing jobs can
+    defined_jobs["new_1"].deferring_job_identifier = "new_2"
+    with pytest.raises(JobReferenceError, match="cycle"):
+        check_job_references(defined_jobs, set())
+    check_job_references(defined_jobs, {"new_1"})
+
+
+def test_apply_levels():
+    jobs = _defined_jobs(
+        {
+            "first": _yml_job(1),
+            "second": _yml_job(2, job_completion_trigger_condition=_trigger("first")),
+            "existing": _yml_job(3, deferring_job_identifier="second"),
+        }
+    )
+
+    def job_change(identifier, action):
+        return Change(identifier, "job", action, 10, 100, {"job": jobs[identifier]})
+
+    changes = [
+        job_change("existing", "update"),
+        Change("old", "job", "delete", 10, 100, {"job": jobs["first"]}),
+        job_change("second", "create"),
+        job_change("first", "create"),
+        Change("second:DBT_A", "env var overwrite", "create", 10, 100, {}),
+        Change(
+            "first:DBT_A",
+            "env var overwrite",
+            "create",
+            10,
+            100,
+            {"yml_job_identifier": "first"},
+        ),
+    ]
+
+    levels = apply_levels(changes)
+
+    assert [[str(change) for change in level] for level in levels] == [
+        ["CREATE Job first", "CREATE Env Var Overwrite second:DBT_A"],
+        ["CREATE Job second", "CREATE Env Var Overwrite first:DBT_A"],
+        ["UPDATE Job existing"],
+        ["DELETE Job old"],
+    ]
+
+
+def test_sync_creates_a_chain_of_jobs(tmp_path):
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(2)
+        yml_jobs = synthetic.yml_jobs(cloud_jobs)
+        # new_c defers to new_b, which is triggered by new_a, and job_1 is triggered by new_c
+        yml_jobs["new_c"] = {**yml_jobs["job_2"], "deferring_job_identifier": "new_b"}
+        yml_jobs["new_b"] = {
+            **yml_jobs["job_2"],
+            "job_completion_trigger_condition": _trigger("new_a"),
+        }
+        yml_jobs["new_a"] = {**yml_jobs["job_2"], "deferring_job_identifier": "job_2"}
+        yml_jobs["job_1"]["job_completion_trigger_condition"] = _trigger("new_c")
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+
+        result = runner.invoke(cli, ["sync", "--json", str(jobs_file)])
+
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["apply_success"] is True
+        job_ids = {job["name"].split("[[")[1][:-2]: job_id for job_id, job in fake.jobs.items()}
+        jobs = {identifier: fake.jobs[job_id] for identifier, job_id in job_ids.items()}
+        assert jobs["new_a"]["deferring_job_definition_id"] == job_ids["job_2"]
+        assert (
+            jobs["new_b"]["job_completion_trigger_condition"]["condition"]["job_id"]
+            == job_ids["new_a"]
+        )
+        assert jobs["new_c"]["deferring_job_definition_id"] == job_ids["new_b"]
+        assert (
+            jobs["job_1"]["job_completion_trigger_condition"]["condition"]["job_id"]
+            == job_ids["new_c"]
+        )
+        assert (
+            "job_identifier" not in jobs["job_1"]["job_completion_trigger_condition"]["condition"]
+        )
+
+        # the references resolve to the same IDs in the next plan
+        result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.output)["job_changes"] == []
+
+
+def test_plan_fails_on_an_unknown_reference(tmp_path):
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        yml_jobs = synthetic.yml_jobs(fake.seed_jobs(1))
+        yml_jobs["job_1"]["deferring_job_identifier"] = "unknown"
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+
+        result = runner.invoke(cli, ["plan", str(jobs_file)])
+
+        assert result.exit_code == 1
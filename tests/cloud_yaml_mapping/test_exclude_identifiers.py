@@ -2,6 +2,7 @@ from unittest.mock import Mock, patch
 
 import pytest
 
+from dbt_jobs_as_code.client import DBTCloud
 from dbt_jobs_as_code.cloud_yaml_mapping.change_set import ChangeSet, build_change_set
 from dbt_jobs_as_code.schemas.common_types import Settings, Triggers
 from dbt_jobs_as_code.schemas.job import JobDefinition
@@ -86,7 +87,7 @@ def test_exclude_identifiers_matching_no_pattern(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -124,7 +125,7 @@ def test_exclude_identifiers_matching_simple_pattern(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -158,7 +159,7 @@ def test_exclude_identifiers_matching_multiple_patterns(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -191,7 +192,7 @@ def test_exclude_identifiers_matching_jobs_without_identifier(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -225,7 +226,7 @@ def test_exclude_identifiers_matching_invalid_regex(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -259,7 +260,7 @@ def test_exclude_identifiers_matching_case_sensitive(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -292,7 +293,7 @@ def test_exclude_identifiers_matching_partial_match(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
@@ -325,7 +326,7 @@ def test_exclude_identifiers_matching_with_json_output(
     mock_glob.return_value = ["test.yml"]
 
     # Mock the DBT Cloud client
-    mock_dbt_cloud = Mock()
+    mock_dbt_cloud = Mock(spec=DBTCloud)
     mock_dbt_cloud_class.return_value = mock_dbt_cloud
     mock_dbt_cloud.get_jobs.return_value = sample_jobs
     mock_dbt_cloud.build_mapping_job_identifier_job_id.return_value = {}
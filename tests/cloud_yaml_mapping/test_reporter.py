@@ -0,0 +1,115 @@
+import io
+import json
+from unittest.mock import patch
+
+import pytest
+from click.testing import CliRunner
+from rich.console import Console
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.cloud_yaml_mapping import reporter
+from dbt_jobs_as_code.cloud_yaml_mapping.reporter import (
+    FullReporter,
+    JsonReporter,
+    Reporter,
+    SummaryReporter,
+    create_reporter,
+    report_mode,
+)
+from dbt_jobs_as_code.main import cli
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+DIFF = {"differences": {"values_changed": {"root['settings']['threads']": {"new_value": 8}}}}
+
+
+@pytest.fixture
+def console():
+    output = io.StringIO()
+    with patch.object(reporter, "_shared_console", return_value=Console(file=output)):
+        yield output
+
+
+def test_create_reporter():
+    assert type(create_reporter()) is FullReporter
+    assert type(create_reporter(output_json=True)) is Reporter
+    with report_mode("summary"):
+        assert type(create_reporter(output_json=True)) is SummaryReporter
+        with report_mode("json"):
+            assert type(create_reporter()) is JsonReporter
+        assert type(create_reporter()) is SummaryReporter
+    assert type(create_reporter()) is FullReporter
+
+
+def test_summary_does_not_format_the_differences(console):
+    summary = SummaryReporter()
+    with patch.object(reporter.json, "dumps", side_effect=AssertionError):
+        for job_id in range(10):
+            summary.job_compared(f"job_{job_id}", DIFF if job_id % 2 else None)
+        summary.flush()
+
+    assert console.getvalue() == ""
+
+
+def test_full_report_logs_each_job(console):
+    full = FullReporter()
+    with patch.object(reporter, "logger") as logger:
+        full.job_compared("job_1", None)
+        full.job_compared("job_2", DIFF)
+        full.flush()
+
+    assert [call.args[0] for call in logger.info.call_args_list] == [
+        "Checking for differences in {identifier}",
+        "Checking for differences in {identifier}",
+    ]
+    logger.success.assert_called_once_with("✅ Job job_1 is identical")
+    assert console.getvalue().startswith("❌ Job job_2 is different - Diff:")
+
+
+def test_json_report_is_written_in_batches(monkeypatch, capsys):
+    monkeypatch.setattr(reporter, "BATCH_SIZE", 2)
+    json_reporter = JsonReporter()
+
+    json_reporter.job_compared("job_1", None)
+    assert capsys.readouterr().err == ""
+    json_reporter.job_compared("job_2", DIFF)
+    json_reporter.job_compared("job_3", None)
+    assert capsys.readouterr().err.count("job_compared") == 2
+    json_reporter.flush()
+
+    assert '"identifier": "job_3"' in capsys.readouterr().err
+
+
+def test_plan_with_json_report(tmp_path):
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(6)
+        jobs_yml, _ = synthetic.jobs_yml(cloud_jobs, "anchored", changed_every=3)
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(jobs_yml)
+
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+        result = runner.invoke(cli, ["plan", "--json", "--report", "json", str(jobs_file)])
+
+    assert result.exit_code == 0, result.output
+    assert len(json.loads(result.stdout)["job_changes"]) == 2
+    events = [json.loads(line) for line in result.stderr.splitlines() if line.startswith("{")]
+    assert sorted((event["identifier"], event["identical"]) for event in events) == [
+        (f"job_{job_id}", job_id % 3 != 0) for job_id in range(1, 7)
+    ]
+    assert all(event["differences"] for event in events if not event["identical"])
+
+
+def test_plan_with_json_and_full_report(tmp_path):
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = fake.seed_jobs(6)
+        jobs_yml, _ = synthetic.jobs_yml(cloud_jobs, "anchored", changed_every=3)
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(jobs_yml)
+
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+        result = runner.invoke(cli, ["plan", "--json", "--report", "full", str(jobs_file)])
+
+    assert result.exit_code == 0, result.output
+    # the differences are printed to stderr, stdout only has the JSON output
+    assert len(json.loads(result.stdout)["job_changes"]) == 2
+    assert result.stderr.count("is different - Diff:") == 2
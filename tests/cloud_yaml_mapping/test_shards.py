@@ -0,0 +1,169 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.cloud_yaml_mapping.shards import (
+    Shard,
+    ShardTask,
+    plan_shards,
+    run_shard,
+)
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+@pytest.fixture
+def fake_dbt_cloud():
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        yield fake
+
+
+def _client(fake):
+    return DBTCloud(account_id=fake.account_id, api_key=API_KEY, base_url=fake.base_url)
+
+
+def _defined_jobs(yml_jobs):
+    return {
+        identifier: JobDefinition(identifier=identifier, **job)
+        for identifier, job in yml_jobs.items()
+    }
+
+
+def _trigger(job_id, project_id):
+    return {"condition": {"job_id": job_id, "project_id": project_id, "statuses": [10]}}
+
+
+def test_plan_shards_by_project_and_environment(fake_dbt_cloud):
+    cloud_jobs = fake_dbt_cloud.seed_jobs(12, projects=3, environments_per_project=2)
+    defined_jobs = _defined_jobs(synthetic.yml_jobs(cloud_jobs))
+
+    shards = plan_shards(defined_jobs, _client(fake_dbt_cloud), "project", [], [])
+    assert [shard.name for shard in shards] == ["project 10", "project 11", "project 12"]
+    assert sorted(len(shard.defined_jobs) for shard in shards) == [4, 4, 4]
+
+    shards = plan_shards(defined_jobs, _client(fake_dbt_cloud), "environment", [], [])
+    assert len(shards) == 6
+    assert all(len(shard.keys) == 1 for shard in shards)
+    assert {
+        (job.project_id, job.environment_id)
+        for shard in shards
+        for job in shard.defined_jobs.values()
+    } == {key for shard in shards for key in shard.keys}
+
+
+def test_plan_shards_keeps_linked_projects_together(fake_dbt_cloud):
+    cloud_jobs = fake_dbt_cloud.seed_jobs(8, projects=4)
+    yml_jobs = synthetic.yml_jobs(cloud_jobs)
+    # job_1 in the project 11 is triggered by job_2 in the project 12
+    yml_jobs["job_1"]["job_completion_trigger_condition"] = _trigger(2, 12)
+    # job_4 in dbt Cloud moved from the project 10 to the project 13 in the YML
+    yml_jobs["job_4"].update(project_id=13, environment_id=400)
+
+    shards = plan_shards(_defined_jobs(yml_jobs), _client(fake_dbt_cloud), "project", [], [])
+
+    assert [shard.name for shard in shards] == ["project 10, project 13", "project 11, project 12"]
+    assert sorted(shards[0].defined_jobs) == ["job_3", "job_4", "job_7", "job_8"]
+
+
+def test_plan_shards_keeps_jobs_referring_to_each_other_together(fake_dbt_cloud):
+    cloud_jobs = fake_dbt_cloud.seed_jobs(3, projects=3)
+    yml_jobs = synthetic.yml_jobs(cloud_jobs)
+    # a new job in the project 12 defers to job_1 in the project 11
+    yml_jobs["new_job"] = {**yml_jobs["job_2"], "deferring_job_identifier": "job_1"}
+
+    shards = plan_shards(_defined_jobs(yml_jobs), _client(fake_dbt_cloud), "project", [], [])
+
+    assert [shard.name for shard in shards] == ["project 10", "project 11, project 12"]
+
+
+def test_plan_shards_follows_triggers_defined_in_dbt_cloud(fake_dbt_cloud):
+    cloud_jobs = fake_dbt_cloud.seed_jobs(3, projects=3)
+    fake_dbt_cloud.jobs[3]["job_completion_trigger_condition"] = _trigger(1, 11)
+
+    shards = plan_shards(
+        _defined_jobs(synthetic.yml_jobs(cloud_jobs)), _client(fake_dbt_cloud), "project", [], []
+    )
+
+    assert [shard.name for shard in shards] == ["project 10, project 11", "project 12"]
+
+
+def test_run_shard_returns_errors(monkeypatch):
+    monkeypatch.delenv("DBT_API_KEY", raising=False)
+    task = ShardTask(
+        index=0,
+        shard=Shard(keys=[(10, None)], defined_jobs={}),
+        account_id=1,
+        credentials_mapping=None,
+        disable_ssl_verification=False,
+        environment_ids=[],
+        exclude_identifiers_matching=None,
+        output_json=True,
+        apply=False,
+        fail_fast=False,
+        record_timings=False,
+        trace_requests=False,
+    )
+
+    result = run_shard(task)
+
+    assert result.apply_success is False
+    assert result.error.startswith("DBTCloudParamsException")
+    assert result.change_count == 0
+
+
+def test_sharded_sync_and_plan_in_worker_processes(fake_dbt_cloud, tmp_path):
+    cloud_jobs = [dict(job) for job in fake_dbt_cloud.seed_jobs(12, projects=3)]
+    yml_jobs = synthetic.yml_jobs(
+        [job for job in cloud_jobs if job["project_id"] != 12], changed_every=3
+    )
+    jobs_file = tmp_path / "jobs.yml"
+    jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+    runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake_dbt_cloud.base_url})
+
+    result = runner.invoke(
+        cli,
+        ["plan", "--json", "--shard-by", "project", "--shard-workers", "2", str(jobs_file)],
+    )
+    assert result.exit_code == 0, result.output
+    plan_output = json.loads(result.output)
+    assert [shard["name"] for shard in plan_output["shards"]] == [
+        "project 10",
+        "project 11",
+        "project 12",
+    ]
+    # the changes are ordered by shard
+    assert [change["project_id"] for change in plan_output["job_changes"]] == sorted(
+        change["project_id"] for change in plan_output["job_changes"]
+    )
+
+    result = runner.invoke(
+        cli,
+        ["sync", "--json", "--shard-by", "project", "--timings", str(jobs_file)],
+    )
+    assert result.exit_code == 0, result.output
+    output = json.loads(result.output)
+    assert sorted(change["identifier"] for change in output["job_changes"]) == sorted(
+        change["identifier"] for change in plan_output["job_changes"]
+    )
+    assert output["apply_success"] is True
+    assert len(output["applied"]["job_changes"]) == len(output["job_changes"])
+    assert {job["project_id"] for job in fake_dbt_cloud.jobs.values()} == {10, 11}
+    phases = {phase["phase"]: phase["calls"] for phase in output["timings"]["phases"]}
+    assert phases["run_shards/shard"] == 3
+    assert sum(request["count"] for request in output["timings"]["requests"]) > 3
+
+    result = runner.invoke(cli, ["plan", "--json", str(jobs_file)])
+    assert json.loads(result.output) == {"job_changes": [], "env_var_overwrite_changes": []}
+
+
+def test_shard_by_cannot_be_used_with_a_snapshot(tmp_path):
+    result = CliRunner().invoke(
+        cli, ["plan", "--shard-by", "project", "--snapshot", "snapshot.json", "jobs.yml"]
+    )
+    assert result.exit_code == 1
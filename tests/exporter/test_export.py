@@ -1,10 +1,16 @@
 import json
 
 import pytest
+from click.testing import CliRunner
 from jsonschema import validate
 from ruamel.yaml import YAML
 
-from dbt_jobs_as_code.exporter.export import apply_templated_fields, export_jobs_yml
+from dbt_jobs_as_code.exporter.export import (
+    apply_templated_fields,
+    export_jobs_yml,
+    export_jobs_yml_to_dir,
+)
+from dbt_jobs_as_code.main import cli
 from dbt_jobs_as_code.schemas.common_types import (
     Date,
     Execution,
@@ -14,6 +20,7 @@ from dbt_jobs_as_code.schemas.common_types import (
     Triggers,
 )
 from dbt_jobs_as_code.schemas.job import JobDefinition
+from tests.fake_dbt_cloud import FakeDbtCloud
 
 
 @pytest.fixture
@@ -297,3 +304,77 @@ def test_export_jobs_yml_with_curly_braces(base_job_definition, capsys, tmp_path
         """'{{ deferring_environment_id }}'""" not in captured.out
         and """\"{{ deferring_environment_id }}\"""" not in captured.out
     )
+
+
+def test_export_jobs_yml_streams_the_jobs(base_job_definition, capsys):
+    """Test that each job is printed before the next one is converted"""
+
+    def jobs():
+        for index in range(2):
+            yield base_job_definition.model_copy(update={"name": f"Job {index}"})
+            assert f"name: Job {index}" in capsys.readouterr().out
+
+    export_jobs_yml(jobs())
+
+
+def test_export_jobs_yml_without_jobs(capsys):
+    export_jobs_yml([])
+
+    assert capsys.readouterr().out.endswith("\njobs: {}\n")
+
+
+@pytest.mark.parametrize(
+    "split_by,expected_files", [("project", 2), ("environment", 3)], ids=["project", "environment"]
+)
+def test_export_jobs_yml_to_dir(base_job_definition, tmp_path, capsys, split_by, expected_files):
+    """Test that the files written contain the same jobs as the export to stdout"""
+    jobs = [
+        base_job_definition.model_copy(
+            update={"name": name, "project_id": project_id, "environment_id": environment_id}
+        )
+        for name, project_id, environment_id in [
+            ("Job A [[job_a]]", 1, 10),
+            ("Job B", 2, 20),
+            ("Job C", 1, 11),
+        ]
+    ]
+    for job in jobs:
+        job.identifier = job._extract_identifier_from_name(job.name).identifier
+
+    files = export_jobs_yml_to_dir(jobs, str(tmp_path / "jobs"), split_by=split_by)
+
+    assert len(files) == expected_files
+    assert sorted(files) == sorted(str(path) for path in (tmp_path / "jobs").glob("*.yml"))
+    yaml = YAML()
+    exported_jobs = {}
+    for file in files:
+        exported_jobs.update(yaml.load(open(file))["jobs"])
+    export_jobs_yml(jobs)
+    assert exported_jobs == yaml.load(capsys.readouterr().out)["jobs"]
+    assert set(exported_jobs) == {"job_a", "import_2", "import_3"}
+
+
+def test_import_jobs_to_dir_can_be_planned(tmp_path):
+    """Test that the files written by import-jobs --output-dir match dbt Cloud"""
+    with FakeDbtCloud(api_key="fake-api-key") as fake:
+        cloud_jobs = fake.seed_jobs(6, projects=2, environments_per_project=2)
+        env_var = fake.add_project_env_var(cloud_jobs[0]["project_id"], "DBT_VAR", "job_value")
+        env_var.update(type="job", job_definition_id=cloud_jobs[0]["id"])
+        runner = CliRunner(env={"DBT_API_KEY": "fake-api-key", "DBT_BASE_URL": fake.base_url})
+        output_dir = tmp_path / "jobs"
+
+        result = runner.invoke(
+            cli,
+            ["import-jobs", "--account-id", str(fake.account_id), "--output-dir", str(output_dir)],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert sorted(path.name for path in output_dir.iterdir()) == [
+            f"project_{project_id}.yml"
+            for project_id in sorted({job["project_id"] for job in cloud_jobs})
+        ]
+        result = runner.invoke(cli, ["plan", "--json", str(output_dir / "*.yml")])
+        assert result.exit_code == 0, result.output
+        plan = json.loads(result.output)
+        assert plan["job_changes"] == []
+        assert plan["env_var_overwrite_changes"] == []
@@ -0,0 +1,401 @@
+"""A fake dbt Cloud API, serving the endpoints used by `DBTCloud` from memory.
+
+It is used by the tests and the benchmarks to run `plan` and `sync` without network access or a
+dbt Cloud account. Latency, jitter, page size and rate limiting (HTTP 429) can be configured to
+reproduce the behaviour of a real account under load.
+
+It can also be started on its own, for example to run the CLI against 50k jobs:
+
+    python -m tests.fake_dbt_cloud --jobs 50000 --latency-ms 50 --port 8001
+    DBT_BASE_URL=http://127.0.0.1:8001 DBT_API_KEY=fake dbt-jobs-as-code plan jobs.yml
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from beartype.typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks import synthetic
+
+JOBS_PATH = re.compile(r"^/api/v2/accounts/(?P<account_id>\d+)/jobs/$")
+JOB_PATH = re.compile(r"^/api/v2/accounts/(?P<account_id>\d+)/jobs/(?P<job_id>\d+)/$")
+JOB_ENV_VARS_PATH = re.compile(
+    r"^/api/v3/accounts/(?P<account_id>\d+)/projects/(?P<project_id>\d+)/environment-variables/job/$"
+)
+ENV_VARS_PATH = re.compile(
+    r"^/api/v3/accounts/(?P<account_id>\d+)/projects/(?P<project_id>\d+)/environment-variables/$"
+)
+ENV_VAR_PATH = re.compile(
+    r"^/api/v3/accounts/(?P<account_id>\d+)/projects/(?P<project_id>\d+)/environment-variables/(?P<env_var_id>\d+)/$"
+)
+ENVIRONMENTS_PATH = re.compile(r"^/api/v3/accounts/(?P<account_id>\d+)/environments/$")
+
+
+class FakeDbtCloudError(Exception):
+    def __init__(self, status: int, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class FakeDbtCloud:
+    """An in-memory dbt Cloud account served over HTTP on a local port.
+
+    - `latency_ms` and `jitter_ms` delay each response by `latency_ms` +/- a random jitter
+    - `page_size` is the number of jobs returned per page when listing jobs
+    - every `rate_limit_every`th request is answered with HTTP 429 and a `Retry-After` of
+      `retry_after_seconds`
+    - `seed` makes the jitter reproducible
+    """
+
+    def __init__(
+        self,
+        account_id: int = synthetic.ACCOUNT_ID,
+        api_key: Optional[str] = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        page_size: int = 100,
+        rate_limit_every: int = 0,
+        retry_after_seconds: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.account_id = account_id
+        self.api_key = api_key
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.page_size = page_size
+        self.rate_limit_every = rate_limit_every
+        self.retry_after_seconds = retry_after_seconds
+
+        self.jobs: Dict[int, dict] = {}
+        self.env_vars: Dict[int, dict] = {}
+        self.environments: Dict[int, dict] = {}
+        self.request_count = 0
+        self.rate_limited_count = 0
+
+        self._random = random.Random(seed)
+        self._next_job_id = 1
+        self._next_env_var_id = 1
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    # Data
+
+    def add_environment(self, project_id: int, environment_id: int) -> None:
+        with self._lock:
+            self.environments.setdefault(
+                environment_id,
+                {
+                    "id": environment_id,
+                    "account_id": self.account_id,
+                    "project_id": project_id,
+                    "name": f"Environment {environment_id}",
+                    "type": "deployment",
+                },
+            )
+
+    def add_project_env_var(self, project_id: int, name: str, value: str) -> dict:
+        """Add an environment variable at the project level, which jobs can then overwrite."""
+        with self._lock:
+            env_var = {
+                "id": self._next_env_var_id,
+                "account_id": self.account_id,
+                "project_id": project_id,
+                "name": name,
+                "type": "project",
+                "raw_value": value,
+                "job_definition_id": None,
+            }
+            self._next_env_var_id += 1
+            self.env_vars[env_var["id"]] = env_var
+        return env_var
+
+    def seed_jobs(
+        self, count: int, projects: int = 1, environments_per_project: int = 1
+    ) -> List[dict]:
+        """Add `count` synthetic managed jobs to the account and return them."""
+        jobs = synthetic.raw_jobs(count, projects, environments_per_project)
+        for job in jobs:
+            job["account_id"] = self.account_id
+            self.add_environment(job["project_id"], job["environment_id"])
+        with self._lock:
+            for job in jobs:
+                job["id"] += self._next_job_id - 1
+                self.jobs[job["id"]] = job
+            self._next_job_id = max(self.jobs, default=0) + 1
+        return jobs
+
+    # Server
+
+    @property
+    def base_url(self) -> str:
+        if self._server is None:
+            raise RuntimeError("The fake dbt Cloud server is not started")
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving in a background thread and return the base URL."""
+        self._server = ThreadingHTTPServer((host, port), _handler(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True
+        )
+        self._thread.start()
+        return self.base_url
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "FakeDbtCloud":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    # Requests
+
+    def handle(
+        self, method: str, url: str, headers: Dict[str, str], body: bytes
+    ) -> Tuple[int, Dict[str, str], dict]:
+        """Return the status, headers and JSON body of the response to a request."""
+        with self._lock:
+            self.request_count += 1
+            rate_limited = (
+                self.rate_limit_every > 0 and self.request_count % self.rate_limit_every == 0
+            )
+            if rate_limited:
+                self.rate_limited_count += 1
+            delay_ms = self.latency_ms + self._random.uniform(-self.jitter_ms, self.jitter_ms)
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+
+        if rate_limited:
+            return (
+                429,
+                {"Retry-After": str(self.retry_after_seconds)},
+                {"status": {"code": 429, "is_success": False}, "data": None},
+            )
+        if self.api_key is not None and headers.get("Authorization") != f"Bearer {self.api_key}":
+            return 401, {}, {"status": {"code": 401, "is_success": False}, "data": None}
+
+        parsed = urlparse(url)
+        query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+        try:
+            payload = json.loads(body) if body else {}
+            status, data = self._route(method, parsed.path, query, payload)
+        except FakeDbtCloudError as e:
+            return (
+                e.status,
+                {},
+                {"status": {"code": e.status, "is_success": False, "user_message": str(e)}},
+            )
+        if isinstance(data, tuple):
+            data, extra = data
+            return (
+                status,
+                {},
+                {"status": {"code": status, "is_success": True}, **extra, "data": data},
+            )
+        return status, {}, {"status": {"code": status, "is_success": True}, "data": data}
+
+    def _route(self, method: str, path: str, query: Dict[str, str], payload: dict):
+        routes = [
+            (JOBS_PATH, {"GET": self._list_jobs, "POST": self._create_job}),
+            (
+                JOB_PATH,
+                {"GET": self._get_job, "POST": self._update_job, "DELETE": self._delete_job},
+            ),
+            (JOB_ENV_VARS_PATH, {"GET": self._list_job_env_vars}),
+            (ENV_VARS_PATH, {"POST": self._create_env_var}),
+            (ENV_VAR_PATH, {"POST": self._update_env_var, "DELETE": self._delete_env_var}),
+            (ENVIRONMENTS_PATH, {"GET": self._list_environments}),
+        ]
+        for pattern, handlers in routes:
+            match = pattern.match(path)
+            if match is None:
+                continue
+            params = {key: int(value) for key, value in match.groupdict().items()}
+            if params.pop("account_id") != self.account_id:
+                raise FakeDbtCloudError(404, "Account not found")
+            if method not in handlers:
+                raise FakeDbtCloudError(405, f"{method} is not allowed on {path}")
+            with self._lock:
+                return handlers[method](query=query, payload=payload, **params)
+        raise FakeDbtCloudError(404, f"No endpoint for {path}")
+
+    def _list_jobs(self, query: Dict[str, str], payload: dict):
+        jobs = list(self.jobs.values())
+        if "project_id" in query:
+            jobs = [job for job in jobs if job["project_id"] == int(query["project_id"])]
+        if "project_id__in" in query:
+            project_ids = {int(i) for i in query["project_id__in"].strip("[]").split(",") if i}
+            jobs = [job for job in jobs if job["project_id"] in project_ids]
+        if "environment_id" in query:
+            jobs = [job for job in jobs if job["environment_id"] == int(query["environment_id"])]
+
+        order_by = query.get("order_by", "id")
+        jobs.sort(key=lambda job: job[order_by.lstrip("-")], reverse=order_by.startswith("-"))
+
+        offset = int(query.get("offset", 0))
+        limit = min(int(query.get("limit", self.page_size)), self.page_size)
+        page = jobs[offset : offset + limit]
+        extra = {
+            "extra": {
+                "filters": {"limit": limit, "offset": offset},
+                "order_by": order_by,
+                "pagination": {"count": len(page), "total_count": len(jobs)},
+            }
+        }
+        return 200, (page, extra)
+
+    def _get_job(self, job_id: int, query: Dict[str, str], payload: dict):
+        if job_id not in self.jobs:
+            raise FakeDbtCloudError(404, f"Job {job_id} not found")
+        return 200, self.jobs[job_id]
+
+    def _create_job(self, query: Dict[str, str], payload: dict):
+        job = {**payload, "id": self._next_job_id, "updated_at": _now()}
+        self._next_job_id += 1
+        self.jobs[job["id"]] = job
+        return 201, job
+
+    def _update_job(self, job_id: int, query: Dict[str, str], payload: dict):
+        if job_id not in self.jobs:
+            raise FakeDbtCloudError(404, f"Job {job_id} not found")
+        self.jobs[job_id] = {**self.jobs[job_id], **payload, "id": job_id, "updated_at": _now()}
+        return 200, self.jobs[job_id]
+
+    def _delete_job(self, job_id: int, query: Dict[str, str], payload: dict):
+        if job_id not in self.jobs:
+            raise FakeDbtCloudError(404, f"Job {job_id} not found")
+        job = self.jobs.pop(job_id)
+        for env_var_id in [
+            env_var["id"]
+            for env_var in self.env_vars.values()
+            if env_var["job_definition_id"] == job_id
+        ]:
+            del self.env_vars[env_var_id]
+        return 200, {**job, "state": 2}
+
+    def _list_job_env_vars(self, project_id: int, query: Dict[str, str], payload: dict):
+        """The variables of the project, with the overwrites of the job under the `job` key."""
+        job_id = int(query.get("job_definition_id", 0))
+        env_vars: Dict[str, dict] = {}
+        for env_var in self.env_vars.values():
+            if env_var["project_id"] != project_id:
+                continue
+            value = {"id": env_var["id"], "value": env_var["raw_value"]}
+            if env_var["job_definition_id"] is None:
+                env_vars.setdefault(env_var["name"], {})["project"] = value
+            elif env_var["job_definition_id"] == job_id:
+                env_vars.setdefault(env_var["name"], {})["job"] = value
+        return 200, env_vars
+
+    def _create_env_var(self, project_id: int, query: Dict[str, str], payload: dict):
+        env_var = {**payload, "id": self._next_env_var_id, "project_id": project_id}
+        self._next_env_var_id += 1
+        self.env_vars[env_var["id"]] = env_var
+        return 201, env_var
+
+    def _update_env_var(
+        self, project_id: int, env_var_id: int, query: Dict[str, str], payload: dict
+    ):
+        if env_var_id not in self.env_vars:
+            raise FakeDbtCloudError(404, f"Environment variable {env_var_id} not found")
+        self.env_vars[env_var_id] = {**self.env_vars[env_var_id], **payload, "id": env_var_id}
+        return 200, self.env_vars[env_var_id]
+
+    def _delete_env_var(
+        self, project_id: int, env_var_id: int, query: Dict[str, str], payload: dict
+    ):
+        if self.env_vars.pop(env_var_id, None) is None:
+            raise FakeDbtCloudError(404, f"Environment variable {env_var_id} not found")
+        return 200, {"id": env_var_id}
+
+    def _list_environments(self, query: Dict[str, str], payload: dict):
+        environments = list(self.environments.values())
+        if "project_id" in query:
+            environments = [
+                environment
+                for environment in environments
+                if environment["project_id"] == int(query["project_id"])
+            ]
+        return 200, environments
+
+
+def _handler(fake: FakeDbtCloud) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # The headers and the body are written separately, don't wait for an ACK in between
+        disable_nagle_algorithm = True
+
+        def _respond(self) -> None:
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            status, headers, data = fake.handle(self.command, self.path, dict(self.headers), body)
+            content = json.dumps(data).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(content)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(content)
+
+        do_GET = do_POST = do_DELETE = _respond
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--account-id", type=int, default=synthetic.ACCOUNT_ID)
+    parser.add_argument("--jobs", type=int, default=0, help="Number of synthetic jobs to seed.")
+    parser.add_argument("--projects", type=int, default=1)
+    parser.add_argument("--environments-per-project", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--retry-after-seconds", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeDbtCloud(
+        account_id=args.account_id,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        page_size=args.page_size,
+        rate_limit_every=args.rate_limit_every,
+        retry_after_seconds=args.retry_after_seconds,
+        seed=args.seed,
+    )
+    fake.seed_jobs(args.jobs, args.projects, args.environments_per_project)
+    print(f"Serving {len(fake.jobs)} jobs on {fake.start(port=args.port)}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
+import threading
+import time
+from types import SimpleNamespace
 from unittest.mock import Mock
 
 import pytest
 
-from dbt_jobs_as_code.importer import fetch_jobs, get_account_id
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.importer import fetch_jobs, get_account_id, iter_jobs_with_env_vars
 from dbt_jobs_as_code.schemas.job import JobDefinition
 
 
@@ -16,7 +20,7 @@ def test_get_account_id():
 
 
 def test_fetch_jobs():
-    mock_dbt = Mock()
+    mock_dbt = Mock(spec=DBTCloud)
 
     # Mock job objects
     mock_job1 = JobDefinition(
@@ -59,3 +63,49 @@ def test_fetch_jobs():
     jobs = fetch_jobs(mock_dbt, [1], [100], [])
     mock_dbt.get_jobs.assert_called_with(project_ids=[100], environment_ids=[])
     assert len(jobs) == 1
+
+
+def test_iter_jobs_with_env_vars():
+    jobs = [
+        JobDefinition(
+            id=job_id,
+            name=f"Job {job_id}",
+            project_id=100,
+            environment_id=200,
+            account_id=300,
+            settings={},
+            run_generate_sources=False,
+            execute_steps=[],
+            generate_docs=False,
+            schedule={"cron": "0 14 * * 0,1,2,3,4,5,6"},
+            triggers={},
+        )
+        for job_id in range(1, 21)
+    ]
+    lock = threading.Lock()
+    in_flight = []
+    max_in_flight = []
+
+    def get_env_vars(project_id, job_id):
+        with lock:
+            in_flight.append(job_id)
+            max_in_flight.append(len(in_flight))
+        # the first jobs take longer, the next ones still come out in order
+        time.sleep(0.02 if job_id <= 2 else 0.001)
+        with lock:
+            in_flight.remove(job_id)
+        return {
+            "DBT_SET": SimpleNamespace(value=f"value_{job_id}"),
+            "DBT_NOT_SET": SimpleNamespace(value=None),
+        }
+
+    mock_dbt = Mock(spec=DBTCloud)
+    mock_dbt.get_env_vars.side_effect = get_env_vars
+
+    imported_jobs = list(iter_jobs_with_env_vars(mock_dbt, jobs, workers=4))
+
+    assert [job.id for job in imported_jobs] == list(range(1, 21))
+    assert [
+        [env_var.value for env_var in job.custom_environment_variables] for job in imported_jobs
+    ] == [[f"value_{job_id}"] for job_id in range(1, 21)]
+    assert 1 < max(max_in_flight) <= 4
@@ -0,0 +1,52 @@
+import tracemalloc
+
+import pytest
+
+from dbt_jobs_as_code.instrumentation import span
+from dbt_jobs_as_code.instrumentation.memory import start_memory_profile, stop_memory_profile
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def memory_profile():
+    memory_profile = start_memory_profile()
+    yield memory_profile
+    stop_memory_profile()
+
+
+def _phases(memory_profile):
+    return {phase["phase"]: phase for phase in memory_profile.to_json()["phases"]}
+
+
+def test_peaks_are_attributed_to_the_phase_and_its_parents(memory_profile):
+    kept = []
+    with span("build_change_set"):
+        with span("list_cloud_jobs"):
+            kept.append(bytearray(4 * MB))
+        with span("compute_change_set"):
+            temporary = bytearray(8 * MB)
+            del temporary
+
+    phases = _phases(memory_profile)
+    assert phases["build_change_set/list_cloud_jobs"]["peak_mb"] >= 4
+    assert phases["build_change_set/list_cloud_jobs"]["retained_mb"] >= 4
+    assert phases["build_change_set/compute_change_set"]["peak_mb"] >= 8
+    assert phases["build_change_set/compute_change_set"]["retained_mb"] < 1
+    # the parent peaks with the 4 MB kept and the 8 MB allocated after
+    assert phases["build_change_set"]["peak_mb"] >= 12
+    assert memory_profile.to_json()["peak_mb"] >= 12
+
+
+def test_tracemalloc_is_stopped_with_the_profile():
+    start_memory_profile()
+    assert tracemalloc.is_tracing()
+    stop_memory_profile()
+    assert not tracemalloc.is_tracing()
+
+
+def test_memory_is_not_profiled_without_a_profile():
+    with span("build_change_set"):
+        pass
+    assert stop_memory_profile() is None
+    assert not tracemalloc.is_tracing()
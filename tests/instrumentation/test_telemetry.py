@@ -0,0 +1,193 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from unittest.mock import MagicMock, Mock
+
+import pytest
+import requests
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import Change, ChangeSet
+from dbt_jobs_as_code.instrumentation import span
+from dbt_jobs_as_code.instrumentation.telemetry import (
+    SPAN_KIND_CLIENT,
+    STATUS_CODE_ERROR,
+    add_to_counter,
+    start_telemetry,
+    stop_telemetry,
+)
+
+
+@pytest.fixture
+def telemetry(tmp_path):
+    export_file = tmp_path / "otel.jsonl"
+    yield start_telemetry(str(export_file)), export_file
+    stop_telemetry()
+
+
+def _attributes(otlp_item):
+    return {
+        attribute["key"]: next(iter(attribute["value"].values()))
+        for attribute in otlp_item["attributes"]
+    }
+
+
+def _spans(export_file):
+    traces, _ = [json.loads(line) for line in export_file.read_text().splitlines()]
+    return traces["resourceSpans"][0]["scopeSpans"][0]["spans"]
+
+
+def _data_points(export_file, metric_name):
+    _, metrics = [json.loads(line) for line in export_file.read_text().splitlines()]
+    [metric] = [
+        metric
+        for metric in metrics["resourceMetrics"][0]["scopeMetrics"][0]["metrics"]
+        if metric["name"] == metric_name
+    ]
+    return {
+        tuple(sorted(_attributes(point).items())): point["asInt"]
+        for point in metric["sum"]["dataPoints"]
+    }
+
+
+def test_spans_are_exported_with_their_parent(telemetry):
+    _, export_file = telemetry
+    with span("build_change_set", **{"config.files": 2}):
+        with span("fetch_env_vars"):
+            pass
+    with pytest.raises(ValueError):
+        with span("render_table"):
+            raise ValueError("boom")
+    stop_telemetry()
+
+    spans = {span["name"]: span for span in _spans(export_file)}
+    assert set(spans) == {"build_change_set", "fetch_env_vars", "render_table"}
+    assert len({span["traceId"] for span in spans.values()}) == 1
+    assert spans["fetch_env_vars"]["parentSpanId"] == spans["build_change_set"]["spanId"]
+    assert "parentSpanId" not in spans["render_table"]
+    assert _attributes(spans["build_change_set"]) == {"config.files": "2"}
+    assert spans["render_table"]["status"] == {
+        "code": STATUS_CODE_ERROR,
+        "message": "ValueError: boom",
+    }
+    assert int(spans["build_change_set"]["endTimeUnixNano"]) >= int(
+        spans["build_change_set"]["startTimeUnixNano"]
+    )
+
+
+def test_counters_are_aggregated_by_attributes(telemetry):
+    _, export_file = telemetry
+    add_to_counter("dbt_jobs_as_code.changes.planned", action="CREATE", type="job")
+    add_to_counter("dbt_jobs_as_code.changes.planned", action="CREATE", type="job")
+    add_to_counter("dbt_jobs_as_code.changes.planned", action="DELETE", type="job")
+    stop_telemetry()
+
+    assert _data_points(export_file, "dbt_jobs_as_code.changes.planned") == {
+        (("action", "CREATE"), ("type", "job")): "2",
+        (("action", "DELETE"), ("type", "job")): "1",
+    }
+
+
+def test_nothing_is_recorded_without_telemetry():
+    with span("build_change_set") as current:
+        assert current is None
+    add_to_counter("dbt_jobs_as_code.changes.planned", action="CREATE", type="job")
+    assert stop_telemetry() is None
+
+
+def test_requests_are_exported_as_client_spans(telemetry):
+    _, export_file = telemetry
+    client = DBTCloud(account_id=1, api_key="test")
+    response = MagicMock(spec=requests.Response, status_code=500, content=b"error")
+    client._session.get = MagicMock(return_value=response)
+
+    with pytest.raises(DBTCloudException):
+        client.get_job(job_id=3)
+    stop_telemetry()
+
+    [request_span] = _spans(export_file)
+    assert request_span["name"] == "GET /api/v2/accounts/{account_id}/jobs/{job_id}/"
+    assert request_span["kind"] == SPAN_KIND_CLIENT
+    assert request_span["status"]["code"] == STATUS_CODE_ERROR
+    assert _attributes(request_span)["http.response.status_code"] == "500"
+    assert _data_points(export_file, "dbt_jobs_as_code.http.requests") == {
+        (
+            ("endpoint", "/api/v2/accounts/{account_id}/jobs/{job_id}/"),
+            ("method", "GET"),
+            ("status_code", "500"),
+        ): "1"
+    }
+
+
+def test_applied_changes_are_exported(telemetry):
+    _, export_file = telemetry
+    change_set = ChangeSet()
+    change_set.append(
+        Change(
+            identifier="job1",
+            type="job",
+            action="create",
+            proj_id=1,
+            env_id=2,
+            sync_function=Mock(),
+            parameters={},
+        )
+    )
+    change_set.append(
+        Change(
+            identifier="job2",
+            type="job",
+            action="delete",
+            proj_id=1,
+            env_id=2,
+            sync_function=Mock(side_effect=DBTCloudException("HTTP 500")),
+            parameters={},
+        )
+    )
+
+    change_set.apply()
+    stop_telemetry()
+
+    spans = _spans(export_file)
+    apply_changes = next(span for span in spans if span["name"] == "apply_changes")
+    apply_change_spans = [span for span in spans if span["name"] == "apply_change"]
+    assert [_attributes(span)["change.identifier"] for span in apply_change_spans] == [
+        "job1",
+        "job2",
+    ]
+    assert all(span["parentSpanId"] == apply_changes["spanId"] for span in apply_change_spans)
+    assert apply_change_spans[1]["status"]["code"] == STATUS_CODE_ERROR
+    assert _data_points(export_file, "dbt_jobs_as_code.changes.applied") == {
+        (("action", "CREATE"), ("success", True), ("type", "job")): "1",
+        (("action", "DELETE"), ("success", False), ("type", "job")): "1",
+    }
+
+
+def test_telemetry_is_sent_to_a_collector():
+    received = {}
+
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+            received[self.path] = json.loads(body)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Collector)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        start_telemetry(f"http://127.0.0.1:{server.server_port}")
+        with span("build_change_set"):
+            add_to_counter("dbt_jobs_as_code.changes.planned", action="CREATE", type="job")
+        stop_telemetry()
+    finally:
+        server.shutdown()
+
+    assert set(received) == {"/v1/traces", "/v1/metrics"}
+    [exported_span] = received["/v1/traces"]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert exported_span["name"] == "build_change_set"
+    assert received["/v1/metrics"]["resourceMetrics"][0]["scopeMetrics"][0]["metrics"]
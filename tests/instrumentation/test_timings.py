@@ -0,0 +1,65 @@
+import threading
+
+import pytest
+
+from dbt_jobs_as_code.instrumentation import span, start_timings, stop_timings
+
+
+@pytest.fixture
+def timings():
+    timings = start_timings()
+    yield timings
+    stop_timings()
+
+
+def test_spans_are_nested_and_aggregated(timings):
+    with span("build_change_set"):
+        for _ in range(3):
+            with span("fetch_env_vars"):
+                pass
+    with span("render_table"):
+        pass
+
+    assert [(phase["phase"], phase["calls"]) for phase in timings.to_json()["phases"]] == [
+        ("build_change_set", 1),
+        ("build_change_set/fetch_env_vars", 3),
+        ("render_table", 1),
+    ]
+
+
+def test_span_is_recorded_when_an_exception_is_raised(timings):
+    with pytest.raises(ValueError):
+        with span("load_job_configuration"):
+            raise ValueError()
+
+    with span("validate_jobs"):
+        pass
+
+    assert [phase["phase"] for phase in timings.to_json()["phases"]] == [
+        "load_job_configuration",
+        "validate_jobs",
+    ]
+
+
+def test_spans_in_threads_are_recorded(timings):
+    def fetch():
+        with span("fetch_env_vars"):
+            pass
+
+    threads = [threading.Thread(target=fetch) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert timings.phases[("fetch_env_vars",)].calls == 4
+
+
+def test_spans_are_not_recorded_without_timings():
+    timings = start_timings()
+    stop_timings()
+
+    with span("build_change_set"):
+        pass
+
+    assert timings.phases == {}
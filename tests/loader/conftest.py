@@ -211,6 +211,7 @@ def expected_config_dict():
                 "dbt_version": None,
                 "deferring_environment_id": None,
                 "deferring_job_definition_id": None,
+                "deferring_job_identifier": None,
                 "description": "",
                 "environment_id": 134459,
                 "execute_steps": [
@@ -269,6 +270,7 @@ def expected_config_dict():
                 "dbt_version": None,
                 "deferring_environment_id": None,
                 "deferring_job_definition_id": None,
+                "deferring_job_identifier": None,
                 "description": "",
                 "environment_id": 134459,
                 "execute_steps": ["dbt run-operation clone_all_production_schemas", "dbt compile"],
@@ -277,7 +279,12 @@ def expected_config_dict():
                 "id": None,
                 "identifier": "job2",
                 "job_completion_trigger_condition": {
-                    "condition": {"job_id": 123, "project_id": 234, "statuses": [10, 20]}
+                    "condition": {
+                        "job_id": 123,
+                        "job_identifier": None,
+                        "project_id": 234,
+                        "statuses": [10, 20],
+                    }
                 },
                 "job_type": "other",
                 "linked_id": None,
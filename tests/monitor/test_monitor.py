@@ -0,0 +1,207 @@
+import io
+import json
+from unittest.mock import Mock, patch
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.monitor import DriftMonitor, json_lines_emitter
+from dbt_jobs_as_code.schemas.common_types import Settings, Triggers
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from dbt_jobs_as_code.snapshot.cloud_snapshot import CloudSnapshot
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+
+def _raw_job(job_id: int, identifier: str, updated_at: str, threads: int = 4) -> dict:
+    return {
+        "id": job_id,
+        "account_id": 1,
+        "project_id": 10,
+        "environment_id": 100,
+        "name": f"Job [[{identifier}]]",
+        "execute_steps": ["dbt run"],
+        "settings": {"threads": threads, "target_name": "default"},
+        "triggers": {"github_webhook": False, "schedule": True},
+        "schedule": {"cron": "0 0 * * *"},
+        "state": 1,
+        "generate_docs": False,
+        "run_generate_sources": False,
+        "updated_at": updated_at,
+    }
+
+
+def _defined_job(identifier: str) -> JobDefinition:
+    return JobDefinition(
+        identifier=identifier,
+        account_id=1,
+        project_id=10,
+        environment_id=100,
+        name="Job",
+        settings=Settings(threads=4),
+        run_generate_sources=False,
+        execute_steps=["dbt run"],
+        generate_docs=False,
+        schedule={"cron": "0 0 * * *"},
+        triggers=Triggers(schedule=True),
+    )
+
+
+@pytest.fixture
+def dbt_cloud():
+    client = Mock(spec=DBTCloud)
+    client.account_id = 1
+    client.get_raw_jobs.return_value = [
+        _raw_job(1, "job_1", "2024-01-01T00:00:00+00:00"),
+        _raw_job(2, "job_2", "2024-01-02T00:00:00+00:00", threads=8),
+        _raw_job(3, "job_3", "2024-01-03T00:00:00+00:00"),
+    ]
+    client.get_env_vars.return_value = {}
+    return client
+
+
+@pytest.fixture
+def monitor(dbt_cloud):
+    defined_jobs = {identifier: _defined_job(identifier) for identifier in ["job_1", "job_2"]}
+    defined_jobs["job_4"] = _defined_job("job_4")
+    return DriftMonitor(
+        defined_jobs=defined_jobs,
+        dbt_cloud=dbt_cloud,
+        snapshot=CloudSnapshot(account_id=1),
+        emit=Mock(),
+    )
+
+
+def test_first_poll_reports_current_drift(monitor):
+    events = monitor.poll()
+
+    assert [(event.event, event.kind, event.identifier) for event in events] == [
+        ("drift", "changed", "job_2"),
+        ("drift", "unexpected", "job_3"),
+        ("drift", "missing", "job_4"),
+    ]
+    assert monitor.emit.call_count == 3
+
+
+def test_following_polls_only_check_changed_jobs(monitor, dbt_cloud):
+    monitor.poll()
+    dbt_cloud.get_env_vars.reset_mock()
+
+    dbt_cloud.get_jobs_updated_since.return_value = [
+        _raw_job(2, "job_2", "2024-01-05T00:00:00+00:00"),
+        _raw_job(1, "job_1", "2024-01-04T00:00:00+00:00", threads=2),
+    ]
+
+    events = monitor.poll()
+
+    assert [(event.event, event.kind, event.identifier) for event in events] == [
+        ("drift", "changed", "job_1"),
+        ("resolved", "changed", "job_2"),
+    ]
+    assert dbt_cloud.get_env_vars.call_count == 2
+    dbt_cloud.get_raw_jobs.assert_called_once()
+
+
+def test_unchanged_drift_is_not_reported_twice(monitor, dbt_cloud):
+    monitor.poll()
+    dbt_cloud.get_jobs_updated_since.return_value = [
+        _raw_job(2, "job_2", "2024-01-05T00:00:00+00:00", threads=8),
+    ]
+
+    assert monitor.poll() == []
+
+
+def test_env_var_drift(monitor, dbt_cloud):
+    monitor.defined_jobs["job_1"] = _defined_job("job_1").model_copy(
+        update={"custom_environment_variables": []}
+    )
+    env_var = Mock(id=12, value="dev")
+    dbt_cloud.get_env_vars.side_effect = lambda project_id, job_id: (
+        {"DBT_TARGET": env_var} if job_id == 1 else {}
+    )
+
+    events = monitor.poll()
+
+    job_1_event = next(event for event in events if event.identifier == "job_1")
+    assert job_1_event.differences == {
+        "env_vars": {"DBT_TARGET": {"old_value": "dev", "new_value": None}}
+    }
+
+
+def test_json_lines_emitter(monitor):
+    stream = io.StringIO()
+    monitor.emit = json_lines_emitter(stream)
+
+    monitor.poll()
+
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [line["identifier"] for line in lines] == ["job_2", "job_3", "job_4"]
+    assert lines[0]["differences"]["values_changed"]["root['settings']['threads']"] == {
+        "new_value": 4,
+        "old_value": 8,
+    }
+
+
+def test_poll_requests_are_proportional_to_the_changes():
+    with FakeDbtCloud(api_key="fake-api-key", page_size=10) as fake:
+        fake.seed_jobs(100)
+        dbt_cloud = DBTCloud(
+            account_id=fake.account_id, api_key="fake-api-key", base_url=fake.base_url
+        )
+        drift_monitor = DriftMonitor(
+            defined_jobs={},
+            dbt_cloud=dbt_cloud,
+            snapshot=CloudSnapshot(account_id=fake.account_id),
+            emit=Mock(),
+            reconcile_every=3,
+        )
+
+        def poll_requests():
+            request_count = fake.request_count
+            events = drift_monitor.poll()
+            return fake.request_count - request_count, events
+
+        # the first poll lists all the jobs
+        assert poll_requests()[0] == 10
+        # the following ones only download the jobs updated since the previous poll
+        fake.jobs[7] = {**fake.jobs[7], "updated_at": "2030-01-01T00:00:00+00:00"}
+        assert poll_requests()[0] == 1
+        del fake.jobs[8]
+        requests, events = poll_requests()
+        assert requests == 1
+        assert events == []
+        # until all the jobs are listed again to find the deleted ones
+        requests, events = poll_requests()
+        assert requests == 10
+        assert [(event.event, event.identifier) for event in events] == [("resolved", "job_8")]
+        assert poll_requests()[0] == 1
+
+
+def test_monitor_command_uses_the_account_credentials(tmp_path):
+    with FakeDbtCloud(api_key="account-api-key") as fake:
+        yml_jobs = synthetic.yml_jobs(fake.seed_jobs(2))
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        runner = CliRunner(
+            env={
+                "DBT_API_KEY": "other-api-key",
+                f"DBT_API_KEY_{fake.account_id}": "account-api-key",
+                "DBT_BASE_URL": fake.base_url,
+            }
+        )
+
+        with patch("dbt_jobs_as_code.monitor.logger") as monitor_logger:
+            result = runner.invoke(cli, ["monitor", str(jobs_file), "--max-polls", "1"])
+        assert result.exit_code == 0, result.output
+        monitor_logger.error.assert_not_called()
+        monitor_logger.info.assert_called_once_with("Polled dbt Cloud, 0 drift events")
+
+        # the jobs of another account can't be monitored at the same time
+        yml_jobs["job_1"]["account_id"] = fake.account_id + 1
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        request_count = fake.request_count
+        result = runner.invoke(cli, ["monitor", str(jobs_file), "--max-polls", "1"])
+        assert result.exit_code == 1
+        assert fake.request_count == request_count
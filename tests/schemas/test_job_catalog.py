@@ -0,0 +1,96 @@
+import re
+
+import pytest
+
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from dbt_jobs_as_code.schemas.job_catalog import JobCatalog
+
+
+def _job(job_id, project_id=1, environment_id=10, identifier=None):
+    name = f"Job {job_id}" if identifier is None else f"Job {job_id} [[{identifier}]]"
+    return JobDefinition(
+        id=job_id,
+        name=name,
+        account_id=1,
+        project_id=project_id,
+        environment_id=environment_id,
+        settings={},
+        schedule={"cron": "0 0 * * *"},
+        triggers={},
+        execute_steps=[],
+        run_generate_sources=False,
+        generate_docs=False,
+    )
+
+
+@pytest.fixture
+def catalog():
+    return JobCatalog(
+        [
+            _job(1, project_id=1, environment_id=10, identifier="prod:daily"),
+            _job(2, project_id=1, environment_id=11, identifier="dev:nightly"),
+            _job(3, project_id=2, environment_id=20),
+            _job(4, project_id=2, environment_id=21, identifier="hourly"),
+            _job(5, project_id=2, environment_id=21, identifier="*:weekly"),
+        ]
+    )
+
+
+def _ids(catalog):
+    return [job.id for job in catalog]
+
+
+def test_lookups(catalog):
+    assert catalog.get(3).name == "Job 3"
+    assert catalog.get(99) is None
+    assert catalog.by_identifier("hourly").id == 4
+    assert catalog.by_identifier("unknown") is None
+    assert set(catalog.identifiers()) == {"daily", "nightly", "hourly", "weekly"}
+    assert catalog.job_ids_by_identifier()["weekly"] == 5
+
+
+def test_where_combines_the_criteria(catalog):
+    assert _ids(catalog.where(project_ids=[2])) == [3, 4, 5]
+    assert _ids(catalog.where(project_ids=[1, 2], environment_ids=[10, 21])) == [1, 4, 5]
+    assert _ids(catalog.where(job_ids=[1, 5], project_ids=[2])) == [5]
+    assert _ids(catalog.where(identifiers=["daily", "unknown"])) == [1]
+    # the criteria not given don't filter the jobs
+    assert catalog.where(project_ids=[], environment_ids=None) is catalog
+    # the queries can be chained
+    assert _ids(catalog.where(project_ids=[2]).managed().where(environment_ids=[21])) == [4, 5]
+
+
+def test_managed_and_excluding(catalog):
+    assert _ids(catalog.managed()) == [1, 2, 4, 5]
+    excluded = catalog.identifiers_matching(re.compile("ly$"))
+    assert excluded == ["daily", "nightly", "hourly", "weekly"]
+    assert _ids(catalog.excluding(["nightly", "weekly"])) == [1, 3, 4]
+
+
+def test_matching_import_filter(catalog):
+    assert catalog.matching_import_filter(None) is catalog
+    assert _ids(catalog.matching_import_filter("prod")) == [1, 3, 4, 5]
+    assert _ids(catalog.matching_import_filter("staging")) == [3, 4, 5]
+
+
+def test_queries_return_views_sharing_the_indexes(catalog):
+    view = catalog.where(project_ids=[2]).managed()
+
+    assert view._indexes is catalog._indexes
+    assert _ids(view) == [4, 5]
+    # the lookups only find the jobs of the view
+    assert view.get(1) is None
+    assert view.by_identifier("hourly").id == 4
+    assert view.by_identifier("daily") is None
+    assert list(view.identifiers()) == ["hourly", "weekly"]
+    assert _ids(view.where(identifiers=["daily", "weekly"])) == [5]
+    assert _ids(view.excluding(["hourly"])) == [5]
+    assert view.where(project_ids=[2]) is view
+
+
+def test_duplicate_identifiers():
+    catalog = JobCatalog([_job(1, identifier="same"), _job(2, identifier="same")])
+
+    assert catalog.by_identifier("same").id == 2
+    assert catalog.jobs_by_identifier()["same"].id == 2
+    assert _ids(catalog.where(identifiers=["same"])) == [1, 2]
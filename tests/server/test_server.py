@@ -0,0 +1,189 @@
+import json
+import textwrap
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import Mock, patch
+
+import pytest
+
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.schemas.job import JobDefinition
+from dbt_jobs_as_code.server import JobsAsCodeServer
+
+CONFIG = textwrap.dedent("""
+    jobs:
+      job_1:
+        account_id: {account_id}
+        project_id: 10
+        environment_id: 100
+        name: Job 1
+        settings:
+          threads: 8
+          target_name: prod
+        run_generate_sources: false
+        execute_steps:
+          - dbt run
+        generate_docs: false
+        schedule:
+          cron: 0 0 * * *
+        triggers:
+          github_webhook: false
+          schedule: true
+    """)
+
+
+def _raw_job(account_id: int) -> dict:
+    return {
+        "id": 1,
+        "account_id": account_id,
+        "project_id": 10,
+        "environment_id": 100,
+        "name": "Job 1 [[job_1]]",
+        "execute_steps": ["dbt run"],
+        "settings": {"threads": 4, "target_name": "prod"},
+        "triggers": {"github_webhook": False, "schedule": True},
+        "schedule": {"cron": "0 0 * * *"},
+        "state": 1,
+        "generate_docs": False,
+        "run_generate_sources": False,
+        "updated_at": "2024-01-01T00:00:00+00:00",
+    }
+
+
+def _client(account_id, **kwargs):
+    client = Mock(spec=DBTCloud)
+    client.account_id = account_id
+    client.get_raw_jobs.return_value = [_raw_job(account_id)]
+    client.get_env_vars.return_value = {}
+    client.build_mapping_job_identifier_job_id.return_value = {"job_1": 1}
+    return client
+
+
+@pytest.fixture
+def server(monkeypatch):
+    monkeypatch.setenv("DBT_API_KEY", "test")
+    monkeypatch.setenv("DBT_API_KEY_2", "test-account-2")
+    with patch("dbt_jobs_as_code.server.DBTCloud", side_effect=_client) as mock_dbt_cloud:
+        app = JobsAsCodeServer()
+        http_server = app.make_http_server("127.0.0.1", 0)
+        thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+        thread.start()
+        http_server.mock_dbt_cloud = mock_dbt_cloud
+        yield http_server
+        http_server.shutdown()
+        http_server.server_close()
+
+
+def _post(server, path, payload):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.server_port}{path}",
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_plan_endpoint(server):
+    status, payload = _post(server, "/plan", {"config": CONFIG.format(account_id=1)})
+
+    assert status == 200
+    assert [change["identifier"] for change in payload["job_changes"]] == ["job_1"]
+    assert payload["job_changes"][0]["action"] == "UPDATE"
+    assert payload["env_var_overwrite_changes"] == []
+
+
+def test_clients_and_snapshots_are_reused_per_account(server):
+    for account_id in [1, 2, 1, 2]:
+        status, _ = _post(
+            server, "/plan", {"config": {"jobs.yml": CONFIG.format(account_id=account_id)}}
+        )
+        assert status == 200
+
+    assert server.mock_dbt_cloud.call_count == 2
+    for account_id in [1, 2]:
+        client = server.app.account_context(account_id).dbt_cloud
+        assert client.get_raw_jobs.call_count == 2
+
+
+def test_unchanged_jobs_are_not_parsed_again(server):
+    payload = {"config": CONFIG.format(account_id=1)}
+    _post(server, "/plan", payload)
+    client = server.app.account_context(1).dbt_cloud
+    # dbt Cloud returns new but equal dicts for the jobs that didn't change
+    client.get_raw_jobs.return_value = None
+    client.get_raw_jobs.side_effect = lambda **kwargs: [_raw_job(1)]
+
+    with patch("dbt_jobs_as_code.server.JobDefinition", wraps=JobDefinition) as parse:
+        for _ in range(2):
+            status, _ = _post(server, "/plan", payload)
+            assert status == 200
+
+    parse.assert_not_called()
+
+
+def test_bundle_with_several_accounts(server):
+    status, payload = _post(
+        server,
+        "/plan",
+        {
+            "config": [
+                CONFIG.format(account_id=2),
+                CONFIG.format(account_id=1).replace("job_1:", "job_2:"),
+            ]
+        },
+    )
+
+    assert status == 200
+    # job_1 is only in the YML of the account 2, it is deleted from the account 1
+    assert [(change["identifier"], change["action"]) for change in payload["job_changes"]] == [
+        ("job_2", "CREATE"),
+        ("job_1", "DELETE"),
+        ("job_1", "UPDATE"),
+    ]
+    # each account is compared with its own jobs and credentials
+    api_keys = {
+        call.kwargs["account_id"]: call.kwargs["api_key"]
+        for call in server.mock_dbt_cloud.call_args_list
+    }
+    assert api_keys == {1: "test", 2: "test-account-2"}
+
+
+def test_sync_endpoint_applies_the_changes(server):
+    status, payload = _post(server, "/sync", {"config": [CONFIG.format(account_id=1)]})
+
+    assert status == 200
+    assert payload["apply_success"] is True
+    assert payload["applied"]["job_changes"][0]["identifier"] == "job_1"
+    server.app.account_context(1).dbt_cloud.update_job.assert_called_once()
+
+
+def test_invalid_bundle(server):
+    status, payload = _post(server, "/plan", {"files": []})
+    assert status == 400
+    assert "config" in payload["error"]
+
+    status, payload = _post(server, "/plan", {"config": "jobs:\n  job_1:\n    name: x\n"})
+    assert status == 400
+
+
+def test_bundle_with_an_unknown_job_reference(server):
+    config = CONFIG.format(account_id=1) + "    deferring_job_identifier: unknown_job\n"
+
+    status, payload = _post(server, "/plan", {"config": config})
+
+    assert status == 400
+    assert "server logs" in payload["error"]
+    # the lock of the account was released
+    status, _ = _post(server, "/plan", {"config": CONFIG.format(account_id=1)})
+    assert status == 200
+
+
+def test_unknown_path(server):
+    status, _ = _post(server, "/apply", {"config": CONFIG.format(account_id=1)})
+    assert status == 404
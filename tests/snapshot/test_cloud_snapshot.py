@@ -0,0 +1,246 @@
+import json
+from unittest.mock import Mock
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.client import DBTCloud
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.snapshot.cloud_snapshot import (
+    CACHE_LISTING_EVERY,
+    CloudSnapshot,
+    CloudSnapshotError,
+    refresh_cached_snapshot,
+)
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+
+def _raw_job(job_id: int, updated_at: str, name: str = "Job") -> dict:
+    return {
+        "id": job_id,
+        "account_id": 1,
+        "project_id": 10,
+        "environment_id": 100,
+        "name": f"{name} {job_id} [[job_{job_id}]]",
+        "execute_steps": ["dbt run"],
+        "settings": {"threads": 4, "target_name": "prod"},
+        "triggers": {"github_webhook": False, "schedule": True},
+        "schedule": {"cron": "0 0 * * *"},
+        "state": 1,
+        "generate_docs": False,
+        "run_generate_sources": False,
+        "updated_at": updated_at,
+    }
+
+
+@pytest.fixture
+def dbt_cloud():
+    client = Mock(spec=DBTCloud)
+    client.account_id = 1
+    client.get_raw_jobs.return_value = [
+        _raw_job(1, "2024-01-01T10:00:00+00:00"),
+        _raw_job(2, "2024-01-02T10:00:00+00:00"),
+        _raw_job(3, "2024-01-03T10:00:00+00:00"),
+    ]
+    return client
+
+
+def test_first_refresh_downloads_everything(dbt_cloud):
+    snapshot = CloudSnapshot(account_id=1)
+
+    refresh = snapshot.refresh(dbt_cloud)
+
+    assert refresh.full is True
+    assert refresh.updated_job_ids == {1, 2, 3}
+    assert snapshot.watermark == "2024-01-03T10:00:00+00:00"
+    dbt_cloud.get_jobs_updated_since.assert_not_called()
+    assert {job.identifier for job in snapshot.get_jobs()} == {"job_1", "job_2", "job_3"}
+
+
+def test_refresh_merges_updates_and_drops_deleted_jobs_from_one_listing(dbt_cloud):
+    snapshot = CloudSnapshot(account_id=1)
+    snapshot.refresh(dbt_cloud)
+
+    dbt_cloud.get_raw_jobs.return_value = [
+        _raw_job(4, "2024-01-05T10:00:00+00:00"),
+        _raw_job(2, "2024-01-04T10:00:00+00:00", name="Renamed"),
+        _raw_job(3, "2024-01-03T10:00:00+00:00"),
+    ]
+
+    refresh = snapshot.refresh(dbt_cloud)
+
+    assert dbt_cloud.get_raw_jobs.call_count == 2
+    dbt_cloud.get_jobs_updated_since.assert_not_called()
+    assert refresh.full is False
+    assert refresh.updated_job_ids == {2, 4}
+    assert refresh.deleted_job_ids == {1}
+    assert set(snapshot.jobs) == {2, 3, 4}
+    assert snapshot.jobs[2]["name"].startswith("Renamed")
+    assert snapshot.watermark == "2024-01-05T10:00:00+00:00"
+
+
+def test_incremental_refresh_without_deletions(dbt_cloud):
+    snapshot = CloudSnapshot(account_id=1)
+    snapshot.refresh(dbt_cloud)
+
+    dbt_cloud.get_jobs_updated_since.return_value = [
+        _raw_job(2, "2024-01-04T10:00:00+00:00", name="Renamed"),
+        _raw_job(3, "2024-01-03T10:00:00+00:00"),
+    ]
+
+    refresh = snapshot.refresh(dbt_cloud, detect_deletions=False)
+
+    dbt_cloud.get_raw_jobs.assert_called_once()
+    dbt_cloud.get_jobs_updated_since.assert_called_once_with(
+        "2024-01-03T10:00:00+00:00", project_ids=[], environment_ids=[]
+    )
+    assert refresh.updated_job_ids == {2}
+    assert refresh.deleted_job_ids == set()
+    assert set(snapshot.jobs) == {1, 2, 3}
+    assert snapshot.watermark == "2024-01-04T10:00:00+00:00"
+
+
+def test_refresh_rejects_other_account(dbt_cloud):
+    snapshot = CloudSnapshot(account_id=2)
+
+    with pytest.raises(CloudSnapshotError):
+        snapshot.refresh(dbt_cloud)
+
+
+def test_dump_and_load_round_trip(tmp_path, dbt_cloud):
+    snapshot = CloudSnapshot(account_id=1, project_ids=[10, 10], environment_ids=[100])
+    snapshot.refresh(dbt_cloud)
+    path = str(tmp_path / "snapshot.jsonl.gz")
+
+    snapshot.dump(path)
+    loaded = CloudSnapshot.load(path)
+
+    assert loaded.matches(1, [10], [100])
+    assert not loaded.matches(1, [10], [])
+    assert loaded.watermark == snapshot.watermark
+    assert loaded.jobs == snapshot.jobs
+
+
+def test_refresh_cached_snapshot_only_downloads_the_updated_jobs(tmp_path, dbt_cloud):
+    path = str(tmp_path / "cache.jsonl.gz")
+    dbt_cloud.get_jobs_updated_since.return_value = [
+        _raw_job(3, "2024-01-04T10:00:00+00:00", name="Renamed")
+    ]
+
+    refresh_cached_snapshot(path, dbt_cloud, project_ids=[10])
+    snapshot = refresh_cached_snapshot(path, dbt_cloud, project_ids=[10])
+
+    assert dbt_cloud.get_raw_jobs.call_count == 1
+    dbt_cloud.get_jobs_updated_since.assert_called_once_with(
+        "2024-01-03T10:00:00+00:00", project_ids=[10], environment_ids=[]
+    )
+    assert snapshot.jobs[3]["name"] == "Renamed 3 [[job_3]]"
+
+
+def test_refresh_cached_snapshot_lists_all_the_jobs_from_time_to_time(tmp_path, dbt_cloud):
+    path = str(tmp_path / "cache.jsonl.gz")
+    dbt_cloud.get_jobs_updated_since.return_value = []
+
+    for _ in range(CACHE_LISTING_EVERY):
+        refresh_cached_snapshot(path, dbt_cloud)
+    assert dbt_cloud.get_raw_jobs.call_count == 1
+    assert dbt_cloud.get_jobs_updated_since.call_count == CACHE_LISTING_EVERY - 1
+
+    # the jobs deleted in dbt Cloud are found by the next listing of all the jobs
+    dbt_cloud.get_raw_jobs.return_value = dbt_cloud.get_raw_jobs.return_value[1:]
+    snapshot = refresh_cached_snapshot(path, dbt_cloud)
+    assert dbt_cloud.get_raw_jobs.call_count == 2
+    assert set(snapshot.jobs) == {2, 3}
+
+
+def test_refresh_cached_snapshot_for_sync_lists_all_the_jobs_twice(tmp_path, dbt_cloud):
+    path = str(tmp_path / "cache.jsonl.gz")
+    dbt_cloud.get_jobs_updated_since.return_value = []
+
+    refresh_cached_snapshot(path, dbt_cloud)
+    refresh_cached_snapshot(path, dbt_cloud, for_sync=True)
+    # the run after the sync lists all the jobs again, to find the jobs the sync deleted
+    refresh_cached_snapshot(path, dbt_cloud)
+    refresh_cached_snapshot(path, dbt_cloud)
+
+    assert dbt_cloud.get_raw_jobs.call_count == 3
+    dbt_cloud.get_jobs_updated_since.assert_called_once()
+
+
+def test_refresh_cached_snapshot_restarts_when_filters_change(tmp_path, dbt_cloud):
+    path = str(tmp_path / "cache.jsonl.gz")
+
+    refresh_cached_snapshot(path, dbt_cloud, project_ids=[10])
+    refresh_cached_snapshot(path, dbt_cloud, project_ids=[11])
+
+    assert dbt_cloud.get_raw_jobs.call_count == 2
+    dbt_cloud.get_jobs_updated_since.assert_not_called()
+
+
+def test_plan_with_a_warm_cloud_cache_only_downloads_the_updated_jobs(tmp_path):
+    with FakeDbtCloud(api_key="fake-api-key", page_size=10) as fake:
+        cloud_jobs = fake.seed_jobs(50)
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": synthetic.yml_jobs(cloud_jobs)}))
+        runner = CliRunner(env={"DBT_API_KEY": "fake-api-key", "DBT_BASE_URL": fake.base_url})
+        cache = str(tmp_path / "cache.jsonl.gz")
+
+        request_counts = []
+        for options in [[], ["--cloud-cache", cache], ["--cloud-cache", cache]]:
+            request_count = fake.request_count
+            result = runner.invoke(cli, ["plan", "--json", str(jobs_file), *options])
+            assert result.exit_code == 0, result.output
+            request_counts.append(fake.request_count - request_count)
+
+        # 5 pages of jobs without the cache or with a cold one, 1 page with a warm one
+        assert request_counts[0] == request_counts[1] == request_counts[2] + 4
+
+
+def test_plan_after_a_sync_with_a_cloud_cache_sees_the_deleted_jobs(tmp_path):
+    with FakeDbtCloud(api_key="fake-api-key") as fake:
+        yml_jobs = synthetic.yml_jobs(fake.seed_jobs(5))
+        del yml_jobs["job_5"]
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        runner = CliRunner(env={"DBT_API_KEY": "fake-api-key", "DBT_BASE_URL": fake.base_url})
+        cache = str(tmp_path / "cache.jsonl.gz")
+
+        result = runner.invoke(cli, ["plan", "--json", str(jobs_file), "--cloud-cache", cache])
+        assert result.exit_code == 0, result.output
+        result = runner.invoke(cli, ["sync", "--json", str(jobs_file), "--cloud-cache", cache])
+        assert result.exit_code == 0, result.output
+        assert json.loads(result.stdout)["apply_success"] is True
+        result = runner.invoke(cli, ["plan", "--json", str(jobs_file), "--cloud-cache", cache])
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.stdout)["job_changes"] == []
+
+
+def test_snapshot_command_uses_the_account_credentials(tmp_path):
+    with FakeDbtCloud(api_key="account-api-key") as fake:
+        fake.seed_jobs(3)
+        credentials_file = tmp_path / "accounts.yml"
+        credentials_file.write_text(
+            f"accounts:\n  {fake.account_id}:\n    api_key_env: ACCOUNT_TOKEN\n"
+            f"    base_url: {fake.base_url}\n"
+        )
+        runner = CliRunner(
+            env={"DBT_API_KEY": "other-api-key", "ACCOUNT_TOKEN": "account-api-key"}
+        )
+        output = str(tmp_path / "snapshot.jsonl.gz")
+
+        result = runner.invoke(
+            cli,
+            [
+                "snapshot",
+                output,
+                "--account-id",
+                str(fake.account_id),
+                "--account-credentials",
+                str(credentials_file),
+            ],
+        )
+
+        assert result.exit_code == 0, result.output
+        assert len(CloudSnapshot.load(output)) == 3
@@ -0,0 +1,145 @@
+import textwrap
+from unittest.mock import Mock
+
+import pytest
+from click.testing import CliRunner
+
+from dbt_jobs_as_code.client import DBTCloud, DBTCloudException
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import build_change_set
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.snapshot.cloud_snapshot import (
+    CloudSnapshot,
+    CloudSnapshotError,
+    CloudSnapshotWriter,
+    OfflineDBTCloud,
+    export_snapshot,
+)
+
+
+def _raw_job(job_id: int, identifier: str, threads: int = 4) -> dict:
+    return {
+        "id": job_id,
+        "account_id": 1,
+        "project_id": 10,
+        "environment_id": 100,
+        "name": f"Job {job_id} [[{identifier}]]",
+        "execute_steps": ["dbt run"],
+        "settings": {"threads": threads, "target_name": "prod"},
+        "triggers": {"github_webhook": False, "schedule": True},
+        "schedule": {"cron": "0 0 * * *"},
+        "state": 1,
+        "generate_docs": False,
+        "run_generate_sources": False,
+        "updated_at": f"2024-01-0{job_id}T00:00:00+00:00",
+    }
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    config = tmp_path / "jobs.yml"
+    config.write_text(
+        textwrap.dedent("""
+        jobs:
+          job_1:
+            account_id: 1
+            project_id: 10
+            environment_id: 100
+            name: Job 1
+            settings:
+              threads: 8
+              target_name: prod
+            run_generate_sources: false
+            execute_steps:
+              - dbt run
+            generate_docs: false
+            schedule:
+              cron: 0 0 * * *
+            triggers:
+              github_webhook: false
+              schedule: true
+            custom_environment_variables:
+              - DBT_TARGET: prod
+        """)
+    )
+    return str(config)
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+    with CloudSnapshotWriter(path, account_id=1) as writer:
+        writer.write_jobs([_raw_job(1, "job_1"), _raw_job(2, "job_2")])
+        writer.write_env_vars(10, 1, {"DBT_TARGET": {"job": {"id": 55, "value": "dev"}}})
+        writer.write_env_vars(10, 2, {})
+    return path
+
+
+def test_export_snapshot_streams_jobs_and_managed_env_vars(tmp_path):
+    dbt_cloud = Mock(spec=DBTCloud)
+    dbt_cloud.account_id = 1
+    unmanaged_job = _raw_job(3, "x")
+    unmanaged_job["name"] = "Unmanaged"
+    dbt_cloud.iter_raw_job_pages.return_value = iter(
+        [[_raw_job(1, "job_1"), _raw_job(2, "job_2")], [unmanaged_job]]
+    )
+    dbt_cloud.get_raw_env_vars.return_value = {"DBT_A": {"job": {"id": 1, "value": "a"}}}
+    path = str(tmp_path / "snapshot.jsonl.gz")
+
+    job_count = export_snapshot(path, dbt_cloud, project_ids=[10])
+
+    assert job_count == 3
+    snapshot = CloudSnapshot.load(path)
+    assert snapshot.project_ids == [10]
+    assert set(snapshot.jobs) == {1, 2, 3}
+    assert set(snapshot.env_vars) == {1, 2}
+    assert snapshot.watermark == "2024-01-03T00:00:00+00:00"
+
+
+def test_offline_client_reads_from_the_snapshot(snapshot_file):
+    dbt_cloud = OfflineDBTCloud(CloudSnapshot.load(snapshot_file))
+
+    assert [job.id for job in dbt_cloud.get_jobs(project_ids=[10])] == [1, 2]
+    assert dbt_cloud.get_jobs(environment_ids=[999]) == []
+    assert dbt_cloud.get_env_vars(project_id=10, job_id=1)["DBT_TARGET"].value == "dev"
+    with pytest.raises(DBTCloudException):
+        dbt_cloud.delete_job(job=dbt_cloud.get_jobs()[0])
+
+
+def test_offline_client_rejects_filters_not_covered_by_the_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.jsonl.gz")
+    with CloudSnapshotWriter(path, account_id=1, project_ids=[10]) as writer:
+        writer.write_jobs([_raw_job(1, "job_1")])
+    dbt_cloud = OfflineDBTCloud(CloudSnapshot.load(path))
+
+    assert len(dbt_cloud.get_jobs(project_ids=[10])) == 1
+    with pytest.raises(CloudSnapshotError):
+        dbt_cloud.get_jobs()
+    with pytest.raises(CloudSnapshotError):
+        dbt_cloud.get_env_vars(project_id=10, job_id=1)
+
+
+def test_build_change_set_against_a_snapshot(config_file, snapshot_file):
+    change_set = build_change_set(
+        config_file,
+        None,
+        False,
+        [],
+        [],
+        snapshot=snapshot_file,
+    )
+
+    changes = {(change.action.upper(), change.identifier) for change in change_set}
+    assert changes == {
+        ("UPDATE", "job_1"),
+        ("DELETE", "job_2"),
+        ("UPDATE", "job_1:DBT_TARGET"),
+    }
+
+
+def test_plan_command_with_snapshot_and_cloud_cache(config_file, snapshot_file):
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["plan", config_file, "--snapshot", snapshot_file, "--cloud-cache", "cache.gz"]
+    )
+
+    assert result.exit_code == 1
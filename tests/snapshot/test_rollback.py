@@ -0,0 +1,141 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from benchmarks import synthetic
+from dbt_jobs_as_code.cloud_yaml_mapping.change_set import ChangeSet
+from dbt_jobs_as_code.main import cli
+from dbt_jobs_as_code.snapshot.rollback import RollbackArtifactError, read_rollback_artifact
+from tests.fake_dbt_cloud import FakeDbtCloud
+
+API_KEY = "fake-api-key"
+
+
+def _add_overwrite(fake, job_id, name, value):
+    env_var = fake.add_project_env_var(10, name, value)
+    env_var.update(type="job", job_definition_id=job_id)
+
+
+def _state(fake):
+    """The jobs by name, with their threads and env var overwrites."""
+    return {
+        job["name"]: (
+            job["settings"]["threads"],
+            {
+                env_var["name"]: env_var["raw_value"]
+                for env_var in fake.env_vars.values()
+                if env_var["job_definition_id"] == job_id
+            },
+        )
+        for job_id, job in fake.jobs.items()
+    }
+
+
+@pytest.fixture
+def synced(tmp_path):
+    """A sync updating, creating and deleting jobs and env var overwrites."""
+    with FakeDbtCloud(api_key=API_KEY) as fake:
+        cloud_jobs = [dict(job) for job in fake.seed_jobs(6)]
+        fake.add_project_env_var(10, "DBT_A", "default")
+        _add_overwrite(fake, 1, "DBT_A", "old")
+        _add_overwrite(fake, 3, "DBT_A", "kept")
+        state_before = _state(fake)
+
+        yml_jobs = synthetic.yml_jobs(cloud_jobs, changed_every=2)
+        yml_jobs["job_1"]["custom_environment_variables"] = [{"DBT_A": "new"}]
+        yml_jobs["job_5"]["custom_environment_variables"] = [{"DBT_A": "added"}]
+        yml_jobs["new_job"] = {
+            **yml_jobs["job_1"],
+            "name": "New job",
+            "custom_environment_variables": [{"DBT_A": "created"}],
+        }
+        del yml_jobs["job_3"]
+        jobs_file = tmp_path / "jobs.yml"
+        jobs_file.write_text(json.dumps({"jobs": yml_jobs}))
+        artifact = tmp_path / "rollback.jsonl.gz"
+
+        runner = CliRunner(env={"DBT_API_KEY": API_KEY, "DBT_BASE_URL": fake.base_url})
+        result = runner.invoke(
+            cli, ["sync", "--json", "--rollback-artifact", str(artifact), str(jobs_file)]
+        )
+        assert result.exit_code == 0, result.output
+        assert _state(fake) != state_before
+
+        yield runner, fake, artifact, state_before
+
+
+def test_rollback_artifact_records_the_previous_state(synced):
+    _, _, artifact, _ = synced
+
+    records, created = read_rollback_artifact(str(artifact))
+
+    assert sorted(
+        (record["kind"], record["action"], record["identifier"]) for record in records
+    ) == [
+        ("deleted_job_env_var", "delete", "job_3:DBT_A"),
+        ("env_var", "create", "job_5:DBT_A"),
+        ("env_var", "create", "new_job:DBT_A"),
+        ("env_var", "update", "job_1:DBT_A"),
+        ("job", "create", "new_job"),
+        ("job", "delete", "job_3"),
+        ("job", "update", "job_2"),
+        ("job", "update", "job_4"),
+        ("job", "update", "job_6"),
+    ]
+    assert sorted(created) == [
+        ("env var overwrite", "job_5:DBT_A"),
+        ("env var overwrite", "new_job:DBT_A"),
+        ("job", "new_job"),
+    ]
+
+
+def test_rollback_restores_the_state_before_the_sync(synced):
+    runner, fake, artifact, state_before = synced
+
+    result = runner.invoke(cli, ["rollback", "--json", str(artifact)])
+
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output)["apply_success"] is True
+    assert _state(fake) == state_before
+
+
+def test_rollback_with_apply_workers(synced, monkeypatch):
+    runner, fake, artifact, state_before = synced
+    apply = ChangeSet.apply
+    workers_used = []
+
+    def recording_apply(self, *args, **kwargs):
+        workers_used.append(kwargs.get("workers"))
+        return apply(self, *args, **kwargs)
+
+    monkeypatch.setattr(ChangeSet, "apply", recording_apply)
+
+    result = runner.invoke(cli, ["rollback", "--json", "--apply-workers", "4", str(artifact)])
+
+    assert result.exit_code == 0, result.output
+    assert workers_used == [4]
+    assert json.loads(result.output)["apply_success"] is True
+    assert _state(fake) == state_before
+
+
+def test_rollback_dry_run(synced):
+    runner, fake, artifact, state_before = synced
+    state_after_sync = _state(fake)
+
+    result = runner.invoke(cli, ["rollback", "--json", "--dry-run", str(artifact)])
+
+    assert result.exit_code == 0, result.output
+    assert len(json.loads(result.output)["job_changes"]) == 5
+    assert _state(fake) == state_after_sync
+
+
+def test_invalid_rollback_artifact(tmp_path):
+    artifact = tmp_path / "rollback.jsonl.gz"
+    artifact.write_text("not gzipped")
+
+    with pytest.raises(RollbackArtifactError):
+        read_rollback_artifact(str(artifact))
+
+    result = CliRunner().invoke(cli, ["rollback", str(artifact)])
+    assert result.exit_code == 1
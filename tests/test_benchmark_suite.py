@@ -0,0 +1,35 @@
+from benchmarks.suite import compare, run_suite
+
+
+def test_suite_measures_each_operation():
+    results = run_suite([3], repeat=1)
+
+    assert [result["operation"] for result in results] == [
+        "load_job_configuration[plain]",
+        "load_job_configuration[anchored]",
+        "load_job_configuration[templated]",
+        "job_definition_from_payload",
+        "check_job_mapping_same",
+        "build_change_set",
+        "env_var_changes",
+        "change_set_to_json",
+        "change_set_to_table",
+        "export_jobs_yml",
+    ]
+    assert all(result["jobs"] == 3 and result["median_ms"] >= 0 for result in results)
+
+
+def test_compare_reports_regressions_over_the_threshold():
+    baseline = [
+        {"operation": "build_change_set", "jobs": 10, "median_ms": 100.0},
+        {"operation": "export_jobs_yml", "jobs": 10, "median_ms": 100.0},
+    ]
+    results = [
+        {"operation": "build_change_set", "jobs": 10, "median_ms": 150.0},
+        {"operation": "export_jobs_yml", "jobs": 10, "median_ms": 110.0},
+        {"operation": "export_jobs_yml", "jobs": 100, "median_ms": 900.0},
+    ]
+
+    assert compare(results, baseline, max_regression_pct=20) == [
+        "build_change_set (10 jobs): 100.0 ms -> 150.0 ms (+50%)"
+    ]
@@ -0,0 +1,41 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ["deepdiff", "jinja2", "requests", "rich", "ruamel.yaml"]
+
+
+def _imported_heavy_modules(code: str) -> list[str]:
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys\n{code}\nprint(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=REPO_ROOT,
+    )
+    return [module for module in result.stderr.splitlines()[-1].split(",") if module]
+
+
+@pytest.mark.parametrize("args", [["--help"], ["--version"], ["plan", "--help"]])
+def test_cli_help_does_not_import_heavy_modules(args):
+    code = (
+        "from dbt_jobs_as_code.main import cli\n"
+        f"try:\n    cli({args!r})\nexcept SystemExit:\n    pass"
+    )
+    assert _imported_heavy_modules(code) == []
+
+
+def test_loading_jobs_does_not_import_diff_or_client_modules():
+    code = (
+        "from dbt_jobs_as_code.loader.load import load_job_configuration\n"
+        "load_job_configuration(['example_jobs_file/jobs.yml'], None)"
+    )
+    assert _imported_heavy_modules(code) == ["ruamel.yaml"]
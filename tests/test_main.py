@@ -1,4 +1,5 @@
 import json
+import sys
 from unittest.mock import Mock, patch
 
 import pytest
@@ -14,7 +15,7 @@ from dbt_jobs_as_code.schemas.job import JobDefinition
 
 @pytest.fixture
 def mock_dbt_cloud():
-    with patch("dbt_jobs_as_code.main.DBTCloud") as mock:
+    with patch("dbt_jobs_as_code.client.DBTCloud", autospec=True) as mock:
         instance = mock.return_value
         # Create base job with common parameters
         base_job = JobDefinition(
@@ -171,7 +172,7 @@ def test_import_jobs_without_managed_only(mock_dbt_cloud):
 # ============= Plan Command Tests =============
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_plan_command_json_output(mock_build_change_set, mock_change_set):
     """Test that plan command produces valid JSON output when --json flag is used"""
     mock_build_change_set.return_value = mock_change_set
@@ -203,7 +204,7 @@ def test_plan_command_json_output(mock_build_change_set, mock_change_set):
     assert "differences" in env_var_change
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_plan_command_json_output_no_changes(mock_build_change_set, mock_empty_change_set):
     """Test that plan command produces valid JSON output with no changes"""
     mock_build_change_set.return_value = mock_empty_change_set
@@ -223,7 +224,62 @@ def test_plan_command_json_output_no_changes(mock_build_change_set, mock_empty_c
     }
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
+def test_plan_command_json_output_with_timings(mock_build_change_set, mock_change_set):
+    """Test that plan command adds the timings to the JSON output with --timings"""
+    mock_build_change_set.return_value = mock_change_set
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["plan", "--json", "--timings", "config.yml"])
+
+    assert result.exit_code == 0
+
+    json_output = json.loads(result.output)
+    assert len(json_output["job_changes"]) == 1
+    assert json_output["timings"]["total_ms"] >= 0
+    assert isinstance(json_output["timings"]["phases"], list)
+    assert json_output["timings"]["requests"] == []
+
+
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
+def test_sync_command_json_output_with_memory_profile(mock_build_change_set, mock_change_set):
+    """Test that sync command adds the memory profile to the JSON output with --profile-memory"""
+    mock_build_change_set.return_value = mock_change_set
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["sync", "--json", "--profile-memory", "config.yml"])
+
+    assert result.exit_code == 0
+    json_output = json.loads(result.output)
+    assert json_output["memory"]["peak_mb"] >= 0
+    assert [phase["phase"] for phase in json_output["memory"]["phases"]] == [
+        "apply_changes",
+        "apply_changes/apply_change",
+    ]
+    assert "timings" not in json_output
+
+
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
+def test_plan_command_otel_export(mock_build_change_set, mock_change_set, tmp_path):
+    """Test that plan command exports a span for the command with --otel-export"""
+    mock_build_change_set.return_value = mock_change_set
+    export_file = tmp_path / "otel.jsonl"
+
+    runner = CliRunner()
+    result = runner.invoke(
+        cli, ["plan", "--json", "--otel-export", str(export_file), "config.yml"]
+    )
+
+    assert result.exit_code == 0
+    assert "timings" not in json.loads(result.output)
+
+    traces, metrics = [json.loads(line) for line in export_file.read_text().splitlines()]
+    spans = traces["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    assert [span["name"] for span in spans] == ["dbt-jobs-as-code plan"]
+    assert "resourceMetrics" in metrics
+
+
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_plan_command_regular_output(mock_build_change_set, mock_change_set):
     """Test that plan command produces regular output when --json flag is not used"""
     mock_build_change_set.return_value = mock_change_set
@@ -238,10 +294,45 @@ def test_plan_command_regular_output(mock_build_change_set, mock_change_set):
         json.loads(result.output)
 
 
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.iter_change_set")
+def test_plan_command_jsonl_output(mock_iter_change_set, mock_change_set):
+    """Test that plan command prints one JSON object per change when --jsonl flag is used"""
+    printed_before_next_change = []
+
+    def iter_changes(*args, **kwargs):
+        for change in mock_change_set:
+            yield change
+            sys.stdout.flush()
+            printed_before_next_change.append(sys.stdout.buffer.getvalue().count(b"\n"))
+
+    mock_iter_change_set.side_effect = iter_changes
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["plan", "--jsonl", "config.yml"])
+
+    assert result.exit_code == 0
+    lines = [json.loads(line) for line in result.output.splitlines()]
+    assert [(line["type"], line["identifier"]) for line in lines] == [
+        ("Job", "job1"),
+        ("Env Var Overwrite", "job1:DBT_VAR1"),
+    ]
+    assert lines[0] == mock_change_set.to_json()["job_changes"][0]
+    # each change is printed before the next one is computed
+    assert printed_before_next_change == [1, 2]
+    assert mock_iter_change_set.call_args.kwargs["output_json"] is True
+
+
+def test_plan_command_json_and_jsonl_are_exclusive():
+    runner = CliRunner()
+    result = runner.invoke(cli, ["plan", "--json", "--jsonl", "config.yml"])
+
+    assert result.exit_code == 1
+
+
 # ============= Sync Command Tests =============
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_json_output(mock_build_change_set, mock_change_set):
     """Test that sync command produces valid JSON output when --json flag is used"""
     mock_build_change_set.return_value = mock_change_set
@@ -285,7 +376,7 @@ def test_sync_command_json_output(mock_build_change_set, mock_change_set):
     assert applied_job["job_id"] == 42
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_json_output_no_changes(mock_build_change_set, mock_empty_change_set):
     """Test that sync command produces valid JSON output with no changes"""
     mock_build_change_set.return_value = mock_empty_change_set
@@ -305,7 +396,7 @@ def test_sync_command_json_output_no_changes(mock_build_change_set, mock_empty_c
     assert json_output["apply_success"] is True
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_regular_output(mock_build_change_set, mock_change_set):
     """Test that sync command produces regular output when --json flag is not used"""
     mock_build_change_set.return_value = mock_change_set
@@ -320,7 +411,7 @@ def test_sync_command_regular_output(mock_build_change_set, mock_change_set):
         json.loads(result.output)
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_with_fail_fast(mock_build_change_set):
     """Test that sync command passes fail_fast parameter to change_set.apply()"""
     mock_change_set = Mock()
@@ -333,10 +424,10 @@ def test_sync_command_with_fail_fast(mock_build_change_set):
     assert result.exit_code == 0
 
     # Verify that apply was called with fail_fast=True
-    mock_change_set.apply.assert_called_once_with(fail_fast=True)
+    mock_change_set.apply.assert_called_once_with(fail_fast=True, workers=1)
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_without_fail_fast(mock_build_change_set):
     """Test that sync command passes fail_fast=False by default to change_set.apply()"""
     mock_change_set = Mock()
@@ -349,13 +440,27 @@ def test_sync_command_without_fail_fast(mock_build_change_set):
     assert result.exit_code == 0
 
     # Verify that apply was called with fail_fast=False (default)
-    mock_change_set.apply.assert_called_once_with(fail_fast=False)
+    mock_change_set.apply.assert_called_once_with(fail_fast=False, workers=1)
+
+
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
+def test_sync_command_with_apply_workers(mock_build_change_set):
+    """Test that sync command passes --apply-workers to change_set.apply()"""
+    mock_change_set = Mock()
+    mock_change_set.__len__ = Mock(return_value=2)  # Non-empty change set
+    mock_build_change_set.return_value = mock_change_set
+
+    runner = CliRunner()
+    result = runner.invoke(cli, ["sync", "--apply-workers", "4", "config.yml"])
+
+    assert result.exit_code == 0
+    mock_change_set.apply.assert_called_once_with(fail_fast=False, workers=4)
 
 
 # ============= Exclude Identifiers Matching Tests =============
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_plan_command_with_exclude_identifiers_matching(
     mock_build_change_set, mock_empty_change_set
 ):
@@ -383,7 +488,7 @@ def test_plan_command_with_exclude_identifiers_matching(
     assert call_args[0][6] == "staging:.*"  # exclude_identifiers_matching
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_with_exclude_identifiers_matching(
     mock_build_change_set, mock_empty_change_set
 ):
@@ -405,7 +510,7 @@ def test_sync_command_with_exclude_identifiers_matching(
     assert call_args[0][6] == "legacy:.*"  # exclude_identifiers_matching
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_plan_command_without_exclude_identifiers_matching(
     mock_build_change_set, mock_empty_change_set
 ):
@@ -425,7 +530,7 @@ def test_plan_command_without_exclude_identifiers_matching(
     assert call_args[0][6] is None  # exclude_identifiers_matching
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_without_exclude_identifiers_matching(
     mock_build_change_set, mock_empty_change_set
 ):
@@ -445,7 +550,7 @@ def test_sync_command_without_exclude_identifiers_matching(
     assert call_args[0][6] is None  # exclude_identifiers_matching
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_plan_command_with_complex_regex_pattern(mock_build_change_set, mock_empty_change_set):
     """Test that plan command handles complex regex patterns correctly"""
     mock_build_change_set.return_value = mock_empty_change_set
@@ -466,7 +571,7 @@ def test_plan_command_with_complex_regex_pattern(mock_build_change_set, mock_emp
     assert call_args[0][6] == complex_pattern  # exclude_identifiers_matching
 
 
-@patch("dbt_jobs_as_code.main.build_change_set")
+@patch("dbt_jobs_as_code.cloud_yaml_mapping.change_set.build_change_set")
 def test_sync_command_with_json_and_exclude_pattern(mock_build_change_set, mock_empty_change_set):
     """Test that sync command works with both --json and --exclude-identifiers-matching flags"""
     mock_build_change_set.return_value = mock_empty_change_set
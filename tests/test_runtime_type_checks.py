@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dbt_jobs_as_code import RUNTIME_TYPE_CHECKS_ENV_VAR
+
+CODE = """
+from dbt_jobs_as_code.loader.load import resolve_file_paths
+try:
+    resolve_file_paths(config_pattern=1)
+except Exception as e:
+    print(type(e).__name__)
+"""
+
+
+@pytest.mark.parametrize(
+    "env_value, expected_error",
+    [
+        (None, "TypeError"),
+        ("0", "TypeError"),
+        ("1", "BeartypeCallHintParamViolation"),
+        ("true", "BeartypeCallHintParamViolation"),
+    ],
+)
+def test_runtime_type_checks_env_var(env_value, expected_error):
+    env = {key: value for key, value in os.environ.items() if key != RUNTIME_TYPE_CHECKS_ENV_VAR}
+    if env_value is not None:
+        env[RUNTIME_TYPE_CHECKS_ENV_VAR] = env_value
+
+    result = subprocess.run(
+        [sys.executable, "-c", CODE], capture_output=True, text=True, env=env, check=True
+    )
+
+    assert result.stdout.strip() == expected_error